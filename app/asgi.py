@@ -0,0 +1,8 @@
+# ASGI version of the pricing API, which runs alongside the Flask app in main.py.
+# Run with any ASGI server, e.g.: uvicorn asgi:app --port 8000
+import sys
+sys.path.append('../fincomepy')
+from fincomepy.service import PricingService, create_asgi_app
+
+# requests arriving within 2 ms of each other are priced in one vectorized batch
+app = create_asgi_app(PricingService(window=0.002, max_batch=1024))
@@ -1,4 +1,5 @@
-from flask import Flask, render_template, url_for, request 
+from flask import Flask, render_template, url_for, request, g, Response
+import json
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -7,10 +8,47 @@ from helper import get_bond_info, get_repo_info, get_bond_series, process_df
 import sys
 sys.path.append('../fincomepy')
 from fincomepy import Bond, Repo, BondFuture, ZspreadPar, ZspreadZero, CDS
+from fincomepy import instrumentation
+from fincomepy.service import SyncPricingService, dumps
 ## TO DO: future work: add download to result table and figure
 
 app = Flask(__name__)
 
+# route timings are only recorded when instrumentation is enabled (FINCOMEPY_INSTRUMENTATION=1)
+@app.before_request
+def start_timer():
+    g.instrumentation_timer = instrumentation.timer("route." + (request.endpoint or "unknown"))
+    g.instrumentation_timer.__enter__()
+
+# teardown_request also runs when the view raises, unlike after_request
+@app.teardown_request
+def stop_timer(exception=None):
+    timer = g.pop("instrumentation_timer", None)
+    if timer is not None:
+        timer.__exit__(None, None, None)
+
+@app.route("/metrics")
+def metrics():
+    return Response(instrumentation.to_prometheus(), mimetype="text/plain")
+
+# single-instrument JSON requests arriving within 2 ms of each other are priced together in one batch
+api_service = SyncPricingService(window=0.002, max_batch=1024)
+
+@app.route("/api/<kind>", methods=['POST'])
+def api_price(kind):
+    # kind is "bond", "repo" or "bond_future"; the body is one instrument (object) or a list of instruments
+    payload = request.get_json(force=True, silent=True)
+    try:
+        if isinstance(payload, list):
+            res = api_service.price_many(kind, payload)
+        elif isinstance(payload, dict):
+            res = api_service.price(kind, **payload)
+        else:
+            raise Exception("the body should be a JSON object or list.")
+    except Exception as err:
+        return Response(json.dumps({"error": str(err)}), status=400, mimetype="application/json")
+    return Response(dumps(res), mimetype="application/json")
+
 @app.route("/")
 @app.route("/home")
 def home():
@@ -0,0 +1,80 @@
+'''
+Load test of the Flask pricing routes.
+
+The Flask app of app/main.py is served by a threaded werkzeug server, and client threads send
+single-bond requests for a few seconds to:
+
+    /bond       the form route, which builds a Bond and a pandas DataFrame per request
+    /api/bond   the JSON route, with one batch per request (max_batch=1)
+    /api/bond   the JSON route, with requests coalesced over a 2 ms window
+
+Usage: python benchmarks/bench_api.py [comma separated numbers of client threads] [seconds per run]
+'''
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+import numpy as np
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+import main
+from fincomepy.service import SyncPricingService
+
+BOND = {"settlement": "2020-07-15", "maturity": "2030-05-15", "coupon_perc": 0.625, "price_perc": 100.015625,
+        "frequency": 2, "basis": 1}
+
+
+def load(url, body, content_type, clients, duration):
+    '''Requests per second and latency percentiles (in ms) of clients threads posting body to url.'''
+    latencies = [[] for _ in range(clients)]
+    deadline = time.perf_counter() + duration
+
+    def client(i):
+        while time.perf_counter() < deadline:
+            request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+            start = time.perf_counter()
+            with urllib.request.urlopen(request) as response:
+                response.read()
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = np.concatenate([np.asarray(item) for item in latencies])
+    return latencies.size / (time.perf_counter() - start), np.percentile(latencies, [50, 99]) * 1000
+
+
+def main_(clients=(1, 16, 64), duration=3.0):
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, main.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = "http://127.0.0.1:{}".format(server.server_port)
+    form = urllib.parse.urlencode(BOND).encode()
+    payload = json.dumps(BOND).encode()
+    try:
+        for n in clients:
+            runs = [("/bond (form)", "/bond", form, "application/x-www-form-urlencoded", None),
+                    ("/api/bond unbatched", "/api/bond", payload, "application/json", SyncPricingService(max_batch=1)),
+                    ("/api/bond 2 ms window", "/api/bond", payload, "application/json", SyncPricingService(window=0.002))]
+            for label, path, body, content_type, service in runs:
+                if service is not None:
+                    main.api_service = service
+                rate, (p50, p99) = load(base + path, body, content_type, n, duration)
+                print("{:>3d} clients  {:<22s} {:>7.0f} requests/s  p50 {:>7.2f} ms  p99 {:>7.2f} ms".format(
+                    n, label, rate, p50, p99))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    clients = tuple(int(c) for c in sys.argv[1].split(",")) if len(sys.argv) > 1 else (1, 16, 64)
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 3.0
+    main_(clients, duration)
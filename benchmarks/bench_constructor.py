@@ -0,0 +1,45 @@
+'''
+Time the constructors of the fincomepy classes and the z-spread / CDS solves which used to
+synchronize _reg_dict and _perc_dict on every call.
+
+Usage: python benchmarks/bench_constructor.py [number]
+'''
+import sys
+import timeit
+from datetime import date
+import numpy as np
+from fincomepy import Bond, Repo, BondFuture, ZspreadZero, ZspreadPar, CDS
+
+CURVE_SIZE = 600
+CASES = {
+    "Bond.__init__": lambda: Bond(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625,
+        price_perc=100.015625, frequency=2, basis=1),
+    "Repo.__init__": lambda: Repo(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625,
+        price_perc=(99+30/32), frequency=2, basis=1, bond_face_value=100000000, repo_period=1, repo_rate_perc=0.145),
+    "BondFuture.__init__": lambda: BondFuture(settlement=date(2020,7,17), maturity=date(2027,5,15),
+        coupon_perc=2.375, price_perc=113.015625, frequency=2, basis=1, repo_period=75, repo_rate_perc=0.14,
+        futures_pr_perc=139.4375, conversion_factor=0.8072),
+    "ZspreadZero.__init__ ({} points)".format(CURVE_SIZE): lambda: ZspreadZero(np.linspace(1.0, 3.0, CURVE_SIZE),
+        np.array([3.0] * (CURVE_SIZE - 1) + [103.0])),
+    "ZspreadZero.get_zspread ({} points)".format(CURVE_SIZE): lambda: ZspreadZero(np.linspace(1.0, 3.0, CURVE_SIZE),
+        np.array([3.0] * (CURVE_SIZE - 1) + [103.0])).get_zspread(),
+    "ZspreadPar.get_zspread (30 points)": lambda: ZspreadPar(np.linspace(1.0, 3.0, 30),
+        np.array([4.0] * 29 + [104.0])).get_zspread(),
+    "CDS.__init__ ({} points)".format(CURVE_SIZE): lambda: CDS(np.array([3.12] * CURVE_SIZE),
+        np.array([3.72] * CURVE_SIZE), face_value_perc=100, rr_perc=40),
+}
+
+
+_cds = CDS(np.array([3.12] * CURVE_SIZE), np.array([3.72] * CURVE_SIZE), face_value_perc=100, rr_perc=40)
+CASES["CDS.update_dict ({} points)".format(CURVE_SIZE)] = _cds.update_dict
+
+
+def main(number=2000):
+    for name, func in CASES.items():
+        n = max(1, number // 20) if "get_zspread" in name else number
+        seconds = min(timeit.repeat(func, number=n, repeat=7)) / n
+        print("{:<40s} {:>10.2f} us".format(name, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,43 @@
+'''
+Measure the scaling of fincomepy.parallel.pmap with the number of worker processes.
+
+Every run prices the same bonds with fincomepy.batch.bond_analytics and reports the wall time and
+the speedup over one worker. Scaling is only meaningful up to the number of physical cores.
+
+Usage: python benchmarks/bench_parallel.py [number of bonds] [comma separated worker counts]
+'''
+import os
+import sys
+import time
+import numpy as np
+from fincomepy import batch
+from fincomepy.parallel import pmap
+
+
+def bond_columns(n):
+    rng = np.random.default_rng(2020)
+    settlement = np.datetime64("2020-07-15") + rng.integers(0, 30, n).astype("timedelta64[D]")
+    maturity = settlement + rng.integers(365, 30 * 365, n).astype("timedelta64[D]")
+    coupon_perc = np.round(rng.uniform(0.125, 5.0, n), 3)
+    pcd, ncd, _ = batch.schedule(settlement, maturity, 2)
+    price_perc = batch.dirty_price(settlement, maturity, coupon_perc, rng.uniform(0.5, 5.0, n)) - \
+        batch.accrint(pcd, ncd, settlement, coupon_perc)
+    return {"settlement": settlement, "maturity": maturity, "coupon_perc": coupon_perc, "price_perc": price_perc}
+
+
+def main(n=2000000, worker_counts=(1, 2, 4, 8, 16)):
+    columns = bond_columns(n)
+    print("{} bonds, {} cores".format(n, os.cpu_count()))
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        pmap(batch.bond_analytics, columns, workers=workers, frequency=2)
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        print("{:>3d} workers {:>9.3f}s  speedup {:>5.2f}x".format(workers, seconds, baseline / seconds))
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    worker_counts = tuple(int(w) for w in sys.argv[2].split(",")) if len(sys.argv) > 2 else (1, 2, 4, 8, 16)
+    main(n, worker_counts)
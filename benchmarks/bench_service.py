@@ -0,0 +1,49 @@
+'''
+Measure the latency of the asyncio PricingService under many concurrent callers.
+
+Each of the callers sends single-bond requests one after the other. With micro-batching the
+requests of all callers which arrive within the coalescing window are priced in one vectorized
+batch; max_batch=1 prices every request on its own.
+
+Usage: python benchmarks/bench_service.py [comma separated numbers of callers] [requests per caller]
+'''
+import asyncio
+import sys
+import time
+import numpy as np
+from fincomepy.service import PricingService
+from bench_parallel import bond_columns
+
+
+async def load(service, rows, callers, requests):
+    latencies = []
+
+    async def caller(i):
+        for k in range(requests):
+            row = rows[(i * requests + k) % len(rows)]
+            start = time.perf_counter()
+            await service.price_bond(**row)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[caller(i) for i in range(callers)])
+    return len(latencies) / (time.perf_counter() - start), np.percentile(latencies, [50, 99]) * 1000
+
+
+def main(callers=(10, 100, 500), requests=20):
+    columns = bond_columns(2000)
+    rows = [{"settlement": str(columns["settlement"][i]), "maturity": str(columns["maturity"][i]),
+             "coupon_perc": float(columns["coupon_perc"][i]), "price_perc": float(columns["price_perc"][i]),
+             "frequency": 2} for i in range(2000)]
+    for n in callers:
+        for label, service in [("no batching", PricingService(max_batch=1)),
+                               ("2 ms window", PricingService(window=0.002))]:
+            rate, (p50, p99) = asyncio.run(load(service, rows, n, requests))
+            print("{:>4d} callers  {:<12s} {:>8.0f} requests/s  p50 {:>8.2f} ms  p99 {:>8.2f} ms".format(
+                n, label, rate, p50, p99))
+
+
+if __name__ == "__main__":
+    callers = tuple(int(c) for c in sys.argv[1].split(",")) if len(sys.argv) > 1 else (10, 100, 500)
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    main(callers, requests)
@@ -0,0 +1,72 @@
+'''
+Compare the startup time of a worker which recomputes the coupon schedules of a bond universe with
+one which opens them from fincomepy.store.
+
+Each startup runs in a fresh process, so the times include nothing cached by an earlier run
+except the page cache of the store files. The recomputing worker also has to load the terms of the
+bonds (here, generate them), which the store makes unnecessary.
+
+Usage: python benchmarks/bench_store.py [number of bonds]
+'''
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from fincomepy.store import write_schedules
+from bench_parallel import bond_columns
+
+VALUATION_DATE = "2020-07-15"
+
+# the package import is the same for both workers and is not timed
+RECOMPUTE = '''
+import time
+import numpy as np
+from fincomepy import batch
+from bench_parallel import bond_columns
+start = time.perf_counter()
+columns = bond_columns({nbond})
+settlement = np.full({nbond}, np.datetime64("{date}"))
+pcd, ncd, nperiod = batch.schedule(settlement, columns["maturity"], 2)
+fp = batch.first_period(pcd, ncd, settlement, 2, 1)
+indptr = np.concatenate([[0], np.cumsum(nperiod)])
+rows = np.repeat(np.arange({nbond}), nperiod)
+j = np.arange(indptr[-1]) - indptr[rows]
+dates = batch.coupon_date(columns["maturity"][rows], nperiod[rows] - 1 - j, 2)
+periods = fp[rows] + j
+print(time.perf_counter() - start)
+'''
+
+OPEN = '''
+import time
+from fincomepy.store import MappedStore
+start = time.perf_counter()
+table = MappedStore("{path}").schedules("{date}")
+dates = table.row(table.ids[0])["dates"]
+print(time.perf_counter() - start)
+'''
+
+
+def run(code):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                       os.path.dirname(os.path.abspath(__file__))]))
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.split()[-1])
+
+
+def main(nbond=1000000):
+    columns = bond_columns(nbond)
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        write_schedules(path, np.datetime64(VALUATION_DATE), np.arange(nbond), columns["maturity"],
+                        columns["coupon_perc"], 2)
+        print("{} bonds, store written in {:.2f} s".format(nbond, time.perf_counter() - start))
+        recompute = min(run(RECOMPUTE.format(nbond=nbond, date=VALUATION_DATE)) for _ in range(3))
+        opened = min(run(OPEN.format(path=path, date=VALUATION_DATE)) for _ in range(3))
+        print("recompute schedules {:>8.3f} s".format(recompute))
+        print("open store          {:>8.3f} s".format(opened))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,56 @@
+'''
+Measure the tick throughput of fincomepy.streaming.StreamingBondPricer.
+
+A random stream of price ticks on a universe of bonds is priced with stream (synchronous
+iterator) and astream (asynchronous iterator), for several batch sizes.
+
+Usage: python benchmarks/bench_streaming.py [number of bonds] [number of ticks]
+'''
+import asyncio
+import sys
+import time
+import numpy as np
+from fincomepy.streaming import StreamingBondPricer
+from bench_parallel import bond_columns
+
+
+def ticks(columns, ids, n, seed=0):
+    '''n (id, clean price) ticks: random bonds priced close to their initial price.'''
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(ids), n)
+    prices = columns["price_perc"][index] + rng.normal(0, 0.02, n)
+    return list(zip([ids[i] for i in index], prices.tolist()))
+
+
+async def consume(pricer, stream, batch_size):
+    async def feed():
+        for tick in stream:
+            yield tick
+    count = 0
+    async for _ in pricer.astream(feed(), batch_size):
+        count += 1
+    return count
+
+
+def main(nbond=2000, ntick=200000):
+    columns = bond_columns(nbond)
+    ids = ["B{}".format(i) for i in range(nbond)]
+    pricer = StreamingBondPricer(ids, np.datetime64("2020-07-15"), columns["maturity"], columns["coupon_perc"], 2)
+    stream = ticks(columns, ids, ntick)
+    print("{} bonds, {} ticks".format(nbond, ntick))
+    for batch_size in (1, 16, 256, 1024):
+        n = ntick if batch_size > 1 else ntick // 20
+        start = time.perf_counter()
+        for _ in pricer.stream(stream[:n], batch_size):
+            pass
+        rate = n / (time.perf_counter() - start)
+        start = time.perf_counter()
+        asyncio.run(consume(pricer, stream[:n], batch_size))
+        async_rate = n / (time.perf_counter() - start)
+        print("batch {:>5d}  stream {:>10.0f} ticks/s  astream {:>10.0f} ticks/s".format(batch_size, rate, async_rate))
+
+
+if __name__ == "__main__":
+    nbond = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    ntick = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    main(nbond, ntick)
@@ -0,0 +1,54 @@
+'''
+Measure the concurrent throughput of the fincomepy.batch kernels with the number of threads.
+
+Each thread repeatedly prices its own block of bonds with fincomepy.batch.bond_analytics, the way
+the request threads of a pricing service would. The NumPy operations of the kernels release the
+GIL, so throughput grows with the number of threads up to the number of cores.
+
+Usage: python benchmarks/bench_threads.py [bonds per call] [comma separated thread counts]
+'''
+import os
+import sys
+import threading
+import time
+from fincomepy import batch
+from bench_parallel import bond_columns
+
+DURATION = 3.0
+
+
+def throughput(columns, threads):
+    '''Bonds priced per second by threads threads calling bond_analytics concurrently.'''
+    counts = [0] * threads
+    barrier = threading.Barrier(threads + 1)
+    deadline = []
+    def work(i):
+        barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            batch.bond_analytics(frequency=2, **columns)
+            counts[i] += 1
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    start = time.perf_counter()
+    deadline.append(start + DURATION)
+    barrier.wait()
+    for worker in workers:
+        worker.join()
+    return sum(counts) * columns["settlement"].size / (time.perf_counter() - start)
+
+
+def main(n=20000, thread_counts=(1, 2, 4, 8)):
+    columns = bond_columns(n)
+    print("{} bonds per call, {} cores".format(n, os.cpu_count()))
+    baseline = None
+    for threads in thread_counts:
+        rate = throughput(columns, threads)
+        baseline = baseline or rate
+        print("{:>3d} threads {:>12.0f} bonds/s  speedup {:>5.2f}x".format(threads, rate, rate / baseline))
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    thread_counts = tuple(int(t) for t in sys.argv[2].split(",")) if len(sys.argv) > 2 else (1, 2, 4, 8)
+    main(n, thread_counts)
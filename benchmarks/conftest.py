@@ -0,0 +1,71 @@
+'''
+Shared options and fixtures of the benchmark suite.
+
+The suite runs with pytest-benchmark, which is not a runtime dependency of fincomepy. Without
+the plugin the benchmark modules are not collected.
+'''
+import numpy as np
+import pytest
+from fincomepy import batch
+
+try:
+    import pytest_benchmark
+except ImportError:
+    collect_ignore_glob = ["test_*.py"]
+
+
+def pytest_addoption(parser):
+    parser.addoption("--bench-scale", default="1,1000",
+        help="comma separated numbers of instruments, e.g. 1,1000,100000 (default: 1,1000)")
+    parser.addoption("--bench-curve", default="10,100,600",
+        help="comma separated curve lengths (default: 10,100,600)")
+
+
+def pytest_generate_tests(metafunc):
+    if "n_instruments" in metafunc.fixturenames:
+        scales = [int(n) for n in metafunc.config.getoption("--bench-scale").split(",")]
+        metafunc.parametrize("n_instruments", scales)
+    if "curve_length" in metafunc.fixturenames:
+        lengths = [int(n) for n in metafunc.config.getoption("--bench-curve").split(",")]
+        metafunc.parametrize("curve_length", lengths)
+
+
+@pytest.fixture
+def bond_terms(n_instruments):
+    '''Deterministic, realistic bond terms: one dictionary of columns with n_instruments elements.'''
+    rng = np.random.default_rng(2020)
+    settlement = np.datetime64("2020-07-15") + rng.integers(0, 30, n_instruments).astype("timedelta64[D]")
+    maturity = settlement + rng.integers(365, 30 * 365, n_instruments).astype("timedelta64[D]")
+    coupon_perc = np.round(rng.uniform(0.125, 5.0, n_instruments), 3)
+    # clean prices consistent with yields between 0.5% and 5%
+    pcd, ncd, _ = batch.schedule(settlement, maturity, 2)
+    price_perc = batch.dirty_price(settlement, maturity, coupon_perc, rng.uniform(0.5, 5.0, n_instruments)) - \
+        batch.accrint(pcd, ncd, settlement, coupon_perc)
+    return {
+        "settlement": settlement,
+        "maturity": maturity,
+        "coupon_perc": coupon_perc,
+        "price_perc": np.round(price_perc, 4),
+        "frequency": np.full(n_instruments, 2),
+        "basis": np.full(n_instruments, 1),
+    }
+
+
+def bond_kwargs(terms):
+    '''Convert the columns of bond_terms into a list of keyword arguments for Bond.'''
+    return [{
+        "settlement": terms["settlement"][i].item(),
+        "maturity": terms["maturity"][i].item(),
+        "coupon_perc": float(terms["coupon_perc"][i]),
+        "price_perc": float(terms["price_perc"][i]),
+        "frequency": int(terms["frequency"][i]),
+        "basis": int(terms["basis"][i]),
+    } for i in range(terms["settlement"].size)]
+
+
+def run(benchmark, func, setup=None, n=1):
+    '''Run a benchmark with fewer rounds for large instrument counts.'''
+    rounds = max(1, min(10, 1000 // max(n, 1)))
+    if setup is None:
+        return benchmark.pedantic(func, rounds=rounds, iterations=1, warmup_rounds=0)
+    return benchmark.pedantic(func, setup=setup, rounds=rounds, warmup_rounds=0)
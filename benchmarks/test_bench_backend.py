@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+import fincomepy
+from fincomepy import batch, backend
+from conftest import run
+
+
+@pytest.fixture(params=["numpy", "numba"])
+def backend_name(request):
+    if request.param not in backend.available_backends():
+        pytest.skip("numba is not installed")
+    original = fincomepy.get_backend()
+    fincomepy.set_backend(request.param)
+    yield request.param
+    fincomepy.set_backend(original)
+
+
+def test_backend_bond_analytics(benchmark, bond_terms, n_instruments, backend_name):
+    # compile (or load the cached kernels) outside of the timing
+    batch.bond_analytics(**{key: values[:1] for key, values in bond_terms.items()})
+    res = run(benchmark, lambda: batch.bond_analytics(**bond_terms), n=min(n_instruments, 10))
+    assert np.isfinite(res["yld"]).all()
+
+
+def test_backend_bootstrap(benchmark, curve_length, backend_name):
+    par_rates = np.tile(np.linspace(0.1, 0.3, curve_length), (100, 1))
+    batch.bootstrap_discount_factors(par_rates[:1])
+    res = run(benchmark, lambda: batch.bootstrap_discount_factors(par_rates))
+    assert res.shape == par_rates.shape
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from fincomepy import Bond, batch
+from conftest import bond_kwargs, run
+
+
+def test_bond_init(benchmark, bond_terms, n_instruments):
+    kwargs = bond_kwargs(bond_terms)
+    run(benchmark, lambda: [Bond(**kw) for kw in kwargs], n=n_instruments)
+
+
+def test_bond_yld(benchmark, bond_terms, n_instruments):
+    kwargs = bond_kwargs(bond_terms)
+    run(benchmark, lambda: [Bond.yld(kw["settlement"], kw["maturity"], kw["coupon_perc"], kw["price_perc"], 100,
+        kw["frequency"], kw["basis"]) for kw in kwargs], n=n_instruments)
+
+
+def _risk_metric(benchmark, bond_terms, n_instruments, method):
+    kwargs = bond_kwargs(bond_terms)
+    # the metrics are cached on the object, so every round prices freshly constructed bonds
+    # whose yield is already known
+    def setup():
+        bonds = [Bond(**kw) for kw in kwargs]
+        for bond in bonds:
+            bond._yld = Bond.yld(bond._settlement, bond._maturity, bond._perc_dict["coupon"],
+                bond._perc_dict["clean_price"], bond._redemption, bond._frequency, bond._basis)
+        return (bonds,), {}
+    run(benchmark, lambda bonds: [getattr(bond, method)() for bond in bonds], setup=setup, n=n_instruments)
+
+
+def test_bond_mac_duration(benchmark, bond_terms, n_instruments):
+    _risk_metric(benchmark, bond_terms, n_instruments, "mac_duration")
+
+
+def test_bond_mod_duration(benchmark, bond_terms, n_instruments):
+    _risk_metric(benchmark, bond_terms, n_instruments, "mod_duration")
+
+
+def test_bond_DV01(benchmark, bond_terms, n_instruments):
+    _risk_metric(benchmark, bond_terms, n_instruments, "DV01")
+
+
+def test_bond_convexity(benchmark, bond_terms, n_instruments):
+    _risk_metric(benchmark, bond_terms, n_instruments, "convexity")
+
+
+def test_batch_bond_analytics(benchmark, bond_terms, n_instruments):
+    res = run(benchmark, lambda: batch.bond_analytics(**bond_terms), n=min(n_instruments, 10))
+    assert np.isfinite(res["yld"]).all()
+
+
+# batch.yld and the screening paths in one group, so the report compares them with each other
+@pytest.mark.benchmark(group="batch_yld")
+def test_batch_yld(benchmark, bond_terms, n_instruments):
+    terms = [bond_terms[key] for key in ["settlement", "maturity", "coupon_perc", "price_perc"]]
+    # compile (or load the cached kernels) outside of the timing
+    batch.yld(*[values[:1] for values in terms])
+    yld = run(benchmark, lambda: batch.yld(*terms), n=min(n_instruments, 10))
+    assert np.isfinite(yld).all()
+
+
+@pytest.mark.benchmark(group="batch_yld")
+def test_batch_approx_yld(benchmark, bond_terms, n_instruments):
+    terms = [bond_terms[key] for key in ["settlement", "maturity", "coupon_perc", "price_perc"]]
+    batch.approx_yld(*[values[:1] for values in terms])
+    yld, error_bound = run(benchmark, lambda: batch.approx_yld(*terms), n=min(n_instruments, 10))
+    assert (error_bound <= 1e-4).all()
+
+
+@pytest.mark.benchmark(group="batch_yld")
+def test_batch_approx_yld_from_cash_flows(benchmark, bond_terms, n_instruments):
+    # screening at new prices: the cash flows are laid out once, e.g. by MappedStore.cash_flows
+    settlement, maturity, coupon_perc = bond_terms["settlement"], bond_terms["maturity"], bond_terms["coupon_perc"]
+    pcd, ncd, nperiod = batch.schedule(settlement, maturity, 2)
+    cash_flows = batch.cash_flows_from_schedule(batch.first_period(pcd, ncd, settlement, 2, 1), nperiod,
+                                                coupon_perc, 100, 2)
+    dirty_price_perc = bond_terms["price_perc"] + batch.accrint(pcd, ncd, settlement, coupon_perc)
+    batch.approx_yld_from_cash_flows(cash_flows.take([0]), dirty_price_perc[:1])
+    yld, error_bound = run(benchmark, lambda: batch.approx_yld_from_cash_flows(cash_flows, dirty_price_perc),
+                           n=min(n_instruments, 10))
+    assert (error_bound <= 1e-4).all()
@@ -0,0 +1,18 @@
+import numpy as np
+from fincomepy import ZspreadPar, CDS
+from conftest import run
+
+
+def test_zspread_par_get_zspread(benchmark, curve_length):
+    # per-period par rates and coupons which keep every bootstrapped discount factor positive
+    par_rates = np.linspace(0.1, 0.3, curve_length)
+    coupon_cf = np.array([0.5] * (curve_length - 1) + [100.5])
+    zspread = run(benchmark, lambda: ZspreadPar(par_rates, coupon_cf).get_zspread())
+    assert zspread > 0
+
+
+def test_cds_spread(benchmark, curve_length):
+    risk_free = np.linspace(0.5, 1.5, curve_length)
+    risky = risk_free + 0.3
+    res = run(benchmark, lambda: CDS(risk_free, risky, face_value_perc=100, rr_perc=40).cds_spread())
+    assert res.size == curve_length
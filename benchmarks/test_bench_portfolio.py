@@ -0,0 +1,24 @@
+import numpy as np
+from fincomepy import BondBook, Portfolio, ScenarioEngine
+from conftest import run
+
+TENORS = [0.5, 1, 2, 3, 5, 7, 10, 20, 30]
+
+
+def _book(terms):
+    return BondBook(terms["settlement"], terms["maturity"], terms["coupon_perc"], terms["price_perc"],
+                    terms["frequency"], terms["basis"])
+
+
+def test_portfolio_construction(benchmark, bond_terms, n_instruments):
+    book = _book(bond_terms)
+    res = run(benchmark, lambda: Portfolio(book, 1e6), n=min(n_instruments, 10))
+    assert np.isfinite(res.DV01())
+
+
+def test_scenario_engine(benchmark, bond_terms, n_instruments):
+    portfolio = Portfolio(_book(bond_terms), 1e6)
+    shocks = np.random.default_rng(2020).normal(0, 0.25, (1000, len(TENORS)))
+    engine = ScenarioEngine(portfolio, TENORS)
+    res = run(benchmark, lambda: engine.run(shocks, aggregate=True), n=n_instruments)
+    assert np.isfinite(res).all()
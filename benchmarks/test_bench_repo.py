@@ -0,0 +1,34 @@
+import numpy as np
+from fincomepy import Repo, BondFuture, batch
+from conftest import bond_kwargs, run
+
+
+def test_repo_break_even_yld(benchmark, bond_terms, n_instruments):
+    kwargs = bond_kwargs(bond_terms)
+    def setup():
+        repos = [Repo(bond_face_value=100000000, repo_period=32, repo_rate_perc=0.145, **kw) for kw in kwargs]
+        for repo in repos:
+            repo.start_payment()
+            repo.end_payment()
+        return (repos,), {}
+    run(benchmark, lambda repos: [repo.break_even_yld() for repo in repos], setup=setup, n=n_instruments)
+
+
+def test_bond_future_full_future_val(benchmark, bond_terms, n_instruments):
+    kwargs = bond_kwargs(bond_terms)
+    def setup():
+        return ([BondFuture(repo_period=75, repo_rate_perc=0.14, futures_pr_perc=139.4375, conversion_factor=0.8072,
+            **kw) for kw in kwargs],), {}
+    run(benchmark, lambda futures: [future.full_future_val() for future in futures], setup=setup, n=n_instruments)
+
+
+def test_batch_repo_analytics(benchmark, bond_terms, n_instruments):
+    res = run(benchmark, lambda: batch.repo_analytics(bond_face_value=100000000, repo_period=32,
+        repo_rate_perc=0.145, **bond_terms), n=min(n_instruments, 10))
+    assert np.isfinite(res["end_payment"]).all()
+
+
+def test_batch_future_analytics(benchmark, bond_terms, n_instruments):
+    res = run(benchmark, lambda: batch.future_analytics(repo_period=75, repo_rate_perc=0.14,
+        futures_pr_perc=139.4375, conversion_factor=0.8072, **bond_terms), n=min(n_instruments, 10))
+    assert np.isfinite(res["full_future_val"]).all()
@@ -8,4 +8,10 @@ from .zspread import ZspreadZero, ZspreadPar
 from .bond import Bond
 from .repo import Repo
 from .bondfuture import BondFuture
-from .cds import CDS
+from .cds import CDS, HazardCurve
+from .record import BondRecord, BondBook
+from .curve import ZeroCurve
+from .portfolio import Portfolio
+from .scenario import ScenarioEngine
+from .streaming import StreamingBondPricer
+from .backend import set_backend, get_backend
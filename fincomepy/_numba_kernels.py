@@ -0,0 +1,229 @@
+'''
+Numba versions of the per-bond loops of fincomepy.batch, used by the numba backend.
+
+Each kernel takes contiguous one-dimensional arrays (float64, or int64 for counts and
+frequencies) with one element per bond or curve, performs the same floating point operations in
+the same order as the NumPy version, and releases the GIL. The approximate yield kernels are the
+exception: they carry the discount factors from one cash flow to the next, where the NumPy version
+of approx_yld_from_cash_flows discounts every cash flow separately, so they agree to rounding.
+'''
+import math
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True, nogil=True)
+def cash_flow_sums(first_period, nperiod, rate, redemption, frequency, yld, order):
+    sums = np.zeros((order + 1, first_period.size))
+    for i in range(first_period.size):
+        if not math.isfinite(yld[i]):
+            # as in the NumPy version, a bond without a yield gets NaN sums
+            sums[:, i] = np.nan
+            continue
+        v = 1 / (1 + yld[i] * 0.01 / frequency[i])
+        DF = v ** first_period[i]
+        coupon = rate[i] * 0.01 / frequency[i]
+        for k in range(nperiod[i]):
+            CF = coupon
+            if k == nperiod[i] - 1:
+                CF = CF + redemption[i] * 0.01
+            CF_PV = CF * DF
+            sums[0, i] += CF_PV
+            if order >= 1:
+                t = first_period[i] + k
+                sums[1, i] += CF_PV * t
+                if order >= 2:
+                    sums[2, i] += CF_PV * t * t
+            DF = DF * v
+    return sums
+
+
+@njit(cache=True, nogil=True)
+def yld_from_schedule(first_period, nperiod, rate, redemption, frequency, dirty_price_target, tol, max_iter):
+    n = first_period.size
+    yld = np.full(n, np.nan)
+    iterations = 0
+    for i in range(n):
+        if not (math.isfinite(dirty_price_target[i]) and nperiod[i] > 0):
+            continue
+        y = 0.01
+        f_i = frequency[i]
+        converged = False
+        for it in range(max_iter):
+            iterations = max(iterations, it + 1)
+            v = 1 / (1 + y * 0.01 / f_i)
+            DF = v ** first_period[i]
+            coupon = rate[i] * 0.01 / f_i
+            s0 = 0.0
+            s1 = 0.0
+            for k in range(nperiod[i]):
+                CF = coupon
+                if k == nperiod[i] - 1:
+                    CF = CF + redemption[i] * 0.01
+                CF_PV = CF * DF
+                s0 += CF_PV
+                s1 += CF_PV * (first_period[i] + k)
+                DF = DF * v
+            f = s0 * 100 - dirty_price_target[i]
+            fprime = -s1 / ((1 + y * 0.01 / f_i) * f_i)
+            if fprime == 0:
+                break
+            step = f / fprime
+            if not math.isfinite(step):
+                break
+            y = max(y - step, -100 * f_i + 1e-8)
+            if not abs(step) > tol * max(1.0, abs(y)):
+                converged = True
+                break
+        if converged and y >= 0 and y <= 100:
+            yld[i] = y
+    return yld, iterations
+
+
+@njit(cache=True, nogil=True)
+def bootstrap_discount_factors(par_rates, face_value, initial_sum):
+    # par_rates: (curves, points) regular quantities, face_value and initial_sum: (curves,)
+    discount_factor = np.empty_like(par_rates)
+    for j in range(par_rates.shape[0]):
+        total = initial_sum[j]
+        for i in range(par_rates.shape[1]):
+            df = (face_value[j] - par_rates[j, i] * total) / (face_value[j] + par_rates[j, i])
+            discount_factor[j, i] = df
+            total += df
+    return discount_factor
+
+
+@njit(cache=True, nogil=True)
+def _discounted_moments(times, values, start, stop, v):
+    # sum(CF * DF), sum(CF * DF * t) and sum(CF * DF * t ** 2) with DF = v ** t. The discount
+    # factor is carried from one cash flow to the next, with a power only for steps other than one
+    # period.
+    s0 = 0.0
+    s1 = 0.0
+    s2 = 0.0
+    DF = 1.0
+    previous = 0.0
+    for j in range(start, stop):
+        t = times[j]
+        step = t - previous
+        previous = t
+        if abs(step - 1) <= 1e-12:
+            DF = DF * v
+        else:
+            DF = DF * v ** step
+        CF_PV = values[j] * DF
+        s0 += CF_PV
+        s1 += CF_PV * t
+        s2 += CF_PV * t * t
+    return s0, s1, s2
+
+
+@njit(cache=True, nogil=True)
+def _approx_yld_start(u0, u1, u2, frequency, dirty_price_target):
+    # batch._approx_yld_start from the undiscounted moments of the cash flows
+    if not (u0 > 0 and dirty_price_target > 0):
+        return np.nan
+    L = math.log(u0 * 100 / dirty_price_target)
+    D = u1 / u0
+    V = u2 / u0 - D * D
+    discriminant = D * D - 2 * V * L
+    u = 2 * L / (D + math.sqrt(discriminant)) if discriminant > 0 else L / D
+    return math.expm1(u) * 100 * frequency
+
+
+@njit(cache=True, nogil=True)
+def _approx_yld_row(times, values, start, stop, frequency, dirty_price_target, y, max_error, max_iter):
+    # the bracketing steps of batch._approx_yld_bracket for one bond, from the start y
+    if not (math.isfinite(dirty_price_target) and math.isfinite(y) and stop > start):
+        return np.nan, np.nan, 0
+    floor = -100 * frequency + 1e-8
+    y = max(y, floor)
+    estimate = np.nan
+    error_bound = np.inf
+    iterations = 0
+    below = False
+    while iterations < max_iter:
+        growth = (1 + y * 0.01 / frequency) * frequency
+        s0, s1, s2 = _discounted_moments(times, values, start, stop, 1 / (1 + y * 0.01 / frequency))
+        f = s0 * 100 - dirty_price_target
+        fprime = -s1 / growth
+        fsecond = (s2 + s1) / (100 * growth * growth)
+        if not (fprime < 0 and math.isfinite(f)):
+            break
+        discriminant = fprime * fprime - 2 * fsecond * f
+        upper = y + 2 * f / (-fprime + math.sqrt(discriminant)) if discriminant >= 0 else np.inf
+        if not below and f < 0:
+            # a start above the exact yield moves below it first
+            if not math.isfinite(upper):
+                break
+            y = max(upper, floor)
+            below = True
+            continue
+        below = True
+        iterations += 1
+        newton = y - f / fprime
+        estimate = (newton + upper) / 2 if math.isfinite(upper) else newton
+        error_bound = abs(upper - newton) / 2 + 64 * np.finfo(np.float64).eps * dirty_price_target / -fprime
+        y = max(newton, floor)
+        if error_bound <= max_error or not math.isfinite(newton):
+            break
+    if not (estimate >= 0 and estimate <= 100):
+        return np.nan, np.nan, iterations
+    return estimate, error_bound, iterations
+
+
+@njit(cache=True, nogil=True)
+def approx_yld_from_schedule(first_period, nperiod, rate, redemption, frequency, dirty_price_target, max_error,
+                             max_iter):
+    n = first_period.size
+    yld = np.full(n, np.nan)
+    error_bound = np.full(n, np.nan)
+    iterations = 0
+    # the cash flows of one bond at a time
+    size = 0
+    for i in range(n):
+        size = max(size, nperiod[i])
+    times = np.empty(size)
+    values = np.empty(size)
+    for i in range(n):
+        m = nperiod[i]
+        if m <= 0:
+            continue
+        fp = first_period[i]
+        coupon = rate[i] * 0.01 / frequency[i]
+        for k in range(m):
+            times[k] = fp + k
+            values[k] = coupon
+        values[m - 1] = coupon + redemption[i] * 0.01
+        # the undiscounted moments in closed form, as in batch._schedule_moments
+        last = fp + m - 1
+        u0 = m * coupon + redemption[i] * 0.01
+        u1 = coupon * (m * fp + m * (m - 1) / 2) + redemption[i] * 0.01 * last
+        u2 = coupon * (m * fp * fp + fp * m * (m - 1) + (m - 1) * m * (2 * m - 1) / 6) + \
+            redemption[i] * 0.01 * last * last
+        y = _approx_yld_start(u0, u1, u2, frequency[i], dirty_price_target[i])
+        yld[i], error_bound[i], it = _approx_yld_row(times, values, 0, m, frequency[i], dirty_price_target[i], y,
+                                                     max_error, max_iter)
+        iterations = max(iterations, it)
+    return yld, error_bound, iterations
+
+
+@njit(cache=True, nogil=True)
+def approx_yld_from_cash_flows(offsets, times, values, frequency, dirty_price_target, max_error, max_iter):
+    n = offsets.size - 1
+    yld = np.full(n, np.nan)
+    error_bound = np.full(n, np.nan)
+    iterations = 0
+    for i in range(n):
+        u0 = 0.0
+        u1 = 0.0
+        u2 = 0.0
+        for j in range(offsets[i], offsets[i + 1]):
+            u0 += values[j]
+            u1 += values[j] * times[j]
+            u2 += values[j] * times[j] * times[j]
+        y = _approx_yld_start(u0, u1, u2, frequency[i], dirty_price_target[i])
+        yld[i], error_bound[i], it = _approx_yld_row(times, values, offsets[i], offsets[i + 1], frequency[i],
+                                                     dirty_price_target[i], y, max_error, max_iter)
+        iterations = max(iterations, it)
+    return yld, error_bound, iterations
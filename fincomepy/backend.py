@@ -0,0 +1,69 @@
+'''
+Selection of the backend of the fincomepy.batch kernels.
+
+Two backends are available:
+
+numpy: the kernels are whole-array NumPy operations. This backend is always available.
+numba: the per-bond loops of the kernels (cash flow sums, yield Newton iterations and the par
+    curve bootstrap) are JIT-compiled with Numba. It is available when numba is installed.
+
+The numba backend is selected automatically when numba can be imported. Select a backend
+explicitly with fincomepy.set_backend("numpy") or fincomepy.set_backend("numba"), or with the
+environment variable FINCOMEPY_BACKEND.
+'''
+import os
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+BACKENDS = ("numpy", "numba")
+
+_backend = None
+_kernels = None
+
+
+def available_backends():
+    '''Return the names of the backends which can be used.'''
+    return [name for name in BACKENDS if name == "numpy" or numba is not None]
+
+
+def set_backend(name):
+    '''Select the backend of the fincomepy.batch kernels.
+
+    Parameters
+    ----------
+    name: str
+        Either "numpy" or "numba".
+
+    Examples
+    --------
+    >>> import fincomepy
+    >>> fincomepy.set_backend("numpy")
+    '''
+    global _backend
+    if name not in BACKENDS:
+        raise Exception("backend should be one of " + ", ".join(BACKENDS) + ".")
+    if name not in available_backends():
+        raise Exception("the numba backend requires numba: pip install numba")
+    _backend = name
+
+
+def get_backend():
+    '''Return the name of the selected backend.'''
+    return _backend
+
+
+def kernels():
+    '''Return the module of JIT-compiled kernels if the numba backend is selected, otherwise None.'''
+    global _kernels
+    if _backend != "numba":
+        return None
+    if _kernels is None:
+        from fincomepy import _numba_kernels
+        _kernels = _numba_kernels
+    return _kernels
+
+
+set_backend(os.environ.get("FINCOMEPY_BACKEND") or ("numba" if numba is not None else "numpy"))
@@ -0,0 +1,855 @@
+'''
+Vectorized bond, repo and bond future calculations.
+
+The functions in this module take NumPy arrays (one element per instrument) and replicate the
+calculations of Bond, Repo and BondFuture without constructing one object per instrument.
+Dates are numpy datetime64[D] arrays (lists of datetime.date are converted automatically), rates
+and prices are in percent like the class constructors. Instruments which cannot be priced (e.g.
+settlement on or after maturity, or a yield outside [0, 100]) get NaN instead of an exception.
+
+All functions in this module are thread-safe: they only read their arguments and allocate new
+arrays, and they keep no module or class level state (apart from the optional, lock-protected
+counters of fincomepy.instrumentation). The work is done in whole-array NumPy operations, which
+release the GIL, so several threads can run the kernels concurrently; pass large arrays (or use
+fincomepy.parallel.tmap) rather than calling them once per instrument.
+'''
+import numpy as np
+from fincomepy.bond import Bond
+from fincomepy import instrumentation
+from fincomepy import backend
+from fincomepy import quotes
+from fincomepy.calendar import get_calendar
+from fincomepy.cashflows import CashFlows
+
+
+def as_dates(dates):
+    '''Convert dates into a numpy datetime64[D] array.'''
+    return np.asarray(dates, dtype="datetime64[D]")
+
+
+def ymd(dates):
+    '''Split a datetime64[D] array into year, month and day integer arrays.'''
+    dates = as_dates(dates)
+    months = dates.astype("datetime64[M]")
+    years = dates.astype("datetime64[Y]")
+    Y = years.astype(np.int64) + 1970
+    M = (months - years.astype("datetime64[M]")).astype(np.int64) + 1
+    D = (dates - months.astype("datetime64[D]")).astype(np.int64) + 1
+    return Y, M, D
+
+
+def last_day_in_month(dates):
+    '''Get the last day for the month of each input date.'''
+    months = as_dates(dates).astype("datetime64[M]")
+    return (months + 1).astype("datetime64[D]") - 1
+
+
+def coupon_date(maturity, k, frequency):
+    '''Get the k-th coupon date counted backwards from maturity (k=0 is the maturity date).
+
+    This is the vectorized version of maturity - relativedelta(months=12/frequency) * k, including
+    the end-of-month rule used by Bond.couppcd, Bond.coupncd and Bond.coupon_dates.
+    '''
+    maturity = as_dates(maturity)
+    interval = 12 // np.asarray(frequency, dtype=np.int64)
+    months = maturity.astype("datetime64[M]") - (np.asarray(k, dtype=np.int64) * interval).astype("timedelta64[M]")
+    month_start = months.astype("datetime64[D]")
+    days_in_month = ((months + 1).astype("datetime64[D]") - month_start).astype(np.int64)
+    day = ymd(maturity)[2]
+    eom = maturity == last_day_in_month(maturity)
+    day = np.where(eom, days_in_month, np.minimum(day, days_in_month))
+    return month_start + (day - 1).astype("timedelta64[D]")
+
+
+def schedule(settlement, maturity, frequency):
+    '''Get the previous coupon date, next coupon date and number of remaining coupons.
+
+    Parameters
+    ----------
+    settlement: np.array
+        Settlement dates.
+    maturity: np.array
+        Maturity dates.
+    frequency: int or np.array
+        Coupon payment frequency.
+
+    Returns
+    -------
+    tuple
+        (pcd, ncd, nperiod). nperiod is 0 where settlement is not earlier than maturity.
+    '''
+    settlement, maturity, frequency = np.broadcast_arrays(as_dates(settlement), as_dates(maturity),
+                                                          np.asarray(frequency, dtype=np.int64))
+    interval = 12 // frequency
+    month_diff = (maturity.astype("datetime64[M]") - settlement.astype("datetime64[M]")).astype(np.int64)
+    k0 = np.maximum(month_diff, 0) // interval
+    nperiod = np.where(coupon_date(maturity, k0, frequency) > settlement, k0 + 1, k0)
+    nperiod = np.where(settlement < maturity, nperiod, 0)
+    pcd = coupon_date(maturity, nperiod, frequency)
+    ncd = coupon_date(maturity, nperiod - 1, frequency)
+    return pcd, ncd, nperiod
+
+
+def day_count(date1, date2, basis):
+    '''Vectorized version of Bond._day_count.'''
+    date1, date2, basis = np.broadcast_arrays(as_dates(date1), as_dates(date2), np.asarray(basis))
+    actual = (date2 - date1).astype(np.int64)
+    Y1, M1, D1 = ymd(date1)
+    Y2, M2, D2 = ymd(date2)
+    # 30/360 (US)
+    feb_eom1 = (date1 == last_day_in_month(date1)) & (M1 == 2)
+    feb_eom2 = (date2 == last_day_in_month(date2)) & (M2 == 2)
+    D1_us = np.where(feb_eom1, 30, D1)
+    D2_us = np.where(feb_eom1 & feb_eom2, 30, D2)
+    D2_us = np.where((D2_us == 31) & ((D1_us == 30) | (D1_us == 31)), 30, D2_us)
+    D1_us = np.where(D1_us == 31, 30, D1_us)
+    us = 360 * (Y2 - Y1) + 30 * (M2 - M1) + (D2_us - D1_us)
+    # 30E/360
+    eu = 360 * (Y2 - Y1) + 30 * (M2 - M1) + (np.minimum(D2, 30) - np.minimum(D1, 30))
+    return np.select([basis == 0, basis == 4], [us, eu], actual)
+
+
+def accrint(issue, first_interest, settlement, rate, frequency=2, basis=1):
+    '''Vectorized version of Bond.accrint with par=1. Returns the accrued interest in percent.'''
+    issue, first_interest, settlement = as_dates(issue), as_dates(first_interest), as_dates(settlement)
+    rate, basis = np.asarray(rate, dtype=float), np.asarray(basis)
+    frequency = np.asarray(frequency, dtype=np.int64)
+    actual = (settlement - issue).astype(np.int64)
+    total_days = np.where((basis == 0) | (basis == 4), 360 / frequency, day_count(issue, first_interest, 1))
+    accrued = (rate / frequency) * (day_count(issue, settlement, basis) / total_days)
+    return np.select([basis == 2, basis == 3], [actual / 360 * rate, actual / 365 * rate], accrued)
+
+
+def first_period(pcd, ncd, settlement, frequency, basis):
+    '''Vectorized version of Bond._first_period.'''
+    pcd, ncd, settlement = as_dates(pcd), as_dates(ncd), as_dates(settlement)
+    frequency, basis = np.asarray(frequency, dtype=np.int64), np.asarray(basis)
+    denom_days = np.select([basis == 1, (basis == 0) | (basis == 2) | (basis == 4)],
+                           [(ncd - pcd).astype(np.int64), 360 / frequency], 365 / frequency)
+    Y1, M1, D1 = ymd(settlement)
+    Y2, M2, D2 = ymd(ncd)
+    D1 = np.where(settlement == last_day_in_month(settlement), 30, D1)
+    D2 = np.where(ncd == last_day_in_month(ncd), 30, D2)
+    num_30_360 = 360 * (Y2 - Y1) + 30 * (M2 - M1) + (D2 - D1)
+    num_days = np.where((basis == 1) | (basis == 2) | (basis == 3), (ncd - settlement).astype(np.int64), num_30_360)
+    return num_days / denom_days
+
+
+def cash_flow_sums(first_period, nperiod, rate, redemption, frequency, yld, order=0):
+    '''Calculate the moments of the discounted cash flows of each bond.
+
+    The k-th cash flow of a bond (k = 0, ..., nperiod - 1) is paid at period t_k = first_period + k
+    and discounted with (1 + yld / frequency) ** -t_k. The loop runs over the period index and is
+    vectorized over bonds, so memory use is proportional to the number of bonds.
+
+    Parameters
+    ----------
+    first_period: np.array
+        Fraction of the first coupon period, as returned by first_period.
+    nperiod: np.array
+        Number of remaining coupons.
+    rate: np.array
+        Coupon rates (in percent).
+    redemption: np.array
+        Redemption (in percent).
+    frequency: np.array
+        Coupon payment frequency.
+    yld: np.array
+        Bond yields (in percent).
+    order: int, optional
+        The highest moment to calculate. Default is 0.
+
+    Returns
+    -------
+    list
+        [sum(CF * DF), sum(CF * DF * t), sum(CF * DF * t ** 2)] truncated to order + 1 elements,
+        where the cash flows are regular (not in percent) quantities.
+    '''
+    first_period, nperiod, rate, redemption, frequency, yld = np.broadcast_arrays(
+        np.asarray(first_period, dtype=float), np.asarray(nperiod), np.asarray(rate, dtype=float),
+        np.asarray(redemption, dtype=float), np.asarray(frequency, dtype=np.int64), np.asarray(yld, dtype=float))
+    kernels = backend.kernels()
+    if kernels is not None:
+        sums = kernels.cash_flow_sums(*_flat(first_period, nperiod, rate, redemption, frequency, yld), order)
+        return [total.reshape(first_period.shape) for total in sums]
+    v = 1 / (1 + yld * 0.01 / frequency)
+    DF = v ** first_period
+    coupon = rate * 0.01 / frequency
+    sums = [np.zeros(first_period.shape) for _ in range(order + 1)]
+    for k in range(int(nperiod.max(initial=0))):
+        CF = np.where(k < nperiod, coupon, 0.0)
+        CF = np.where(k == nperiod - 1, CF + redemption * 0.01, CF)
+        CF_PV = CF * DF
+        sums[0] += CF_PV
+        if order >= 1:
+            t = first_period + k
+            sums[1] += CF_PV * t
+            if order >= 2:
+                sums[2] += CF_PV * t * t
+        DF = DF * v
+    return sums
+
+
+def cash_flows_from_schedule(first_period, nperiod, rate, redemption, frequency, maturity=None):
+    '''Lay out the cash flows of many bonds in one CashFlows container.
+
+    The k-th cash flow of a bond (k = 0, ..., nperiod - 1) is paid at period first_period + k, as in
+    cash_flow_sums, but every cash flow is materialized in the contiguous buffers of the container.
+
+    Parameters
+    ----------
+    first_period: np.array
+        Fraction of the first coupon period, as returned by first_period.
+    nperiod: np.array
+        Number of remaining coupons.
+    rate: np.array
+        Coupon rates (in percent).
+    redemption: np.array
+        Redemption (in percent).
+    frequency: np.array
+        Coupon payment frequency.
+    maturity: np.array, optional
+        Maturity dates. Default is None. If given, the payment dates are stored as well.
+
+    Returns
+    -------
+    CashFlows
+        The cash flows (regular quantities) of each bond, with times in coupon periods.
+    '''
+    first_period, nperiod, rate, redemption, frequency = np.broadcast_arrays(
+        np.asarray(first_period, dtype=float), np.asarray(nperiod, dtype=np.int64), np.asarray(rate, dtype=float),
+        np.asarray(redemption, dtype=float), np.asarray(frequency, dtype=np.int64))
+    offsets = np.concatenate([[0], np.cumsum(nperiod)])
+    rows = np.repeat(np.arange(nperiod.size), nperiod)
+    # j-th cash flow of its bond, counted from the next coupon date
+    j = np.arange(offsets[-1]) - offsets[rows]
+    values = rate[rows] / frequency[rows] * 0.01
+    values[offsets[1:][nperiod > 0] - 1] += redemption[nperiod > 0] * 0.01
+    dates = None
+    if maturity is not None:
+        maturity = np.broadcast_to(as_dates(maturity), nperiod.shape)
+        dates = coupon_date(maturity[rows], nperiod[rows] - 1 - j, frequency[rows])
+    return CashFlows(offsets, first_period[rows] + j, values, frequency, dates)
+
+
+def _flat(first_period, nperiod, rate, redemption, frequency, last):
+    # one-dimensional copies with the dtypes of the numba kernels (the inputs may be broadcast views)
+    return (np.array(first_period, dtype=np.float64).ravel(), np.array(nperiod, dtype=np.int64).ravel(),
+            np.array(rate, dtype=np.float64).ravel(), np.array(redemption, dtype=np.float64).ravel(),
+            np.array(frequency, dtype=np.int64).ravel(), np.array(last, dtype=np.float64).ravel())
+
+
+def _price_from_schedule(fp, nperiod, rate, redemption, frequency, yld):
+    return cash_flow_sums(fp, nperiod, rate, redemption, frequency, yld)[0] * 100
+
+
+def _yld_from_schedule(fp, nperiod, rate, redemption, frequency, dirty_price_target, tol=1e-12, max_iter=100):
+    # Newton iterations on the convex, decreasing dirty price / yield function. The starting point
+    # matches the initial guess used by Bond.yld.
+    dirty_price_target = np.asarray(dirty_price_target, dtype=float)
+    frequency = np.asarray(frequency, dtype=np.int64)
+    kernels = backend.kernels()
+    if kernels is not None:
+        arrays = np.broadcast_arrays(np.asarray(fp, dtype=float), np.asarray(nperiod), np.asarray(rate, dtype=float),
+            np.asarray(redemption, dtype=float), frequency, dirty_price_target)
+        yld, iterations = kernels.yld_from_schedule(*_flat(*arrays), tol, max_iter)
+        instrumentation.count("batch.yld.iterations", iterations)
+        return yld.reshape(arrays[0].shape)
+    yld = np.full(np.broadcast(fp, nperiod, rate, redemption, frequency, dirty_price_target).shape, 0.01)
+    active = np.isfinite(dirty_price_target) & (np.asarray(nperiod) > 0) & np.ones(yld.shape, dtype=bool)
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        instrumentation.count("batch.yld.iterations")
+        s0, s1 = cash_flow_sums(fp, nperiod, rate, redemption, frequency, yld, order=1)
+        f = s0 * 100 - dirty_price_target
+        fprime = -s1 / ((1 + yld * 0.01 / frequency) * frequency)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(active, f / fprime, 0.0)
+        # never step beyond the point where the discount factors become undefined
+        yld = np.maximum(yld - step, (-100 * frequency + 1e-8) * np.ones(yld.shape))
+        active = active & (np.abs(step) > tol * np.maximum(1.0, np.abs(yld)))
+    yld = np.where(active | (np.asarray(nperiod) == 0), np.nan, yld)
+    return np.where((yld >= 0) & (yld <= 100), yld, np.nan)
+
+
+def parse_price(price_perc, return_valid=False):
+    '''Convert prices into a float array. Strings are parsed with the 32nd convention.
+
+    Invalid prices (e.g. malformed quotes or None) do not raise: they get NaN, so only the affected
+    instruments fail. Object arrays (e.g. from pandas, CSV or JSON) are coerced element-wise:
+    numbers are converted into floats and strings are parsed as quotes, like a str array.
+
+    Parameters
+    ----------
+    price_perc: np.array
+        Prices (in percent), as numbers or quotes in 32nds.
+    return_valid: bool, optional
+        Whether to also return the mask of valid prices. Default is False.
+
+    Returns
+    -------
+    np.array or tuple
+        The prices (in percent), with NaN for invalid prices, or (prices, valid) if return_valid.
+
+    Examples
+    --------
+    >>> parse_price(np.array([100.5, "99-16", None, "abc"], dtype=object), return_valid=True)
+    (array([100.5, 99.5, nan, nan]), array([ True,  True, False, False]))
+    '''
+    price_perc = np.asarray(price_perc)
+    if price_perc.dtype.kind in "SU":
+        price, valid = quotes.parse_quotes(price_perc)
+    elif price_perc.dtype.kind == "O":
+        flat = price_perc.ravel()
+        price, valid = np.full(flat.shape, np.nan), np.zeros(flat.shape, dtype=bool)
+        is_number = np.array([isinstance(pr, (int, float, np.integer, np.floating)) and not isinstance(pr, bool)
+                              for pr in flat], dtype=bool)
+        is_quote = np.array([isinstance(pr, (str, bytes)) for pr in flat], dtype=bool)
+        price[is_number], valid[is_number] = flat[is_number].astype(float), True
+        if is_quote.any():
+            quote = np.array([pr.decode() if isinstance(pr, bytes) else pr for pr in flat[is_quote]], dtype=str)
+            price[is_quote], valid[is_quote] = quotes.parse_quotes(quote)
+        price, valid = price.reshape(price_perc.shape), valid.reshape(price_perc.shape)
+    else:
+        price, valid = price_perc.astype(float), np.ones(price_perc.shape, dtype=bool)
+    return (price, valid) if return_valid else price
+
+
+def dirty_price(settlement, maturity, rate, yld, redemption=100, frequency=2, basis=1):
+    '''Vectorized version of Bond.dirty_price. Returns the dirty price in percent.'''
+    pcd, ncd, nperiod = schedule(settlement, maturity, frequency)
+    fp = first_period(pcd, ncd, settlement, frequency, basis)
+    price = _price_from_schedule(fp, nperiod, rate, redemption, frequency, yld)
+    return np.where(nperiod > 0, price, np.nan)
+
+
+def yld(settlement, maturity, rate, pr, redemption=100, frequency=2, basis=1, tol=1e-12, max_iter=100):
+    '''Vectorized version of Bond.yld. Returns the yield in percent.
+
+    The yield is solved with Newton iterations for all bonds at once. Bonds whose yield does not
+    converge or falls outside [0, 100] get NaN.
+    '''
+    pcd, ncd, nperiod = schedule(settlement, maturity, frequency)
+    fp = first_period(pcd, ncd, settlement, frequency, basis)
+    dirty_price_target = parse_price(pr) + accrint(pcd, ncd, settlement, rate, frequency, basis)
+    return _yld_from_schedule(fp, nperiod, rate, redemption, frequency, dirty_price_target, tol, max_iter)
+
+
+def _price_derivatives(fp, nperiod, rate, redemption, frequency, yld, dirty_price_target):
+    # f = dirty price - target, f' and f'' with the price and the yield in percent
+    s0, s1, s2 = cash_flow_sums(fp, nperiod, rate, redemption, frequency, yld, order=2)
+    growth = (1 + yld * 0.01 / frequency) * frequency
+    return s0 * 100 - dirty_price_target, -s1 / growth, (s2 + s1) / (100 * growth * growth)
+
+
+def _approx_yld_start(s0, s1, s2, frequency, dirty_price_target):
+    # Closed-form starting yield. With u = log(1 + yld / frequency), log(dirty price) is approximated
+    # by its second order expansion at u = 0, whose coefficients are the total, mean time and
+    # variance of time of the undiscounted cash flows, from their moments s0, s1 and s2.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        L = np.log(s0 * 100 / dirty_price_target)
+        D = s1 / s0
+        V = s2 / s0 - D * D
+        discriminant = D * D - 2 * V * L
+        u = np.where(discriminant > 0, 2 * L / (D + np.sqrt(discriminant)), L / D)
+    return np.where(s0 > 0, np.expm1(u) * 100 * frequency, np.nan)
+
+
+def _schedule_moments(fp, nperiod, rate, redemption, frequency):
+    # the moments of the undiscounted cash flows of cash_flow_sums, whose geometric sums have
+    # closed forms
+    n = np.asarray(nperiod, dtype=float)
+    coupon = rate * 0.01 / frequency
+    last = fp + n - 1
+    s0 = n * coupon + redemption * 0.01
+    s1 = coupon * (n * fp + n * (n - 1) / 2) + redemption * 0.01 * last
+    s2 = coupon * (n * fp * fp + fp * n * (n - 1) + (n - 1) * n * (2 * n - 1) / 6) + redemption * 0.01 * last * last
+    return s0, s1, s2
+
+
+def _approx_yld_bracket(yld, derivatives, frequency, dirty_price_target, max_error, max_iter):
+    # The dirty price minus the target, f(y), is decreasing and convex and f'' is decreasing in y,
+    # because all the cash flows are positive. At a point y below the root y* (f(y) >= 0):
+    #   - the Newton step y - f / f' is still below y* (the tangent lies below f);
+    #   - f(y + d) <= f + f' d + f'' d ** 2 / 2 for d >= 0, so the smaller root of this quadratic
+    #     satisfies f <= 0, i.e. it is above y*.
+    # A start above y* (f < 0) first moves to the root of the quadratic model, where it lies below
+    # f, i.e. below y*. Every further evaluation brackets y*: the yield is the midpoint of the bracket
+    # and the error bound is half its width.
+    # derivatives(index, yld) returns f, f' and f'' of the bonds at index (an array of positions).
+    floor = -100 * frequency + 1e-8
+    yld = np.maximum(yld, floor)
+    index = np.flatnonzero(np.isfinite(yld))
+    f, fprime, fsecond = derivatives(index, yld[index])
+    above = f < 0
+    if above.any():
+        with np.errstate(divide="ignore", invalid="ignore"):
+            quadratic = yld[index[above]] + 2 * f[above] / (-fprime[above] + np.sqrt(fprime[above] ** 2 -
+                                                                                     2 * fsecond[above] * f[above]))
+        yld[index[above]] = np.maximum(quadratic, floor[index[above]])
+        f[above], fprime[above], fsecond[above] = derivatives(index[above], yld[index[above]])
+    estimate = np.full(yld.shape, np.nan)
+    error_bound = np.full(yld.shape, np.inf)
+    active = np.flatnonzero(np.isfinite(yld))
+    keep = np.isfinite(yld[index])
+    f, fprime, fsecond = f[keep], fprime[keep], fsecond[keep]
+    for i in range(max_iter):
+        if active.size == 0:
+            break
+        instrumentation.count("batch.approx_yld.iterations")
+        y = yld[active]
+        if i > 0:
+            f, fprime, fsecond = derivatives(active, y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = y - f / fprime
+            discriminant = fprime * fprime - 2 * fsecond * f
+            upper = np.where(discriminant >= 0, y + 2 * f / (-fprime + np.sqrt(discriminant)), np.inf)
+            # f is only evaluated to a few ulps of the price. Within rounding of the root f may be
+            # slightly negative, which flips the bracket.
+            rounding = 64 * np.finfo(float).eps * dirty_price_target[active] / -fprime
+        valid = (fprime < 0) & np.isfinite(f)
+        estimate[active] = np.where(valid, np.where(np.isfinite(upper), (newton + upper) / 2, newton), np.nan)
+        error_bound[active] = np.abs(upper - newton) / 2 + rounding
+        yld[active] = np.maximum(newton, floor[active])
+        active = active[~(error_bound[active] <= max_error) & np.isfinite(newton) & valid]
+    return estimate, error_bound
+
+
+def _approx_yld_from_schedule(fp, nperiod, rate, redemption, frequency, dirty_price_target, max_error=1e-4,
+                              max_iter=20):
+    arrays = np.broadcast_arrays(np.asarray(fp, dtype=float), np.asarray(nperiod), np.asarray(rate, dtype=float),
+        np.asarray(redemption, dtype=float), np.asarray(frequency, dtype=np.int64),
+        np.asarray(dirty_price_target, dtype=float))
+    shape = arrays[0].shape
+    kernels = backend.kernels()
+    if kernels is not None:
+        estimate, error_bound, iterations = kernels.approx_yld_from_schedule(*_flat(*arrays), max_error, max_iter)
+        instrumentation.count("batch.approx_yld.iterations", iterations)
+        return estimate.reshape(shape), error_bound.reshape(shape)
+    fp, nperiod, rate, redemption, frequency, dirty_price_target = [np.array(values).ravel() for values in arrays]
+
+    def derivatives(index, yld):
+        return _price_derivatives(fp[index], nperiod[index], rate[index], redemption[index], frequency[index], yld,
+                                  dirty_price_target[index])
+
+    start = _approx_yld_start(*_schedule_moments(fp, nperiod, rate, redemption, frequency), frequency,
+                              dirty_price_target)
+    start = np.where(nperiod > 0, start, np.nan)
+    estimate, error_bound = _approx_yld_bracket(start, derivatives, frequency, dirty_price_target, max_error,
+                                                max_iter)
+    invalid = ~np.isfinite(dirty_price_target) | (nperiod == 0) | ~((estimate >= 0) & (estimate <= 100))
+    return np.where(invalid, np.nan, estimate).reshape(shape), np.where(invalid, np.nan, error_bound).reshape(shape)
+
+
+@instrumentation.instrument("batch.approx_yld")
+def approx_yld(settlement, maturity, rate, pr, redemption=100, frequency=2, basis=1, max_error_perc=1e-4,
+               max_iter=20):
+    '''Approximate the yields of many bonds with a guaranteed error bound, for screening.
+
+    The yield starts from a closed-form approximation, which usually lies below the exact yield. The
+    convexity of the price / yield function brackets the exact yield from a point below it, which
+    gives the error bound. Only the bonds whose bound still exceeds max_error_perc take further
+    (Newton) steps, so for realistic terms most bonds cost one evaluation of their cash flows, against
+    about six for yld. approx_yld_from_cash_flows skips the schedules as well.
+
+    Parameters
+    ----------
+    settlement: np.array
+        Settlement dates.
+    maturity: np.array
+        Maturity dates.
+    rate: np.array
+        Coupon rates (in percent).
+    pr: np.array
+        Clean prices (in percent).
+    redemption: float or np.array, optional
+        Redemption (in percent). Default is 100.
+    frequency: int or np.array, optional
+        Coupon payment frequency. Default is 2.
+    basis: int or np.array, optional
+        Day count convention. Default is 1.
+    max_error_perc: float, optional
+        The error bound (in percent) to reach. Default is 1e-4 (0.01bp).
+    max_iter: int, optional
+        The maximum number of bracketing steps. Default is 20.
+
+    Returns
+    -------
+    tuple
+        (yld, error_bound), where |yld - exact yield| <= error_bound (both in percent). The bound
+        is at most max_error_perc unless max_iter is reached. Bonds whose yield falls outside
+        [0, 100] get NaN.
+
+    Examples
+    --------
+    >>> yld, error_bound = batch.approx_yld(settlement, maturity, coupon_perc, price_perc)
+    >>> (error_bound <= 1e-4).all()
+    True
+    '''
+    pcd, ncd, nperiod = schedule(settlement, maturity, frequency)
+    fp = first_period(pcd, ncd, settlement, frequency, basis)
+    dirty_price_target = parse_price(pr) + accrint(pcd, ncd, settlement, rate, frequency, basis)
+    return _approx_yld_from_schedule(fp, nperiod, rate, redemption, frequency, dirty_price_target,
+                                     max_error_perc, max_iter)
+
+
+@instrumentation.instrument("batch.approx_yld_from_cash_flows")
+def approx_yld_from_cash_flows(cash_flows, dirty_price_perc, max_error_perc=1e-4, max_iter=20):
+    '''Approximate the yields of many bonds from their cash flows, with a guaranteed error bound.
+
+    Same as approx_yld, but the cash flows are given, e.g. by MappedStore.cash_flows or
+    cash_flows_from_schedule, so screening the same bonds at new prices does not rebuild their
+    schedules. The cash flows should be non-negative, with times in periods of 1 / frequency years
+    from settlement.
+
+    Parameters
+    ----------
+    cash_flows: CashFlows
+        The cash flows (regular quantities) of each bond.
+    dirty_price_perc: float or np.array
+        Dirty prices (in percent), one per bond.
+    max_error_perc: float, optional
+        The error bound (in percent) to reach. Default is 1e-4 (0.01bp).
+    max_iter: int, optional
+        The maximum number of bracketing steps. Default is 20.
+
+    Returns
+    -------
+    tuple
+        (yld, error_bound) as returned by approx_yld, one element per bond.
+
+    Examples
+    --------
+    >>> cash_flows = store.cash_flows(valuation_date)
+    >>> yld, error_bound = batch.approx_yld_from_cash_flows(cash_flows, dirty_price_perc)
+    '''
+    n = len(cash_flows)
+    dirty_price_target = np.array(np.broadcast_to(np.asarray(dirty_price_perc, dtype=float), (n,)))
+    frequency = np.ascontiguousarray(cash_flows.frequency, dtype=np.int64)
+    kernels = backend.kernels()
+    if kernels is not None:
+        estimate, error_bound, iterations = kernels.approx_yld_from_cash_flows(cash_flows.offsets,
+            np.ascontiguousarray(cash_flows.times), np.ascontiguousarray(cash_flows.values), frequency,
+            dirty_price_target, max_error_perc, max_iter)
+        instrumentation.count("batch.approx_yld.iterations", iterations)
+        return estimate, error_bound
+
+    rows, times, values = cash_flows.rows(), cash_flows.times, cash_flows.values
+
+    def derivatives(index, yld):
+        # the cash flows of the bonds at index, discounted in the shared buffers
+        bond_yld = np.full(n, np.nan)
+        bond_yld[index] = yld
+        flows = np.flatnonzero(np.isfinite(bond_yld)[rows])
+        row, t = rows[flows], times[flows]
+        CF_PV = values[flows] * np.exp(-t * np.log1p(bond_yld[row] * 0.01 / frequency[row]))
+        s0, s1, s2 = [np.bincount(row, weights=CF_PV * t ** k, minlength=n)[index] for k in range(3)]
+        growth = (1 + yld * 0.01 / frequency[index]) * frequency[index]
+        return s0 * 100 - dirty_price_target[index], -s1 / growth, (s2 + s1) / (100 * growth * growth)
+
+    start = _approx_yld_start(cash_flows.sum(values), cash_flows.sum(values * times),
+                              cash_flows.sum(values * times * times), frequency, dirty_price_target)
+    estimate, error_bound = _approx_yld_bracket(start, derivatives, frequency, dirty_price_target, max_error_perc,
+                                                max_iter)
+    invalid = ~(dirty_price_target > 0) | ~np.isfinite(dirty_price_target) | ~((estimate >= 0) & (estimate <= 100))
+    return np.where(invalid, np.nan, estimate), np.where(invalid, np.nan, error_bound)
+
+
+@instrumentation.instrument("batch.bond_analytics")
+def bond_analytics(settlement, maturity, coupon_perc, price_perc, frequency, basis=1, redemption=100,
+                   yld_perc=None, yld_change_perc=0.01):
+    '''Calculate the analytics of many bonds at once.
+
+    The results match Bond(...).mac_duration(), mod_duration(), DV01() and convexity() for each
+    element of the inputs.
+
+    Parameters
+    ----------
+    settlement: np.array
+        Settlement dates.
+    maturity: np.array
+        Maturity dates.
+    coupon_perc: np.array
+        Coupon rates (in percent).
+    price_perc: np.array
+        Clean prices (in percent). Strings are parsed with the 32nd convention.
+    frequency: int or np.array
+        Coupon payment frequency.
+    basis: int or np.array, optional
+        Day count convention. Default is 1.
+    redemption: float or np.array, optional
+        Redemption (in percent). Default is 100.
+    yld_perc: np.array, optional
+        Bond yields (in percent). If None, they are solved from the prices. Default is None.
+    yld_change_perc: float, optional
+        The yield change used to calculate modified duration. Default is 0.01.
+
+    Returns
+    -------
+    dict
+        A dictionary of numpy arrays with keys "couppcd", "coupncd", "accrint", "dirty_price",
+        "yld", "mac_duration", "mod_duration", "DV01" and "convexity".
+
+    Examples
+    --------
+    >>> res = bond_analytics(settlement=[date(2020,7,15)], maturity=[date(2030,5,15)],
+        coupon_perc=[0.625], price_perc=[100.015625], frequency=2)
+    >>> res["mac_duration"]
+    array([9.5437781])
+    '''
+    settlement, maturity = as_dates(settlement), as_dates(maturity)
+    pcd, ncd, nperiod = schedule(settlement, maturity, frequency)
+    return _analytics_from_schedule(settlement, pcd, ncd, nperiod, coupon_perc, price_perc, frequency, basis,
+                                    redemption, yld_perc, yld_change_perc)
+
+
+def _analytics_from_schedule(settlement, pcd, ncd, nperiod, coupon_perc, price_perc, frequency, basis, redemption,
+                             yld_perc, yld_change_perc):
+    # bond_analytics for a given schedule. If price_perc is None, the prices follow from yld_perc.
+    fp = first_period(pcd, ncd, settlement, frequency, basis)
+    frequency = np.asarray(frequency, dtype=np.int64)
+    accrint_perc = accrint(pcd, ncd, settlement, coupon_perc, frequency, basis)
+    if price_perc is None:
+        dirty_price_perc = np.where(nperiod > 0, _price_from_schedule(fp, nperiod, coupon_perc, redemption,
+                                    frequency, yld_perc), np.nan)
+    else:
+        dirty_price_perc = parse_price(price_perc) + accrint_perc
+    if yld_perc is None:
+        yld_perc = _yld_from_schedule(fp, nperiod, coupon_perc, redemption, frequency, dirty_price_perc)
+    else:
+        yld_perc = np.where(nperiod > 0, np.asarray(yld_perc, dtype=float), np.nan)
+    s0, s1, s2 = cash_flow_sums(fp, nperiod, coupon_perc, redemption, frequency, yld_perc, order=2)
+    dirty_price_reg = dirty_price_perc * 0.01
+    mac_duration = s1 / dirty_price_reg / frequency
+    price_up = _price_from_schedule(fp, nperiod, coupon_perc, redemption, frequency, yld_perc + yld_change_perc)
+    price_down = _price_from_schedule(fp, nperiod, coupon_perc, redemption, frequency, yld_perc - yld_change_perc)
+    mod_duration = (np.abs(price_up - dirty_price_perc) + np.abs(price_down - dirty_price_perc)) / 2 \
+        / dirty_price_perc / (yld_change_perc * 0.01)
+    convexity = (s1 + s2) / dirty_price_reg / (4 * (1 + yld_perc * 0.01 / frequency) ** 2)
+    # a bond which has matured by settlement has no coupon period, accrued interest or price
+    matured = nperiod == 0
+    return {
+        "couppcd": np.where(matured, np.datetime64("NaT"), pcd),
+        "coupncd": np.where(matured, np.datetime64("NaT"), ncd),
+        "accrint": np.where(matured, np.nan, accrint_perc),
+        "dirty_price": np.where(matured, np.nan, dirty_price_perc),
+        "yld": yld_perc,
+        "mac_duration": mac_duration,
+        "mod_duration": mod_duration,
+        "DV01": mod_duration * dirty_price_reg,
+        "convexity": convexity,
+    }
+
+
+def _days_in_year(type):
+    return np.where(np.asarray(type) == "US", 360, 365)
+
+
+@instrumentation.instrument("batch.repo_analytics")
+def repo_analytics(settlement, maturity, coupon_perc, price_perc, frequency, basis, bond_face_value,
+                   repo_period, repo_rate_perc, type="US", calendar=None, convention="following"):
+    '''Calculate the analytics of many repos at once.
+
+    The results match Repo(...).start_payment(), end_payment() and break_even_yld() for each
+    element of the inputs.
+
+    Parameters
+    ----------
+    settlement, maturity, coupon_perc, price_perc, frequency, basis: np.array
+        The bond of each repo, see bond_analytics.
+    bond_face_value: np.array
+        Face value of bond.
+    repo_period: np.array
+        Repo period (in days).
+    repo_rate_perc: np.array
+        Repo interest rate (in percent).
+    type: str or np.array, optional
+        Money market of repo. It should be either 'US' or 'UK'. Default is 'US'.
+    calendar: str or HolidayCalendar, optional
+        The business-day calendar used to move the repo end dates to business days, see
+        Repo. Default is None (no adjustment).
+    convention: str, optional
+        "following", "modified_following" or "preceding". Default is "following".
+
+    Returns
+    -------
+    dict
+        A dictionary of numpy arrays with keys "accrint", "dirty_price", "repo_end_date",
+        "start_payment", "end_payment" and "break_even_yld".
+    '''
+    settlement, maturity = as_dates(settlement), as_dates(maturity)
+    pcd, ncd, nperiod = schedule(settlement, maturity, frequency)
+    frequency = np.asarray(frequency, dtype=np.int64)
+    coupon_reg = np.asarray(coupon_perc, dtype=float) * 0.01
+    repo_rate_reg = np.asarray(repo_rate_perc, dtype=float) * 0.01
+    repo_period = np.asarray(repo_period, dtype=np.int64)
+    bond_face_value = np.asarray(bond_face_value, dtype=float)
+    days_in_year = _days_in_year(type)
+    repo_end_date = settlement + repo_period.astype("timedelta64[D]")
+    if calendar is not None:
+        repo_end_date = get_calendar(calendar).adjust(repo_end_date, convention)
+        repo_period = (repo_end_date - settlement).astype(np.int64)
+    accrint_perc = accrint(pcd, ncd, settlement, coupon_perc, frequency, basis)
+    dirty_price_perc = parse_price(price_perc) + accrint_perc
+    start_payment = bond_face_value * dirty_price_perc * 0.01
+    end_payment = start_payment + start_payment * repo_rate_reg * repo_period / days_in_year
+    # coupons paid on or before the repo end date, walking forward from the next coupon date
+    coupon_one_period = bond_face_value * coupon_reg / frequency
+    k = nperiod - 1
+    paid = (k >= 0) & (ncd <= repo_end_date)
+    while paid.any():
+        item = coupon_date(maturity, k, frequency)
+        end_payment = end_payment - np.where(paid, coupon_one_period * (1 + repo_rate_reg * \
+            (repo_end_date - item).astype(np.int64) / days_in_year), 0.0)
+        k = k - 1
+        paid = paid & (k >= 0) & (coupon_date(maturity, np.maximum(k, 0), frequency) <= repo_end_date)
+    fp = first_period(pcd, ncd, settlement, frequency, basis)
+    break_even_yld = _yld_from_schedule(fp, nperiod, coupon_perc, 100, frequency,
+                                        end_payment / bond_face_value * 100)
+    return {
+        "accrint": accrint_perc,
+        "dirty_price": dirty_price_perc,
+        "repo_end_date": repo_end_date,
+        "start_payment": start_payment,
+        "end_payment": end_payment,
+        "break_even_yld": break_even_yld,
+    }
+
+
+@instrumentation.instrument("batch.future_analytics")
+def future_analytics(settlement, maturity, coupon_perc, price_perc, frequency, basis, repo_period,
+                     repo_rate_perc, futures_pr_perc, conversion_factor, type="US", calendar=None,
+                     convention="following"):
+    '''Calculate the analytics of many bond futures at once.
+
+    The results match BondFuture(...).forward_price(), full_future_val(), net_basis() and
+    implied_repo_rate() for each element of the inputs.
+
+    Parameters
+    ----------
+    settlement, maturity, coupon_perc, price_perc, frequency, basis: np.array
+        The deliverable bond, see bond_analytics.
+    repo_period: np.array
+        Repo period (in days).
+    repo_rate_perc: np.array
+        Repo interest rate (in percent).
+    futures_pr_perc: np.array
+        Future price (in percent).
+    conversion_factor: np.array
+        Conversion factor of future price.
+    type: str or np.array, optional
+        Money market of repo. It should be either 'US' or 'UK'. Default is 'US'.
+    calendar: str or HolidayCalendar, optional
+        The business-day calendar used to move the repo end dates to business days, see
+        Repo. Default is None (no adjustment).
+    convention: str, optional
+        "following", "modified_following" or "preceding". Default is "following".
+
+    Returns
+    -------
+    dict
+        A dictionary of numpy arrays with keys "accrint", "dirty_price", "repo_end_date",
+        "invoice_price", "forward_price", "full_future_val", "net_basis" and "implied_repo_rate".
+    '''
+    settlement, maturity = as_dates(settlement), as_dates(maturity)
+    pcd, ncd, nperiod = schedule(settlement, maturity, frequency)
+    frequency, basis = np.asarray(frequency, dtype=np.int64), np.asarray(basis)
+    coupon_perc = np.asarray(coupon_perc, dtype=float)
+    repo_rate_reg = np.asarray(repo_rate_perc, dtype=float) * 0.01
+    repo_period = np.asarray(repo_period, dtype=np.int64)
+    days_in_year = _days_in_year(type)
+    repo_end_date = settlement + repo_period.astype("timedelta64[D]")
+    if calendar is not None:
+        repo_end_date = get_calendar(calendar).adjust(repo_end_date, convention)
+        repo_period = (repo_end_date - settlement).astype(np.int64)
+    accrint_perc = accrint(pcd, ncd, settlement, coupon_perc, frequency, basis)
+    dirty_price_perc = parse_price(price_perc) + accrint_perc
+    invoice_price_perc = np.asarray(futures_pr_perc, dtype=float) * np.asarray(conversion_factor, dtype=float)
+    forward_price_perc = dirty_price_perc * (1 + repo_rate_reg * repo_period / days_in_year)
+    # coupons paid strictly before the repo end date, reinvested at the repo rate
+    coupon_FV = np.zeros(forward_price_perc.shape)
+    last_coupon = pcd
+    k = nperiod - 1
+    paid = (k >= 0) & (ncd < repo_end_date)
+    while paid.any():
+        item = coupon_date(maturity, k, frequency)
+        reinvestment_days = (repo_end_date - item).astype(np.int64)
+        coupon_FV += np.where(paid, coupon_perc / frequency * (1 + repo_rate_reg * reinvestment_days / days_in_year), 0.0)
+        last_coupon = np.where(paid, item, last_coupon)
+        k = k - 1
+        paid = paid & (k >= 0) & (coupon_date(maturity, np.maximum(k, 0), frequency) < repo_end_date)
+    has_coupon = ncd < repo_end_date
+    end_ncd = schedule(repo_end_date, maturity, frequency)[1]
+    # BondFuture.full_future_val uses frequency=2, basis=1 when no coupon is paid during the repo
+    accrint_no_coupon = accrint(pcd, ncd, repo_end_date, coupon_perc, 2, 1)
+    accrint_coupon = accrint(last_coupon, end_ncd, repo_end_date, coupon_perc, frequency, basis)
+    accrint_delivery = np.where(has_coupon, accrint_coupon, accrint_no_coupon)
+    full_future_val = np.where(repo_end_date < maturity, invoice_price_perc + accrint_delivery + coupon_FV, np.nan)
+    return {
+        "accrint": accrint_perc,
+        "dirty_price": dirty_price_perc,
+        "repo_end_date": repo_end_date,
+        "invoice_price": invoice_price_perc,
+        "forward_price": forward_price_perc,
+        "full_future_val": full_future_val,
+        "net_basis": (forward_price_perc - full_future_val) * 32,
+        "implied_repo_rate": (full_future_val / dirty_price_perc - 1) * days_in_year / repo_period * 100,
+    }
+
+
+def bootstrap_discount_factors(par_rates_perc, face_value_perc=100, initial_sum=0):
+    '''Bootstrap discount factors from annual par-coupon rates, for one or many curves at once.
+
+    This is the vectorized version of the bootstrap in ZspreadPar.get_zspread. The bootstrap
+    equations (face + c_i) * DF_i + c_i * (DF_1 + ... + DF_{i-1}) = face give the cumulative sums
+    S_i = DF_1 + ... + DF_i through the recursion S_i = a_i * (S_{i-1} + 1) with
+    a_i = face / (face + c_i), which is solved in closed form with cumulative products and sums.
+    The numba backend runs the bootstrap equations directly instead.
+
+    Parameters
+    ----------
+    par_rates_perc: np.array
+        Par-coupon rates (in percent). The last axis is the curve, other axes index the curves.
+    face_value_perc: float or np.array, optional
+        The face value (in percent). Default is 100.
+    initial_sum: float or np.array, optional
+        The sum of the discount factors of the earlier points of each curve, S_0. Pass it to
+        bootstrap the tail of a curve whose first points are unchanged. Default is 0.
+
+    Returns
+    -------
+    np.array
+        The discount factors, with the same shape as par_rates_perc.
+
+    Examples
+    --------
+    >>> bootstrap_discount_factors(np.array([1.00, 1.50, 1.80, 2.05, 2.20]))
+    array([0.99009901, 0.97058967, 0.94764991, 0.92148854, 0.89603112])
+    '''
+    par_rates = np.asarray(par_rates_perc, dtype=float) * 0.01
+    face_value = np.expand_dims(np.asarray(face_value_perc, dtype=float) * 0.01, -1)
+    initial_sum = np.expand_dims(np.asarray(initial_sum, dtype=float), -1)
+    kernels = backend.kernels()
+    if kernels is not None:
+        face_value = np.broadcast_to(face_value, par_rates.shape[:-1] + (1,))
+        initial_sum = np.broadcast_to(initial_sum, par_rates.shape[:-1] + (1,))
+        discount_factor = kernels.bootstrap_discount_factors(np.array(par_rates.reshape(-1, par_rates.shape[-1])),
+                                                             np.array(face_value.reshape(-1)),
+                                                             np.array(initial_sum.reshape(-1)))
+        return discount_factor.reshape(par_rates.shape)
+    a = face_value / (face_value + par_rates)
+    product = np.cumprod(a, axis=-1)
+    previous = np.concatenate([np.ones(product.shape[:-1] + (1,)), product[..., :-1]], axis=-1)
+    cumulative = product * (initial_sum + np.cumsum(1 / previous, axis=-1))
+    return np.diff(cumulative, axis=-1, prepend=np.broadcast_to(initial_sum, cumulative.shape[:-1] + (1,)))
+
+
+def zero_rates(discount_factor, maturity, compound="discrete"):
+    '''Convert discount factors into discrete or continuous zero-coupon rates (in percent).'''
+    if compound not in ["discrete", "continuous"]:
+        raise Exception(r"compound should be either 'discrete' or 'continuous' ")
+    discount_factor, maturity = np.asarray(discount_factor, dtype=float), np.asarray(maturity, dtype=float)
+    if compound == "discrete":
+        return ((1 / discount_factor) ** (1 / maturity) - 1) * 100
+    return -np.log(discount_factor) / maturity * 100
@@ -4,6 +4,10 @@ import numpy as np
 import math
 from scipy.optimize import root
 from fincomepy.fixedincome import FixedIncome
+from fincomepy.curve import KEY_TENORS
+from fincomepy import instrumentation
+from fincomepy.calendar import get_calendar
+from fincomepy.cashflows import CashFlows
 
 class Bond(FixedIncome):
     '''
@@ -64,12 +68,16 @@ class Bond(FixedIncome):
         Calculate the convexity of a bond.
     price_change(yld_change_perc)
         Calculate the bond price change based on yield change.
+    key_rate_DV01(curve, key_tenors)
+        Calculate the key rate DV01s of a bond against a zero curve.
     diff_month(date1, date2)
         Get the month difference between two dates.
     last_day_in_month(original_date)
         Get the last day for the input month.
-    coupon_dates()
+    coupon_dates(calendar=None, convention="following")
         Obtain the coupon payment dates of a bond.
+    cash_flows(calendar=None, convention="following")
+        Get the remaining cash flows of a bond as a CashFlows container.
     '''
 
     def __init__(self, settlement, maturity, coupon_perc, price_perc, frequency, basis=1, redemption=100, yld=None):
@@ -325,15 +333,14 @@ class Bond(FixedIncome):
         first_period = Bond._first_period(pcd, ncd, settlement, frequency, basis)
         coupon_interval = 12 / frequency  
         nperiod = Bond.get_nperiod(settlement, maturity, coupon_interval)  
-        periods = np.array([first_period + i for i in range(nperiod)])
-        CF_perc = np.array([rate / frequency] * nperiod)
-        CF_perc[-1] += redemption 
-        CF_regular = CF_perc * 0.01
-        yld_regular = yld * 0.01
-        DF = 1 / (1 + yld_regular / frequency) ** periods
-        CF_PV = CF_regular * DF
-        CF_PV_total = sum(CF_PV)
-        return CF_PV_total * 100  
+        return Bond._schedule_cash_flows(first_period, nperiod, rate, redemption, frequency).present_value(yld)[0] * 100
+
+    @staticmethod
+    def _schedule_cash_flows(first_period, nperiod, rate, redemption, frequency, dates=None):
+        '''Get the cash flows of a bond with nperiod remaining coupons as a CashFlows container.'''
+        CF_perc = np.full(nperiod, rate / frequency)
+        CF_perc[-1] += redemption
+        return CashFlows([0, nperiod], first_period + np.arange(nperiod), CF_perc * 0.01, frequency, dates)
 
     @staticmethod
     def _first_period(pcd, ncd, settlement, frequency, basis):
@@ -356,6 +363,7 @@ class Bond(FixedIncome):
         return num_days / denom_days
 
     @staticmethod
+    @instrumentation.instrument("bond.yld")
     def yld(settlement, maturity, rate, pr, redemption, frequency, basis, *args, **kwargs):
         '''Calculate the yield of a bond.
 
@@ -403,6 +411,7 @@ class Bond(FixedIncome):
         dirty_price_target = accrued_interest + pr
         sol = root(lambda x: Bond.dirty_price(settlement, maturity, rate, x, redemption, frequency, basis) - dirty_price_target, 
             [0.01], *args, **kwargs)
+        instrumentation.count("bond.yld.nfev", sol.nfev)
         yld = sol.x[0]
         assert yld >= 0 and yld <= 100
         return yld
@@ -411,10 +420,9 @@ class Bond(FixedIncome):
         coupon_interval = 12 / self._frequency  
         nperiod = Bond.get_nperiod(self._settlement, self._maturity, coupon_interval)
         first_period = Bond._first_period(self._couppcd, self._coupncd , self._settlement, self._frequency, self._basis)
-        periods = np.array([first_period + i for i in range(nperiod)])
-        CF_perc = np.array([self._perc_dict["coupon"] / self._frequency] * nperiod)
-        CF_perc[-1] += self._redemption
-        CF_regular = CF_perc * 0.01
+        cash_flows = Bond._schedule_cash_flows(first_period, nperiod, self._perc_dict["coupon"], self._redemption,
+                                               self._frequency)
+        periods, CF_regular = cash_flows.times, cash_flows.values
         if self._yld is None:
             self._yld = self.yld(self._settlement, self._maturity, self._perc_dict["coupon"], self._perc_dict["clean_price"],
                                  self._redemption, self._frequency, self._basis)
@@ -563,7 +571,44 @@ class Bond(FixedIncome):
         yld_change_reg = yld_change_perc * 0.01
         price_change_reg = (-1) * DV01 * yld_change_reg + self._reg_dict["dirty_price"] * convexity / 2 * (yld_change_reg ** 2)
         return price_change_reg * 100
-            
+
+    def key_rate_DV01(self, curve, key_tenors=KEY_TENORS):
+        '''Calculate the key rate DV01s of a bond against a zero curve.
+
+        The cash flows of the bond are discounted with the zero curve. The key rate DV01s are
+        obtained in one pass from the derivatives of the discount factors and the key rate weights
+        (see ZeroCurve.key_rate_weights), without repricing the bond for each key rate. They are in
+        the same units as DV01(), and their sum is the DV01 for a parallel shift of the zero curve.
+
+        Parameters
+        ----------
+        curve: ZeroCurve
+            The zero curve used to discount the cash flows.
+        key_tenors: tuple, optional
+            Key rate tenors (in years). Default is (2, 5, 10, 30).
+
+        Returns
+        -------
+        np.array
+            The key rate DV01 for each key tenor.
+
+        Examples
+        --------
+        >>> bond_test = Bond(settlement=date(2020,7,15), maturity=date(2030,5,15),
+            coupon_perc=0.625, price_perc=100.015625, frequency=2, basis=1)
+        >>> curve = ZeroCurve(np.array([1, 2, 5, 10, 30]), np.array([0.15, 0.2, 0.4, 0.7, 1.3]))
+        >>> bond_test.key_rate_DV01(curve)
+        array([0.04032547, 0.43943035, 8.95316858, 0.        ])
+        '''
+        nperiod = len(self.coupon_dates())
+        first_period = Bond._first_period(self._couppcd, self._coupncd, self._settlement, self._frequency, self._basis)
+        times = (first_period + np.arange(nperiod)) / self._frequency
+        CF_regular = np.full(nperiod, self._reg_dict["coupon"] / self._frequency)
+        CF_regular[-1] += self._redemption * 0.01
+        # d(price)/d(zero rate at each cash flow time), mapped onto the key rates
+        price_derivative = CF_regular * curve.discount_factor_derivative(times)
+        return -price_derivative @ curve.key_rate_weights(times, key_tenors)
+
     @staticmethod
     def diff_month(date1, date2):
         '''Get the month difference between two dates.
@@ -616,22 +661,65 @@ class Bond(FixedIncome):
             return int(firstnum) + (int(secondnum[:-1]) + 0.5) / 32
         return int(firstnum) + int(secondnum) / 32
 
-    def coupon_dates(self):
+    @instrumentation.instrument("bond.coupon_dates")
+    def coupon_dates(self, calendar=None, convention="following"):
         '''Obtain the coupon payment dates of a bond.
 
+        Parameters
+        ----------
+        calendar: str or HolidayCalendar, optional
+            The business-day calendar ("US", "UK" or a fincomepy.calendar.HolidayCalendar) used to
+            move the payment dates to business days. Default is None, which returns the unadjusted
+            dates.
+        convention: str, optional
+            "following", "modified_following" or "preceding". Default is "following".
+
         Returns
         -------
         list
             A list of coupon payment dates.
+
+        Examples
+        --------
+        >>> bond_test.coupon_dates(calendar="US")
         '''
         coupon_interval = 12 / self._frequency
         periods = Bond.get_nperiod(self._settlement, self._maturity, coupon_interval)
         coupon_dates = [self._maturity - relativedelta(months=coupon_interval) * i for i in range(periods)]
         if self._maturity == Bond.last_day_in_month(self._maturity):
             coupon_dates = [Bond.last_day_in_month(item) for item in coupon_dates]
+        if calendar is not None:
+            coupon_dates = get_calendar(calendar).adjust(coupon_dates, convention).tolist()
         return coupon_dates
 
+    def cash_flows(self, calendar=None, convention="following"):
+        '''Get the remaining cash flows of a bond as a CashFlows container.
+
+        Parameters
+        ----------
+        calendar: str or HolidayCalendar, optional
+            The business-day calendar used to adjust the payment dates, see coupon_dates. Default is
+            None. The times are not affected by the adjustment.
+        convention: str, optional
+            "following", "modified_following" or "preceding". Default is "following".
+
+        Returns
+        -------
+        CashFlows
+            One instrument with the time (in coupon periods from settlement), amount (per unit face
+            value) and payment date of each cash flow, in increasing order of time.
+
+        Examples
+        --------
+        >>> bond_test.cash_flows().present_value(bond_test._yld) * 100
+        '''
+        dates = self.coupon_dates(calendar, convention)[::-1]
+        first_period = Bond._first_period(self._couppcd, self._coupncd, self._settlement, self._frequency, self._basis)
+        return Bond._schedule_cash_flows(first_period, len(dates), self._perc_dict["coupon"], self._redemption,
+                                         self._frequency, np.array(dates, dtype="datetime64[D]"))
+
     @staticmethod
+    @instrumentation.instrument("bond.get_nperiod")
     def get_nperiod(settlement, maturity, coupon_interval):
         assert settlement < maturity
         nperiod = 0
@@ -3,6 +3,7 @@ import numpy as np
 import bisect
 from fincomepy.fixedincome import FixedIncome
 from fincomepy.bond import Bond
+from fincomepy.calendar import get_calendar
 
 class BondFuture(Bond):
     '''
@@ -75,11 +76,13 @@ class BondFuture(Bond):
         Calculate the convexity of a bond.
     price_change(yld_change_perc)
         Calculate the bond price change based on yield change.
+    key_rate_DV01(curve, key_tenors)
+        Calculate the key rate DV01s of a bond against a zero curve.
     diff_month(date1, date2)
         Get the month difference between two dates.
     last_day_in_month(original_date)
         Get the last day for the input month.
-    coupon_dates()
+    coupon_dates(calendar=None, convention="following")
         Obtain the coupon payment dates of a bond.
     forward_price()
         Calculate forward price. 
@@ -92,7 +95,8 @@ class BondFuture(Bond):
     '''
 
     def __init__(self, settlement, maturity, coupon_perc, price_perc, frequency, basis, 
-                 repo_period, repo_rate_perc, futures_pr_perc, conversion_factor, type='US'):
+                 repo_period, repo_rate_perc, futures_pr_perc, conversion_factor, type='US',
+                 calendar=None, convention="following"):
         '''
         Constructor for BondFuture.
 
@@ -128,6 +132,12 @@ class BondFuture(Bond):
         type: str, optional
             A string which specifies the money market of repo. It should be either 'US' or 'UK'.
             Default is 'US'.
+        calendar: str or HolidayCalendar, optional
+            The business-day calendar ("US", "UK" or a fincomepy.calendar.HolidayCalendar) used to
+            move the repo end date to a business day. The repo period becomes the number of days
+            to the adjusted end date. Default is None (no adjustment).
+        convention: str, optional
+            "following", "modified_following" or "preceding". Default is "following".
 
         Examples
         --------
@@ -136,6 +146,9 @@ class BondFuture(Bond):
             repo_period=75, repo_rate_perc=0.14, futures_pr_perc=139.4375, conversion_factor=0.8072)
         '''
         super().__init__(settlement, maturity, coupon_perc, price_perc, frequency, basis)
+        if calendar is not None:
+            repo_end_date = get_calendar(calendar).adjust(self._settlement + timedelta(days=repo_period), convention)
+            repo_period = (repo_end_date.item() - self._settlement).days
         self._repo_period = repo_period
         self._perc_dict["repo_rate"] = repo_rate_perc
         self._repo_end_date = self._settlement + timedelta(days=repo_period)
@@ -149,7 +162,8 @@ class BondFuture(Bond):
         
     @classmethod
     def from_end_date(cls, settlement, maturity, coupon_perc, price_perc, frequency, basis, 
-        repo_end_date, repo_rate_perc, futures_pr_perc, conversion_factor, type='US'):
+        repo_end_date, repo_rate_perc, futures_pr_perc, conversion_factor, type='US', calendar=None,
+        convention="following"):
         '''
         Constructor for BondFuture.
 
@@ -185,6 +199,12 @@ class BondFuture(Bond):
         type: str, optional
             A string which specifies the money market of repo. It should be either 'US' or 'UK'.
             Default is 'US'.
+        calendar: str or HolidayCalendar, optional
+            The business-day calendar ("US", "UK" or a fincomepy.calendar.HolidayCalendar) used to
+            move the repo end date to a business day. The repo period becomes the number of days
+            to the adjusted end date. Default is None (no adjustment).
+        convention: str, optional
+            "following", "modified_following" or "preceding". Default is "following".
 
         Examples
         --------
@@ -194,7 +214,7 @@ class BondFuture(Bond):
         '''
         repo_period = (repo_end_date - settlement).days
         return cls(settlement, maturity, coupon_perc, price_perc, frequency, basis, 
-            repo_period, repo_rate_perc, futures_pr_perc, conversion_factor, type)
+            repo_period, repo_rate_perc, futures_pr_perc, conversion_factor, type, calendar, convention)
     
     def forward_price(self): 
         '''
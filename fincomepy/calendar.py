@@ -0,0 +1,350 @@
+'''
+Business-day calendars for the US and UK government bond markets.
+
+The holidays of each market are generated from rules defined in this module (fixed dates with
+weekend substitution, n-th weekdays of a month, Easter), so no external holiday data is needed.
+The current rules are applied to every year of a calendar, plus the one-off closures listed in
+the module.
+
+A HolidayCalendar covers a range of years. When it is constructed, its business days are stored
+as a bitmap (one bit per day), together with the distance from each day to the next and to the
+previous business day. Checking or adjusting a whole datetime64 array is then a few array
+lookups, with no loop over the dates.
+'''
+import numpy as np
+
+# business day conventions of HolidayCalendar.adjust
+CONVENTIONS = ("following", "modified_following", "preceding")
+# default range of years covered by the calendars
+START_YEAR = 1950
+END_YEAR = 2100
+
+# one-off closures, e.g. national days of mourning and market disruptions
+US_SPECIAL_HOLIDAYS = ["1963-11-25", "1968-04-09", "1969-03-31", "1972-12-28", "1973-01-25", "1985-09-27",
+                       "1994-04-27", "2001-09-11", "2001-09-12", "2004-06-11", "2007-01-02", "2012-10-30",
+                       "2018-12-05"]
+# one-off closures, e.g. royal jubilees and funerals
+UK_SPECIAL_HOLIDAYS = ["1999-12-31", "2002-06-03", "2011-04-29", "2012-06-05", "2022-06-03", "2022-09-19",
+                       "2023-05-08"]
+# years in which a UK bank holiday was moved: {year: date}
+UK_EARLY_MAY_MOVED = {1995: "1995-05-08", 2020: "2020-05-08"}
+UK_SPRING_MOVED = {2002: "2002-06-04", 2012: "2012-06-04", 2022: "2022-06-02"}
+
+
+def _date(Y, M, D):
+    '''Build a datetime64[D] array from year, month and day arrays.'''
+    Y, M, D = np.broadcast_arrays(np.asarray(Y, dtype=np.int64), np.asarray(M, dtype=np.int64),
+                                  np.asarray(D, dtype=np.int64))
+    months = ((Y - 1970) * 12 + M - 1).astype("datetime64[M]")
+    return months.astype("datetime64[D]") + (D - 1).astype("timedelta64[D]")
+
+
+def weekday(dates):
+    '''Get the day of the week of each date (0 is Monday, 6 is Sunday).'''
+    return (np.asarray(dates, dtype="datetime64[D]").astype(np.int64) + 3) % 7
+
+
+def _nth_weekday(Y, M, day, n):
+    '''Get the n-th given weekday (0 is Monday) of a month, or the last one for n=-1.'''
+    if n > 0:
+        first = _date(Y, M, 1)
+        return first + ((day - weekday(first)) % 7 + 7 * (n - 1)).astype("timedelta64[D]")
+    last = _date(Y, M + 1, 1) - 1
+    return last - ((weekday(last) - day) % 7).astype("timedelta64[D]")
+
+
+def _nearest_weekday(dates):
+    '''Move a Saturday to the Friday before and a Sunday to the Monday after.'''
+    day = weekday(dates)
+    return dates + np.select([day == 5, day == 6], [-1, 1], 0).astype("timedelta64[D]")
+
+
+def _next_weekday(dates):
+    '''Move a Saturday or a Sunday to the Monday after.'''
+    day = weekday(dates)
+    return dates + np.select([day == 5, day == 6], [2, 1], 0).astype("timedelta64[D]")
+
+
+def easter_sunday(years):
+    '''Get the date of Easter Sunday of each year (Gregorian calendar).'''
+    Y = np.asarray(years, dtype=np.int64)
+    a, b, c = Y % 19, Y // 100, Y % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return _date(Y, month, day)
+
+
+def _special(dates, years):
+    '''Get the one-off closures among dates which fall in the given years.'''
+    special = np.array(dates, dtype="datetime64[D]")
+    return special[np.isin(special.astype("datetime64[Y]").astype(np.int64) + 1970, years)]
+
+
+def us_holidays(years):
+    '''Get the US government bond market holidays (SIFMA recommended full closes) of some years.
+
+    Parameters
+    ----------
+    years: np.array
+        The years.
+
+    Returns
+    -------
+    np.array
+        The sorted holidays (datetime64[D]) which fall on weekdays.
+    '''
+    Y = np.asarray(years, dtype=np.int64)
+    new_year = _date(Y, 1, 1)
+    # New Year's Day falling on a Saturday is not observed on the Friday before
+    new_year = np.where(weekday(new_year) == 6, new_year + 1, new_year)
+    veterans = _date(Y, 11, 11)
+    veterans = np.where(weekday(veterans) == 6, veterans + 1, veterans)
+    holidays = [
+        new_year,
+        _nth_weekday(Y[Y >= 1986], 1, 0, 3),        # Martin Luther King Jr. Day
+        _nth_weekday(Y, 2, 0, 3),                   # Washington's Birthday
+        easter_sunday(Y) - 2,                       # Good Friday
+        _nth_weekday(Y, 5, 0, -1),                  # Memorial Day
+        _nearest_weekday(_date(Y[Y >= 2022], 6, 19)),   # Juneteenth
+        _nearest_weekday(_date(Y, 7, 4)),           # Independence Day
+        _nth_weekday(Y, 9, 0, 1),                   # Labor Day
+        _nth_weekday(Y, 10, 0, 2),                  # Columbus Day
+        veterans,
+        _nth_weekday(Y, 11, 3, 4),                  # Thanksgiving Day
+        _nearest_weekday(_date(Y, 12, 25)),         # Christmas Day
+        _special(US_SPECIAL_HOLIDAYS, Y),
+    ]
+    holidays = np.unique(np.concatenate(holidays))
+    return holidays[weekday(holidays) < 5]
+
+
+def uk_holidays(years):
+    '''Get the UK government bond market holidays (bank holidays in England) of some years.
+
+    Parameters
+    ----------
+    years: np.array
+        The years.
+
+    Returns
+    -------
+    np.array
+        The sorted holidays (datetime64[D]) which fall on weekdays.
+    '''
+    Y = np.asarray(years, dtype=np.int64)
+    easter = easter_sunday(Y)
+    early_may = _nth_weekday(Y[Y >= 1978], 5, 0, 1)
+    spring = _nth_weekday(Y, 5, 0, -1)
+    for moved, dates in [(UK_EARLY_MAY_MOVED, early_may), (UK_SPRING_MOVED, spring)]:
+        for year, day in moved.items():
+            dates[dates.astype("datetime64[Y]") == np.datetime64(str(year), "Y")] = np.datetime64(day)
+    # Christmas Day and Boxing Day falling on a weekend are substituted by the next weekdays
+    christmas = _next_weekday(_date(Y, 12, 25))
+    boxing_day = _next_weekday(christmas + 1)
+    holidays = [
+        _next_weekday(_date(Y, 1, 1)),              # New Year's Day
+        easter - 2,                                 # Good Friday
+        easter + 1,                                 # Easter Monday
+        early_may,
+        spring,
+        _nth_weekday(Y, 8, 0, -1),                  # Summer bank holiday
+        christmas,
+        boxing_day,
+    ]
+    holidays.append(_special(UK_SPECIAL_HOLIDAYS, Y))
+    holidays = np.unique(np.concatenate(holidays))
+    return holidays[weekday(holidays) < 5]
+
+
+# holiday rules of the built-in calendars
+RULES = {"US": us_holidays, "UK": uk_holidays}
+
+
+class HolidayCalendar(object):
+    '''
+    A business-day calendar with vectorized date adjustments.
+
+    Attributes
+    ----------
+    name: str
+        The name of the calendar.
+    _start: np.datetime64
+        The first date covered by the calendar.
+    _end: np.datetime64
+        The last date covered by the calendar.
+    _bits: np.array
+        A bitmap (np.packbits layout) with a set bit for each business day from _start to _end.
+    _following: np.array
+        The number of days (int16) from each date to the next business day (0 for business days).
+    _preceding: np.array
+        The number of days (int16) from the previous business day to each date.
+
+    Methods
+    -------
+    is_business_day(dates)
+        Check which dates are business days.
+    adjust(dates, convention="following")
+        Move dates which are not business days to a business day.
+    holidays(start=None, end=None)
+        Get the holidays (on weekdays) of the calendar.
+    '''
+
+    def __init__(self, name, holidays, start_year=START_YEAR, end_year=END_YEAR):
+        '''Constructor for HolidayCalendar.
+
+        Parameters
+        ----------
+        name: str
+            The name of the calendar.
+        holidays: np.array
+            The holidays. Saturdays and Sundays are always non-business days.
+        start_year: int, optional
+            The first year covered by the calendar. Default is START_YEAR.
+        end_year: int, optional
+            The last year covered by the calendar. Default is END_YEAR.
+
+        Examples
+        --------
+        >>> calendar = HolidayCalendar("TARGET", ["2021-01-01", "2021-04-02", "2021-04-05"], 2021, 2021)
+        '''
+        self.name = name
+        self._start = _date(start_year, 1, 1)
+        self._end = _date(end_year, 12, 31)
+        days = np.arange(self._start, self._end + 1)
+        holidays = np.asarray(holidays, dtype="datetime64[D]")
+        business = (weekday(days) < 5) & ~np.isin(days, holidays)
+        self._bits = np.packbits(business)
+        index = np.arange(days.size)
+        # distances to the next and the previous business day, -1 where there is none in range
+        following = np.minimum.accumulate(np.where(business, index, days.size)[::-1])[::-1]
+        preceding = np.maximum.accumulate(np.where(business, index, -1))
+        self._following = np.where(following < days.size, following - index, -1).astype(np.int16)
+        self._preceding = np.where(preceding >= 0, index - preceding, -1).astype(np.int16)
+
+    def __repr__(self):
+        return "HolidayCalendar({!r}, {}..{})".format(self.name, self._start, self._end)
+
+    def _index(self, dates):
+        '''Get the position of each date in the calendar.'''
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        if dates.size and (dates.min() < self._start or dates.max() > self._end):
+            raise Exception("dates should be between {} and {} for calendar {}.".format(self._start, self._end,
+                                                                                      self.name))
+        return dates, (dates - self._start).astype(np.int64)
+
+    def is_business_day(self, dates):
+        '''Check which dates are business days.
+
+        Parameters
+        ----------
+        dates: np.array
+            Dates (datetime64 or datetime.date).
+
+        Returns
+        -------
+        np.array
+            A boolean array which is True for business days.
+        '''
+        index = self._index(dates)[1]
+        return ((self._bits[index >> 3] >> (7 - (index & 7))) & 1).astype(bool)
+
+    def adjust(self, dates, convention="following"):
+        '''Move dates which are not business days to a business day.
+
+        Parameters
+        ----------
+        dates: np.array
+            Dates (datetime64 or datetime.date).
+        convention: str, optional
+            "following" (the next business day), "modified_following" (the next business day,
+            unless it is in the next month, then the previous business day) or "preceding" (the
+            previous business day). Default is "following".
+
+        Returns
+        -------
+        np.array
+            The adjusted dates (datetime64[D]), with the shape of dates.
+
+        Examples
+        --------
+        >>> get_calendar("US").adjust(np.array(["2020-07-04", "2020-10-31"], dtype="datetime64[D]"),
+                "modified_following")
+        array(['2020-07-06', '2020-10-30'], dtype='datetime64[D]')
+        '''
+        if convention not in CONVENTIONS:
+            raise Exception("convention should be one of " + ", ".join(CONVENTIONS) + ".")
+        dates, index = self._index(dates)
+        following = self._following[index].astype(np.int64)
+        preceding = self._preceding[index].astype(np.int64)
+        if convention == "following":
+            shift, distance = following, following
+        elif convention == "preceding":
+            shift, distance = -preceding, preceding
+        else:
+            month_end = (dates + following.astype("timedelta64[D]")).astype("datetime64[M]") != \
+                dates.astype("datetime64[M]")
+            shift = np.where(month_end, -preceding, following)
+            distance = np.where(month_end, preceding, following)
+        # the distance is -1 when there is no business day within the calendar in that direction
+        if (distance < 0).any():
+            raise Exception("no business day within the range of calendar {}.".format(self.name))
+        return dates + shift.astype("timedelta64[D]")
+
+    def holidays(self, start=None, end=None):
+        '''Get the holidays (on weekdays) of the calendar.
+
+        Parameters
+        ----------
+        start: datetime.date or np.datetime64, optional
+            The first date. Default is None, the start of the calendar.
+        end: datetime.date or np.datetime64, optional
+            The last date. Default is None, the end of the calendar.
+
+        Returns
+        -------
+        np.array
+            The sorted holidays (datetime64[D]).
+        '''
+        start = self._start if start is None else np.datetime64(start, "D")
+        end = self._end if end is None else np.datetime64(end, "D")
+        days = np.arange(start, end + 1)
+        return days[(weekday(days) < 5) & ~self.is_business_day(days)]
+
+
+_CALENDARS = {}
+
+
+def get_calendar(calendar):
+    '''Get a built-in calendar by name.
+
+    The calendars are built on first use and cached.
+
+    Parameters
+    ----------
+    calendar: str or HolidayCalendar
+        "US" or "UK". A HolidayCalendar is returned unchanged.
+
+    Returns
+    -------
+    HolidayCalendar
+        The calendar.
+
+    Examples
+    --------
+    >>> get_calendar("UK").is_business_day(np.datetime64("2020-05-08"))
+    array(False)
+    '''
+    if isinstance(calendar, HolidayCalendar):
+        return calendar
+    if calendar not in RULES:
+        raise Exception("calendar should be one of " + ", ".join(RULES) + ", or a HolidayCalendar.")
+    if calendar not in _CALENDARS:
+        _CALENDARS[calendar] = HolidayCalendar(calendar, RULES[calendar](np.arange(START_YEAR, END_YEAR + 1)))
+    return _CALENDARS[calendar]
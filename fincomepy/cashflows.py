@@ -0,0 +1,332 @@
+'''
+A ragged container for the cash flows of many instruments.
+
+CashFlows stores the cash flows of all instruments in one set of contiguous arrays, in compressed
+sparse row (CSR) layout: the cash flows of instrument i are at offsets[i]:offsets[i+1] of times,
+values and (optionally) dates. Times are in periods of 1 / frequency years, so the cash flows of
+bonds are discounted with (1 + yld / frequency) ** -times, and frequency 1 gives times in years
+(e.g. for the z-spread classes).
+
+Bond.cash_flows, Portfolio.cash_flows, ZspreadZero.cash_flows and MappedStore.cash_flows emit
+CashFlows, and Bond.dirty_price, the scenario engine, the store and DiscountTable.zspread consume
+them. Computations on CashFlows work on the flat buffers (one value per cash flow) and reduce them
+per instrument with sum; to_dense is only needed by callers which want a grid. to_numpy and
+to_arrow export the buffers without copying them.
+'''
+import numpy as np
+
+
+class CashFlows(object):
+    '''
+    The cash flows of many instruments in CSR layout.
+
+    Attributes
+    ----------
+    offsets: np.array
+        The cash flows of instrument i are at offsets[i]:offsets[i+1] (int64, one more element than
+        the number of instruments).
+    times: np.array
+        The time of each cash flow, in periods of 1 / frequency years.
+    values: np.array
+        The amount of each cash flow (regular quantity, per unit face value).
+    frequency: np.array
+        The number of periods per year of each instrument.
+    dates: np.array or None
+        The payment date (datetime64[D]) of each cash flow, if known.
+
+    Methods
+    -------
+    rows()
+        Get the instrument of each cash flow.
+    row(i)
+        Get the cash flows of one instrument.
+    take(index)
+        Select instruments.
+    years()
+        Get the time of each cash flow in years.
+    discounted(yld_perc)
+        Discount each cash flow at the yield of its instrument.
+    sum(values)
+        Sum per-cash-flow values over each instrument.
+    present_value(yld_perc)
+        Calculate the present value of each instrument.
+    from_dense(CF_perc, times=None)
+        Construct CashFlows from a (instruments x times) array.
+    to_dense(grid)
+        Convert into a (instruments x grid) array.
+    to_numpy()
+        Get the buffers as numpy arrays.
+    to_arrow()
+        Export the cash flows as a pyarrow Table.
+    from_arrow(table)
+        Construct CashFlows from a pyarrow Table written by to_arrow.
+    '''
+
+    def __init__(self, offsets, times, values, frequency=1, dates=None):
+        '''Constructor for CashFlows.
+
+        The arrays are used as they are (no copy) when they already have the right dtype.
+
+        Parameters
+        ----------
+        offsets: np.array
+            The cash flows of instrument i are at offsets[i]:offsets[i+1].
+        times: np.array
+            The time of each cash flow, in periods of 1 / frequency years.
+        values: np.array
+            The amount of each cash flow (regular quantity).
+        frequency: int or np.array, optional
+            The number of periods per year of each instrument. Default is 1 (times in years).
+        dates: np.array, optional
+            The payment date of each cash flow. Default is None.
+
+        Examples
+        --------
+        >>> cash_flows = CashFlows([0, 2, 5], [0.5, 1.5, 0.2, 1.2, 2.2], [0.01, 1.01, 0.03, 0.03, 1.03], frequency=2)
+        >>> cash_flows.present_value(1.0)
+        '''
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.times = np.asarray(times, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        n = self.offsets.size - 1
+        if n < 0 or self.offsets[0] != 0 or (np.diff(self.offsets) < 0).any():
+            raise Exception("offsets should start at 0 and be non-decreasing.")
+        if self.times.shape != (self.offsets[-1],) or self.values.shape != self.times.shape:
+            raise Exception("times and values should have offsets[-1] elements.")
+        frequency = np.asarray(frequency)
+        self.frequency = np.broadcast_to(frequency, (n,)) if frequency.ndim == 0 else frequency
+        if self.frequency.shape != (n,):
+            raise Exception("frequency should have one element per instrument.")
+        self.dates = None if dates is None else np.asarray(dates, dtype="datetime64[D]")
+        if self.dates is not None and self.dates.shape != self.times.shape:
+            raise Exception("dates should have one element per cash flow.")
+        self._rows = None
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    def __repr__(self):
+        return "CashFlows({} instruments, {} cash flows)".format(len(self), self.times.size)
+
+    def rows(self):
+        '''Get the instrument of each cash flow.
+
+        Returns
+        -------
+        np.array
+            The row (instrument index) of each cash flow.
+        '''
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+        return self._rows
+
+    def row(self, i):
+        '''Get the cash flows of one instrument.
+
+        Returns
+        -------
+        dict
+            A dictionary with views of the "times", "values" and (if known) "dates" of the cash
+            flows of instrument i.
+        '''
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        row = {"times": self.times[start:stop], "values": self.values[start:stop]}
+        if self.dates is not None:
+            row["dates"] = self.dates[start:stop]
+        return row
+
+    def take(self, index):
+        '''Select instruments.
+
+        Parameters
+        ----------
+        index: np.array
+            The rows of the instruments to select, in the order of the result.
+
+        Returns
+        -------
+        CashFlows
+            The cash flows of the selected instruments (copied into new buffers).
+        '''
+        index = np.atleast_1d(np.asarray(index, dtype=np.int64))
+        start, count = self.offsets[index], np.diff(self.offsets)[index]
+        offsets = np.concatenate([[0], np.cumsum(count)])
+        # position of each selected cash flow in the original buffers
+        owner = np.repeat(np.arange(index.size), count)
+        position = np.arange(offsets[-1]) - offsets[owner] + start[owner]
+        return CashFlows(offsets, self.times[position], self.values[position], self.frequency[index],
+                         None if self.dates is None else self.dates[position])
+
+    def years(self):
+        '''Get the time of each cash flow in years.'''
+        return self.times / self.frequency[self.rows()]
+
+    def discounted(self, yld_perc):
+        '''Discount each cash flow at the yield of its instrument.
+
+        Parameters
+        ----------
+        yld_perc: float or np.array
+            The yield (in percent, compounded frequency times per year) of each instrument.
+
+        Returns
+        -------
+        np.array
+            The present value of each cash flow, values * (1 + yld / frequency) ** -times.
+        '''
+        rows = self.rows()
+        yld = np.broadcast_to(np.asarray(yld_perc, dtype=float), (len(self),))[rows] * 0.01
+        return self.values * np.exp(-self.times * np.log1p(yld / self.frequency[rows]))
+
+    def sum(self, values):
+        '''Sum per-cash-flow values over each instrument.
+
+        Parameters
+        ----------
+        values: np.array
+            One value per cash flow, e.g. from discounted.
+
+        Returns
+        -------
+        np.array
+            The sum of the values of each instrument (0 for instruments without cash flows).
+        '''
+        return np.bincount(self.rows(), weights=values, minlength=len(self))
+
+    def present_value(self, yld_perc):
+        '''Calculate the present value of each instrument.
+
+        Parameters
+        ----------
+        yld_perc: float or np.array
+            The yield (in percent) of each instrument.
+
+        Returns
+        -------
+        np.array
+            The present value (regular quantity) of each instrument.
+        '''
+        return self.sum(self.discounted(yld_perc))
+
+    @classmethod
+    def from_dense(cls, CF_perc, times=None):
+        '''Construct CashFlows from a (instruments x times) array.
+
+        Parameters
+        ----------
+        CF_perc: np.array
+            The cash flows (in percent). A one-dimensional array is one instrument.
+        times: np.array, optional
+            The time (in years) of each column. Default is None, which uses 1, 2, 3, ...
+
+        Returns
+        -------
+        CashFlows
+            The cash flows, with frequency 1. Zero cash flows are kept, so every instrument has
+            one cash flow per column.
+
+        Examples
+        --------
+        >>> CashFlows.from_dense(np.array([[3.0, 3.0, 103.0], [0.0, 0.0, 100.0]]))
+        '''
+        CF_regular = np.atleast_2d(np.asarray(CF_perc, dtype=float)) * 0.01
+        n, m = CF_regular.shape
+        times = np.arange(1, m + 1, dtype=float) if times is None else np.asarray(times, dtype=float)
+        if times.shape != (m,):
+            raise Exception("times should have one element per column of CF_perc.")
+        return cls(np.arange(n + 1) * m, np.tile(times, n), CF_regular.ravel())
+
+    def to_dense(self, grid):
+        '''Convert into a (instruments x grid) array.
+
+        Parameters
+        ----------
+        grid: np.array
+            The times (in years) of the columns, in increasing order. Every cash flow should be
+            paid at one of them.
+
+        Returns
+        -------
+        np.array
+            The cash flows (regular quantities), summed per instrument and grid time.
+        '''
+        grid = np.asarray(grid, dtype=float)
+        years = self.years()
+        columns = np.clip(np.searchsorted(grid, years), 0, max(grid.size - 1, 0))
+        if grid.size == 0 and years.size or not np.allclose(grid[columns], years, rtol=0, atol=1e-9):
+            raise Exception("every cash flow should be paid at a time of the grid.")
+        dense = np.zeros((len(self), grid.size))
+        np.add.at(dense, (self.rows(), columns), self.values)
+        return dense
+
+    def to_numpy(self):
+        '''Get the buffers as numpy arrays (no copy).
+
+        Returns
+        -------
+        dict
+            A dictionary with keys "offsets", "times", "values", "frequency" and, if known, "dates".
+        '''
+        res = {"offsets": self.offsets, "times": self.times, "values": self.values, "frequency": self.frequency}
+        if self.dates is not None:
+            res["dates"] = self.dates
+        return res
+
+    def to_arrow(self):
+        '''Export the cash flows as a pyarrow Table, with one row per instrument (requires pyarrow).
+
+        The "times" and "values" columns are large_list<double> arrays which wrap the offsets, times
+        and values buffers without copying them. Dates are converted into date32.
+
+        Returns
+        -------
+        pyarrow.Table
+            A table with columns "frequency", "times", "values" and, if known, "dates".
+        '''
+        from fincomepy.columnar import _import_pyarrow
+        pa = _import_pyarrow()
+        offsets = pa.array(self.offsets)
+        columns = {
+            "frequency": pa.array(np.ascontiguousarray(self.frequency)),
+            "times": pa.LargeListArray.from_arrays(offsets, pa.array(self.times)),
+            "values": pa.LargeListArray.from_arrays(offsets, pa.array(self.values)),
+        }
+        if self.dates is not None:
+            columns["dates"] = pa.LargeListArray.from_arrays(offsets, pa.array(self.dates.astype(np.int32), pa.int32())
+                                                             .view(pa.date32()))
+        return pa.table(columns)
+
+    @classmethod
+    def from_arrow(cls, table):
+        '''Construct CashFlows from a pyarrow Table written by to_arrow.
+
+        The buffers of a single-chunk table without nulls are used without copying them.
+
+        Parameters
+        ----------
+        table: pyarrow.Table
+            A table with columns "frequency", "times", "values" and optionally "dates".
+
+        Returns
+        -------
+        CashFlows
+            The cash flows.
+        '''
+        from fincomepy.columnar import _import_pyarrow, column_to_numpy
+        pa = _import_pyarrow()
+        table = table.combine_chunks()
+
+        def flatten(name):
+            column = table.column(name).chunk(0) if table.num_rows else pa.array([], pa.large_list(pa.float64()))
+            if not pa.types.is_large_list(column.type):
+                column = column.cast(pa.large_list(column.type.value_type))
+            # offsets relative to the start of the (possibly sliced) values buffer
+            offsets = column.offsets.to_numpy(zero_copy_only=True)
+            return offsets - offsets[0], column.values.slice(offsets[0], offsets[-1] - offsets[0])
+
+        offsets, times = flatten("times")
+        values = flatten("values")[1]
+        dates = column_to_numpy(flatten("dates")[1]) if "dates" in table.column_names else None
+        return cls(offsets, column_to_numpy(times), column_to_numpy(values),
+                   column_to_numpy(table.column("frequency")) if table.num_rows else np.zeros(0, dtype=np.int64),
+                   dates)
@@ -1,5 +1,8 @@
 import numpy as np
+from scipy.optimize import brentq
 from fincomepy.fixedincome import FixedIncome
+from fincomepy import instrumentation
+from fincomepy import batch
 
 class CDS(FixedIncome):
     '''
@@ -17,11 +20,25 @@ class CDS(FixedIncome):
         A numpy array which contains the maturity of bonds (in years). 
     _cds_spread: np.array
         A numpy array which contains the CDS spread (in percent) of each year.
+    _df_risk_free: np.array
+        The discount factors bootstrapped from the risk free rates.
+    _df_risky: np.array
+        The discount factors bootstrapped from the risky rates.
+    _hazard_rates: np.array
+        The default probability of each year, given survival to its start.
+    _survival: np.array
+        The survival probability to the end of each year.
+    _protection_sum: np.array
+        The running sum over the years of the discounted default probabilities.
+    _premium_sum: np.array
+        The running sum over the years of the discounted survival probabilities.
 
     Methods
     -------
     cds_spread()
         Calculate CDS spread.
+    update_tenor(i, risky_perc)
+        Change the risky rate of one tenor and recalculate the CDS spreads.
     '''
     
     def __init__(self, risk_free_perc, risky_perc, face_value_perc=100, rr_perc=50, maturity=None):
@@ -87,6 +104,7 @@ class CDS(FixedIncome):
         risky_perc = risk_free_perc + spread_perc
         return cls(risk_free_perc, risky_perc, face_value_perc, rr_perc, maturity)
     
+    @instrumentation.instrument("cds.cds_spread")
     def cds_spread(self):
         '''Calculate CDS spread.
 
@@ -103,35 +121,338 @@ class CDS(FixedIncome):
         array([0.57848052, 0.57848052, 0.57848052, 0.57848052, 0.57848052,
                0.57848052, 0.57848052, 0.57848052, 0.57848052, 0.57848052])
         '''
-        if self._cds_spread is not None:
-            return self._cds_spread
-        df_risk_free = []
-        df_risky = []
-        df_risk_free.append(self._reg_dict["face_value"] / (self._reg_dict["face_value"] + self._reg_dict["risk_free"][0]))
-        df_risky.append(self._reg_dict["face_value"] / (self._reg_dict["face_value"] + self._reg_dict["risky"][0]))
-        for i in range(1, self._reg_dict["risk_free"].size):
-            df1 = (self._reg_dict["face_value"] - self._reg_dict["risk_free"][i] * sum(df_risk_free)) / \
-                (self._reg_dict["face_value"] + self._reg_dict["risk_free"][i])
-            df2 = (self._reg_dict["face_value"] - self._reg_dict["risky"][i] * sum(df_risky)) / \
-                (self._reg_dict["face_value"] + self._reg_dict["risky"][i])
-            df_risk_free.append(df1)
-            df_risky.append(df2)
-        df_risk_free = np.array(df_risk_free)
-        df_risky = np.array(df_risky)
-        df_risk_free_shift = np.insert(df_risk_free[:-1], 0, 1.0)
-        df_risky_shift = np.insert(df_risky[:-1], 0, 1.0)
+        if self._cds_spread is None:
+            self._build(0)
+        return self._cds_spread
+
+    def update_tenor(self, i, risky_perc):
+        '''Change the risky rate of one tenor and recalculate the CDS spreads.
+
+        The discount factors, hazard rates and survival probabilities of the earlier tenors do not
+        depend on the changed rate, so only tenors i and later are recalculated.
+
+        Parameters
+        ----------
+        i: int
+            The index of the tenor.
+        risky_perc: float
+            The new risky rate (in percent).
+
+        Returns
+        -------
+        np.array
+            A numpy array which contains the CDS spread (in percent) of each year.
+
+        Examples
+        --------
+        >>> cds_test.cds_spread()
+        >>> cds_test.update_tenor(4, 3.80)
+        '''
+        risky = np.array(self._perc_dict["risky"], dtype=float)
+        if not -risky.size <= i < risky.size:
+            raise Exception("i should be the index of a tenor.")
+        i = i % risky.size
+        risky[i] = risky_perc
+        self._perc_dict["risky"] = risky
+        self.update_dict()
+        self._build(i if self._cds_spread is not None else 0)
+        return self._cds_spread
+
+    def _build(self, start):
+        '''Calculate the intermediate arrays and the CDS spreads from tenor start onwards.'''
+        face_value = self._perc_dict["face_value"]
+        rr = self._reg_dict["rr"]
+        if start == 0:
+            self._df_risk_free = batch.bootstrap_discount_factors(self._perc_dict["risk_free"], face_value)
+            self._df_risky = batch.bootstrap_discount_factors(self._perc_dict["risky"], face_value)
+            n = self._df_risky.size
+            self._hazard_rates = np.empty(n)
+            self._survival = np.empty(n)
+            self._protection_sum = np.empty(n)
+            self._premium_sum = np.empty(n)
+            self._cds_spread = np.empty(n)
+        else:
+            # the discount factors are bootstrapped from the sum of the unchanged ones
+            self._df_risky = self._df_risky.copy()
+            self._df_risky[start:] = batch.bootstrap_discount_factors(self._perc_dict["risky"][start:], face_value,
+                                                                      self._df_risky[:start].sum())
+        # the values of the previous tenor, or of time 0 for the first tenor
+        df_risk_free_shift = self._df_risk_free[start - 1] if start > 0 else 1.0
+        df_risky_shift = self._df_risky[start - 1] if start > 0 else 1.0
+        survival_shift = self._survival[start - 1] if start > 0 else 1.0
+        protection_sum = self._protection_sum[start - 1] if start > 0 else 0.0
+        premium_sum = self._premium_sum[start - 1] if start > 0 else 0.0
+        df_risk_free = self._df_risk_free[start:]
+        df_risky = self._df_risky[start:]
+        df_risk_free_shift = np.concatenate([[df_risk_free_shift], df_risk_free[:-1]])
+        df_risky_shift = np.concatenate([[df_risky_shift], df_risky[:-1]])
         # expected_loss = 1.0 - df_risky / df_risk_free
-        hazard_rates = (1.0 - (df_risky / df_risky_shift) / (df_risk_free / df_risk_free_shift)) / (1.0 - self._reg_dict["rr"])
-        period_survival = 1.0 - hazard_rates
-        survival_prob = period_survival.cumprod()
-        survival_prob_shift = np.insert(survival_prob[:-1], 0, 1.0)
+        hazard_rates = (1.0 - (df_risky / df_risky_shift) / (df_risk_free / df_risk_free_shift)) / (1.0 - rr)
+        survival_prob = survival_shift * (1.0 - hazard_rates).cumprod()
+        survival_prob_shift = np.concatenate([[survival_shift], survival_prob[:-1]])
         temp1 = survival_prob_shift * hazard_rates * df_risk_free
         temp2 = survival_prob * df_risk_free
-        cds_spread_reg = []
-        for i in range(1, self._reg_dict["risk_free"].size + 1):
-            s = (1.0 - self._reg_dict["rr"]) * temp1[:i].sum() / (temp1[:i].sum() + temp2[:i].sum())
-            cds_spread_reg.append(s)
-        self._cds_spread = np.array(cds_spread_reg) * 100
-        return self._cds_spread
+        # running sums of the protection and premium terms over the tenors
+        protection = protection_sum + temp1.cumsum()
+        premium = premium_sum + temp2.cumsum()
+        self._hazard_rates[start:] = hazard_rates
+        self._survival[start:] = survival_prob
+        self._protection_sum[start:] = protection
+        self._premium_sum[start:] = premium
+        self._cds_spread = self._cds_spread.copy()
+        self._cds_spread[start:] = (1.0 - rr) * protection / (protection + premium) * 100
+
+
+class HazardCurve(object):
+    '''
+    A piecewise-constant hazard rate curve used to price CDS contracts with quarterly premium legs.
+
+    The hazard rate is constant between the curve points and flat extrapolated before the first
+    point. The log survival probabilities, the log discount factors and the cumulative protection
+    leg are cached on a fine time grid (which contains the curve points), so pricing a CDS only
+    interpolates the cached arrays. On each interval of the grid the protection leg is integrated
+    exactly for constant hazard and forward rates, as in the ISDA standard model.
+
+    Attributes
+    ----------
+    _tenors: np.array
+        The curve points (in years).
+    _hazard_rates: np.array
+        The hazard rate (regular quantity) up to each curve point.
+    _discount_curve: ZeroCurve
+        The risk free zero-coupon curve.
+    _rr: float
+        The recovery rate (regular quantity).
+    _grid: np.array
+        The time grid (in years) of the cached arrays.
+    _log_survival: np.array
+        The log survival probabilities on the grid.
+    _log_discount: np.array
+        The log discount factors on the grid.
+    _protection: np.array
+        The protection leg (per unit notional, before recovery) of a CDS maturing at each grid time.
+    _dt: np.array
+        The length of each interval of the grid.
+    _index: np.array
+        The curve point whose hazard rate applies on each interval of the grid.
+    _forward: np.array
+        The risk free forward rate on each interval of the grid.
+
+    Methods
+    -------
+    bootstrap(tenors, par_spreads_perc, discount_curve, rr_perc=40, frequency=4, grid_step=1/365)
+        Construct a HazardCurve which reprices par CDS spreads.
+    survival_probability(times)
+        Calculate the survival probabilities.
+    discount_factor(times)
+        Calculate the risk free discount factors.
+    price(maturity, coupon_perc, notional=1, frequency=4)
+        Calculate the legs, RPV01, par spread, upfront and mark-to-market of CDS contracts.
+    '''
+
+    def __init__(self, tenors, hazard_rates_perc, discount_curve, rr_perc=40, grid_step=1/365):
+        '''Constructor for HazardCurve.
+
+        Parameters
+        ----------
+        tenors: np.array
+            The curve points (in years), in increasing order.
+        hazard_rates_perc: np.array
+            The hazard rate (in percent) up to each curve point.
+        discount_curve: ZeroCurve
+            The risk free zero-coupon curve.
+        rr_perc: float, optional
+            The recovery rate (in percent). Default is 40.
+        grid_step: float, optional
+            The step (in years) of the time grid of the cached arrays. Default is 1/365.
+
+        Examples
+        --------
+        >>> discount_curve = ZeroCurve(np.array([1, 5, 10]), np.array([3.0, 3.0, 3.0]), "continuous")
+        >>> hazard_curve = HazardCurve(np.array([1, 3, 5]), np.array([1.0, 1.5, 2.0]), discount_curve)
+        '''
+        self._tenors = np.atleast_1d(np.asarray(tenors, dtype=float))
+        self._hazard_rates = np.atleast_1d(np.asarray(hazard_rates_perc, dtype=float)) * 0.01
+        assert self._tenors.shape == self._hazard_rates.shape
+        assert self._tenors[0] > 0 and (np.diff(self._tenors) > 0).all()
+        assert rr_perc >= 0 and rr_perc <= 100
+        self._discount_curve = discount_curve
+        self._rr = rr_perc * 0.01
+        grid = np.union1d(np.arange(0, self._tenors[-1], grid_step), np.append(self._tenors, 0.0))
+        self._grid = grid[grid <= self._tenors[-1]]
+        self._build_grid()
+
+    def _build_grid(self):
+        '''Calculate the cached arrays on the time grid.'''
+        grid = self._grid
+        self._dt = np.diff(grid)
+        # the curve point whose hazard rate applies on each interval of the grid
+        self._index = np.minimum(np.searchsorted(self._tenors, grid[:-1], side="right"), self._tenors.size - 1)
+        self._log_discount = np.log(self._discount_curve.discount_factor(grid))
+        self._forward = -np.diff(self._log_discount) / self._dt
+        self._log_survival = np.zeros(grid.size)
+        self._protection = np.zeros(grid.size)
+        self._build_segment(0, grid.size - 1)
+
+    def _build_segment(self, start, stop):
+        '''Recalculate the log survival probabilities and the protection leg on grid[start:stop + 1],
+        from their values at grid[start] and the current hazard rates.'''
+        dt = self._dt[start:stop]
+        hazard = self._hazard_rates[self._index[start:stop]]
+        log_survival = self._log_survival[start] - np.cumsum(hazard * dt)
+        # integral of hazard * Q(t) * DF(t) over each interval, with Q and DF exponential within it
+        rate = (hazard + self._forward[start:stop]) * dt
+        with np.errstate(divide="ignore", invalid="ignore"):
+            factor = np.where(np.abs(rate) > 1e-10, -np.expm1(-rate) / rate, 1 - rate / 2)
+        log_start = np.concatenate([[self._log_survival[start]], log_survival[:-1]])
+        integral = hazard * dt * factor * np.exp(log_start + self._log_discount[start:stop])
+        self._log_survival[start + 1:stop + 1] = log_survival
+        self._protection[start + 1:stop + 1] = self._protection[start] + np.cumsum(integral)
 
+    def _check_times(self, times):
+        times = np.asarray(times, dtype=float)
+        if (times > self._grid[-1] + 1e-12).any():
+            raise Exception("times should not be beyond the last curve point.")
+        return times
 
+    @classmethod
+    def bootstrap(cls, tenors, par_spreads_perc, discount_curve, rr_perc=40, frequency=4, grid_step=1/365):
+        '''Construct a HazardCurve which reprices par CDS spreads.
+
+        The hazard rate of each curve point is solved in turn, so that a CDS maturing at the curve
+        point with a coupon equal to its par spread has zero upfront.
+
+        Parameters
+        ----------
+        tenors: np.array
+            The maturities (in years) of the quoted CDS contracts, in increasing order.
+        par_spreads_perc: np.array
+            The par spread (in percent) of each quoted CDS contract.
+        discount_curve: ZeroCurve
+            The risk free zero-coupon curve.
+        rr_perc: float, optional
+            The recovery rate (in percent). Default is 40.
+        frequency: int, optional
+            Premium payment frequency. Default is 4.
+        grid_step: float, optional
+            The step (in years) of the time grid of the cached arrays. Default is 1/365.
+
+        Returns
+        -------
+        HazardCurve
+            The bootstrapped hazard curve.
+
+        Examples
+        --------
+        >>> hazard_curve = HazardCurve.bootstrap(np.array([1, 3, 5, 7, 10]),
+            np.array([0.6, 0.7, 0.8, 0.85, 0.9]), discount_curve)
+        >>> hazard_curve.price(np.array([1, 3, 5, 7, 10]), 1.0)["upfront"]
+        '''
+        tenors = np.atleast_1d(np.asarray(tenors, dtype=float))
+        par_spreads_perc = np.atleast_1d(np.asarray(par_spreads_perc, dtype=float))
+        assert tenors.shape == par_spreads_perc.shape
+        # the grid of the full curve, truncated at a curve point, is the grid of the curve up to that point.
+        # Solving the hazard rate of point i only recalculates the grid segment (tenors[i-1], tenors[i]].
+        curve = cls(tenors, np.zeros(tenors.size), discount_curve, rr_perc, grid_step)
+        ends = np.searchsorted(curve._grid, tenors)
+        with instrumentation.timer("cds.hazard_curve.bootstrap"):
+            for i in range(tenors.size):
+                start = ends[i - 1] if i > 0 else 0
+                def upfront(x):
+                    curve._hazard_rates[i] = x * 0.01
+                    curve._build_segment(start, ends[i])
+                    return curve.price(tenors[i], par_spreads_perc[i], frequency=frequency)["upfront"][0]
+                upfront(brentq(upfront, 0.0, 1000.0, xtol=1e-12))
+        return curve
+
+    def survival_probability(self, times):
+        '''Calculate the survival probabilities.
+
+        Parameters
+        ----------
+        times: np.array
+            The times (in years).
+
+        Returns
+        -------
+        np.array
+            The survival probability at each time.
+        '''
+        times = self._check_times(times)
+        # the log survival probability is linear between grid times
+        return np.exp(np.interp(times, self._grid, self._log_survival))
+
+    def discount_factor(self, times):
+        '''Calculate the risk free discount factors, interpolated from the grid.
+
+        Parameters
+        ----------
+        times: np.array
+            The times (in years).
+
+        Returns
+        -------
+        np.array
+            The discount factor at each time.
+        '''
+        times = self._check_times(times)
+        return np.exp(np.interp(times, self._grid, self._log_discount))
+
+    def price(self, maturity, coupon_perc, notional=1, frequency=4):
+        '''Calculate the legs, RPV01, par spread, upfront and mark-to-market of CDS contracts.
+
+        The premium is paid in arrears on the dates maturity - k / frequency, and the premium
+        accrued since the last premium date is paid on default. The first premium period starts on
+        the last premium date on or before today (time 0); the premium accrued since then is
+        subtracted from the risky annuity (clean RPV01).
+
+        Parameters
+        ----------
+        maturity: float or np.array
+            The remaining maturity (in years) of each CDS contract.
+        coupon_perc: float or np.array
+            The running coupon (in percent) of each CDS contract.
+        notional: float or np.array, optional
+            The notional of each contract, positive for bought protection and negative for sold
+            protection. Default is 1.
+        frequency: int, optional
+            Premium payment frequency. Default is 4.
+
+        Returns
+        -------
+        dict
+            A dictionary of numpy arrays with one element per contract and keys "protection_leg"
+            (per unit notional), "RPV01" (clean, per unit notional), "accrued" (year fraction since
+            the last premium date), "par_spread" (in percent), "upfront" (clean, in percent, paid by
+            the protection buyer) and "MTM" (value of the position to its holder).
+
+        Examples
+        --------
+        >>> hazard_curve.price(np.array([0.8, 2.3, 4.9]), 1.0, notional=1e6)["MTM"]
+        '''
+        maturity, coupon, notional = np.broadcast_arrays(np.atleast_1d(np.asarray(maturity, dtype=float)),
+                                                         np.asarray(coupon_perc, dtype=float) * 0.01,
+                                                         np.asarray(notional, dtype=float))
+        maturity = self._check_times(maturity)
+        assert (maturity > 0).all()
+        # premium periods (contracts x periods), counted back from maturity
+        nperiod = int(np.ceil(maturity.max() * frequency)) + 1
+        end = maturity[:, None] - np.arange(nperiod) / frequency
+        start = end - 1 / frequency
+        valid = end > 0
+        end = np.where(valid, end, 0.0)
+        effective_start = np.clip(start, 0.0, None)
+        survival_end = self.survival_probability(end)
+        survival_start = self.survival_probability(effective_start)
+        discount_end = self.discount_factor(end)
+        discount_mid = self.discount_factor((effective_start + end) / 2)
+        premium = np.where(valid, discount_end * survival_end / frequency, 0.0).sum(axis=1)
+        # on default the premium accrued since the start of the period is paid, on average half way
+        accrual_on_default = np.where(valid, ((effective_start + end) / 2 - start) * discount_mid *
+                                      (survival_start - survival_end), 0.0).sum(axis=1)
+        accrued = np.where(valid & (start < 0), -start, 0.0).sum(axis=1)
+        RPV01 = premium + accrual_on_default - accrued
+        protection_leg = (1 - self._rr) * np.interp(maturity, self._grid, self._protection)
+        upfront = protection_leg - coupon * RPV01
+        return {"protection_leg": protection_leg, "RPV01": RPV01, "accrued": accrued,
+                "par_spread": protection_leg / RPV01 * 100, "upfront": upfront * 100, "MTM": notional * upfront}
@@ -0,0 +1,326 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from fincomepy import batch
+from fincomepy.bond import Bond
+from fincomepy.repo import Repo
+from fincomepy.bondfuture import BondFuture
+from fincomepy.columnar import REQUIRED_COLUMNS, OPTIONAL_COLUMNS, OUTPUT_COLUMNS, price_columns
+
+def price_bond(row):
+    '''Calculate bond analytics for one position.'''
+    bond_obj = Bond(settlement=row["settlement"], maturity=row["maturity"], coupon_perc=row["coupon_perc"],
+        price_perc=row["price_perc"], frequency=int(row["frequency"]), basis=int(row["basis"]),
+        redemption=row["redemption"])
+    # mac_duration solves for the yield and caches it in _yld
+    mac_duration = bond_obj.mac_duration()
+    return {
+        "accrint": bond_obj._perc_dict["accrint"],
+        "dirty_price": bond_obj._perc_dict["dirty_price"],
+        "yld": bond_obj._yld,
+        "mac_duration": mac_duration,
+        "mod_duration": bond_obj.mod_duration(),
+        "DV01": bond_obj.DV01(),
+        "convexity": bond_obj.convexity(),
+    }
+
+
+def price_repo(row):
+    '''Calculate repo analytics for one position.'''
+    repo_obj = Repo(settlement=row["settlement"], maturity=row["maturity"], coupon_perc=row["coupon_perc"],
+        price_perc=row["price_perc"], frequency=int(row["frequency"]), basis=int(row["basis"]),
+        bond_face_value=row["bond_face_value"], repo_period=int(row["repo_period"]),
+        repo_rate_perc=row["repo_rate_perc"], type=row["type"])
+    # end_payment relies on start_payment, and break_even_yld relies on end_payment
+    start_payment = repo_obj.start_payment()
+    end_payment = repo_obj.end_payment()
+    return {
+        "accrint": repo_obj._perc_dict["accrint"],
+        "dirty_price": repo_obj._perc_dict["dirty_price"],
+        "repo_end_date": repo_obj._repo_end_date,
+        "start_payment": start_payment,
+        "end_payment": end_payment,
+        "break_even_yld": repo_obj.break_even_yld(),
+    }
+
+
+def price_future(row):
+    '''Calculate bond future analytics for one position.'''
+    bf_obj = BondFuture(settlement=row["settlement"], maturity=row["maturity"], coupon_perc=row["coupon_perc"],
+        price_perc=row["price_perc"], frequency=int(row["frequency"]), basis=int(row["basis"]),
+        repo_period=int(row["repo_period"]), repo_rate_perc=row["repo_rate_perc"],
+        futures_pr_perc=row["futures_pr_perc"], conversion_factor=row["conversion_factor"], type=row["type"])
+    return {
+        "accrint": bf_obj._perc_dict["accrint"],
+        "dirty_price": bf_obj._perc_dict["dirty_price"],
+        "repo_end_date": bf_obj._repo_end_date,
+        "forward_price": bf_obj.forward_price(),
+        "full_future_val": bf_obj.full_future_val(),
+        "net_basis": bf_obj.net_basis(),
+        "implied_repo_rate": bf_obj.implied_repo_rate(),
+    }
+
+
+PRICERS = {"bond": price_bond, "repo": price_repo, "future": price_future}
+
+
+def prepare_positions(df, kind):
+    '''Validate the input columns, fill optional columns and parse dates.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        A data frame which contains one position per row.
+    kind: str
+        The position type. It should be one of 'bond', 'repo' or 'future'.
+
+    Returns
+    -------
+    pd.DataFrame
+        A copy of the input data frame which is ready to be priced.
+    '''
+    if kind not in PRICERS:
+        raise Exception("kind should be one of " + ", ".join(PRICERS) + ".")
+    missing = [col for col in REQUIRED_COLUMNS[kind] if col not in df.columns]
+    if missing:
+        raise Exception("missing input columns: " + ", ".join(missing))
+    df = df.copy()
+    for col, default in OPTIONAL_COLUMNS[kind].items():
+        if col not in df.columns:
+            df[col] = default
+    for col in ["settlement", "maturity"]:
+        df[col] = pd.to_datetime(df[col]).dt.date
+    if not pd.api.types.is_numeric_dtype(df["price_perc"]):
+        # a column with quotes in 32nds is read as strings: decimal prices are converted into floats
+        # and the other strings are left to be parsed as quotes
+        price = df["price_perc"].astype(object)
+        numeric = pd.to_numeric(price, errors="coerce")
+        df["price_perc"] = price.where(numeric.isna() & price.notna(), numeric.astype(object))
+    return df
+
+
+def price_chunk(df, kind, engine="batch"):
+    '''Price every position in a data frame.
+
+    A position which cannot be priced gets NaN analytics and an error message in the
+    "error" column (e.g. "invalid price quote" for a price which cannot be parsed), so that one
+    bad row does not abort the whole file.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        A data frame returned by prepare_positions.
+    kind: str
+        The position type. It should be one of 'bond', 'repo' or 'future'.
+    engine: str, optional
+        Either "batch", which prices all positions at once with fincomepy.batch, or "objects",
+        which constructs one Bond, Repo or BondFuture object per position. Default is "batch".
+
+    Returns
+    -------
+    pd.DataFrame
+        The input data frame with one extra column per analytic and an "error" column.
+    '''
+    if engine == "batch":
+        columns = {col: df[col].to_numpy() for col in df.columns}
+        for col in ["settlement", "maturity"]:
+            columns[col] = columns[col].astype("datetime64[D]")
+        columns["price_perc"], valid = batch.parse_price(columns["price_perc"], return_valid=True)
+        res = pd.DataFrame(price_columns(columns, kind), index=df.index)
+        failed = res.select_dtypes(include="number").isna().any(axis=1)
+        res["error"] = np.where(~valid, "invalid price quote: " + df["price_perc"].astype(str),
+                                np.where(failed, "could not be priced", ""))
+        return pd.concat([df, res], axis=1)
+    if engine != "objects":
+        raise Exception("engine should be either 'batch' or 'objects'.")
+    pricer = PRICERS[kind]
+    results = []
+    errors = []
+    for row in df.to_dict("records"):
+        try:
+            results.append(pricer(row))
+            errors.append("")
+        except Exception as e:
+            results.append({col: np.nan for col in OUTPUT_COLUMNS[kind]})
+            errors.append(repr(e))
+    res = pd.DataFrame(results, columns=OUTPUT_COLUMNS[kind], index=df.index)
+    res["error"] = errors
+    return pd.concat([df, res], axis=1)
+
+
+def read_positions(path):
+    '''Read a CSV or Parquet position file into a data frame.'''
+    if path.endswith(".parquet") or path.endswith(".pq"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def write_results(df, path):
+    '''Write a data frame into a CSV or Parquet file based on the file extension.'''
+    if path.endswith(".parquet") or path.endswith(".pq"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+# describes the run which wrote a checkpoint directory, see _check_manifest
+MANIFEST = "manifest.json"
+
+
+def _chunk_path(checkpoint_dir, i, ext):
+    return os.path.join(checkpoint_dir, "chunk_{:06d}{}".format(i, ext))
+
+
+def _manifest(input_path, kind, chunksize, engine, ext):
+    '''Describe a run, so that a resumed run only reuses chunks priced from the same input.'''
+    stat = os.stat(input_path)
+    return {"input_path": os.path.abspath(input_path), "input_size": stat.st_size, "input_mtime_ns": stat.st_mtime_ns,
+            "kind": kind, "chunksize": chunksize, "engine": engine, "ext": ext}
+
+
+def _check_manifest(checkpoint_dir, manifest):
+    '''Write the manifest of a new checkpoint directory, or check that of a resumed one.'''
+    path = os.path.join(checkpoint_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as f:
+            previous = json.load(f)
+        changed = sorted(key for key in set(manifest) | set(previous) if previous.get(key) != manifest.get(key))
+        if changed:
+            raise Exception("cannot resume: the checkpoints in {} were written with a different {}.".format(
+                checkpoint_dir, ", ".join(changed)))
+        return
+    if any(name.startswith("chunk_") for name in os.listdir(checkpoint_dir)):
+        raise Exception("cannot resume: the checkpoints in {} have no manifest.".format(checkpoint_dir))
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+
+
+def _price_chunk_to_file(df, kind, engine, path):
+    # write to a temporary name first so that an interrupted run never leaves a partial chunk behind
+    res = price_chunk(df, kind, engine)
+    root, ext = os.path.splitext(path)
+    tmp_path = root + ".tmp" + ext
+    write_results(res, tmp_path)
+    os.replace(tmp_path, path)
+    return len(res)
+
+
+def run(input_path, output_path, kind, chunksize=10000, workers=None, resume=False,
+        checkpoint_dir=None, keep_checkpoints=False, progress=True, engine="batch"):
+    '''Price a position file chunk by chunk and write analytics to the output file.
+
+    Every priced chunk is written into the checkpoint directory. When resume is True, chunks
+    which already exist in the checkpoint directory are not priced again. The checkpoint directory
+    records the input file (path, size and modification time), kind, chunksize and engine of the
+    run, and resuming with any of them changed raises an exception instead of merging stale chunks.
+
+    Parameters
+    ----------
+    input_path: str
+        Path of the CSV or Parquet position file.
+    output_path: str
+        Path of the CSV or Parquet output file.
+    kind: str
+        The position type. It should be one of 'bond', 'repo' or 'future'.
+    chunksize: int, optional
+        Number of positions in one chunk. Default is 10000.
+    workers: int, optional
+        Number of worker processes. If it is 1, chunks are priced in the current process.
+        Default is None, which uses os.cpu_count().
+    resume: bool, optional
+        Whether to reuse chunks from a previous interrupted run. Default is False.
+    checkpoint_dir: str, optional
+        Directory used to store priced chunks. Default is output_path + ".checkpoint".
+    keep_checkpoints: bool, optional
+        Whether to keep the checkpoint directory after the output file is written. Default is False.
+    progress: bool, optional
+        Whether to report progress on stderr. Default is True.
+    engine: str, optional
+        Either "batch" or "objects", see price_chunk. Default is "batch".
+
+    Returns
+    -------
+    int
+        Number of positions written to the output file.
+    '''
+    if chunksize < 1:
+        raise Exception("chunksize should be a positive integer.")
+    positions = prepare_positions(read_positions(input_path), kind)
+    if checkpoint_dir is None:
+        checkpoint_dir = output_path + ".checkpoint"
+    if not resume and os.path.isdir(checkpoint_dir):
+        shutil.rmtree(checkpoint_dir)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    ext = ".parquet" if output_path.endswith((".parquet", ".pq")) else ".csv"
+    _check_manifest(checkpoint_dir, _manifest(input_path, kind, chunksize, engine, ext))
+    nchunk = (len(positions) + chunksize - 1) // chunksize
+    chunk_paths = [_chunk_path(checkpoint_dir, i, ext) for i in range(nchunk)]
+    todo = [i for i in range(nchunk) if not os.path.exists(chunk_paths[i])]
+    start = time.time()
+    done_rows = len(positions) - sum(min(chunksize, len(positions) - i * chunksize) for i in todo)
+
+    def report(ndone):
+        if progress:
+            sys.stderr.write("\rfincomepy-price: {}/{} chunks, {}/{} positions, {:.1f}s".format(
+                ndone, nchunk, done_rows, len(positions), time.time() - start))
+            sys.stderr.flush()
+
+    ndone = nchunk - len(todo)
+    report(ndone)
+    if workers == 1 or len(todo) <= 1:
+        for i in todo:
+            done_rows += _price_chunk_to_file(positions.iloc[i * chunksize:(i + 1) * chunksize], kind, engine,
+                                              chunk_paths[i])
+            ndone += 1
+            report(ndone)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_price_chunk_to_file, positions.iloc[i * chunksize:(i + 1) * chunksize],
+                                       kind, engine, chunk_paths[i]) for i in todo]
+            for future in as_completed(futures):
+                done_rows += future.result()
+                ndone += 1
+                report(ndone)
+    if progress:
+        sys.stderr.write("\n")
+    if nchunk:
+        res = pd.concat([read_positions(path) for path in chunk_paths], ignore_index=True)
+    else:
+        res = price_chunk(positions, kind, engine)
+    write_results(res, output_path)
+    if not keep_checkpoints:
+        shutil.rmtree(checkpoint_dir)
+    return len(res)
+
+
+def main(argv=None):
+    '''Entry point of the fincomepy-price console script.'''
+    parser = argparse.ArgumentParser(prog="fincomepy-price",
+        description="Price a bond, repo or bond future position file (CSV or Parquet).")
+    parser.add_argument("input", help="input position file (.csv or .parquet)")
+    parser.add_argument("output", help="output analytics file (.csv or .parquet)")
+    parser.add_argument("--type", dest="kind", choices=sorted(PRICERS), default="bond",
+        help="position type (default: bond)")
+    parser.add_argument("--chunksize", type=int, default=10000, help="positions per chunk (default: 10000)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument("--resume", action="store_true", help="reuse chunks priced by an interrupted run")
+    parser.add_argument("--checkpoint-dir", default=None, help="directory for priced chunks (default: OUTPUT.checkpoint)")
+    parser.add_argument("--keep-checkpoints", action="store_true", help="keep the checkpoint directory when done")
+    parser.add_argument("--engine", choices=["batch", "objects"], default="batch",
+        help="price all positions of a chunk at once (batch) or one object per position (default: batch)")
+    parser.add_argument("--quiet", action="store_true", help="do not report progress")
+    args = parser.parse_args(argv)
+    run(args.input, args.output, args.kind, chunksize=args.chunksize, workers=args.workers, resume=args.resume,
+        checkpoint_dir=args.checkpoint_dir, keep_checkpoints=args.keep_checkpoints, progress=not args.quiet,
+        engine=args.engine)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,198 @@
+'''
+Columnar (Apache Arrow / Parquet) input and output for batch analytics.
+
+Positions are read as columns, converted into NumPy arrays (without copying where the Arrow
+layout allows it), priced with the vectorized functions in fincomepy.batch, and written back as
+Arrow tables or Parquet files. pyarrow is an optional dependency which is only needed for the
+Arrow and Parquet functions; price_columns works on plain NumPy arrays.
+'''
+import numpy as np
+from fincomepy import batch
+
+# input columns of each position type, named after the constructor arguments
+REQUIRED_COLUMNS = {
+    "bond": ["settlement", "maturity", "coupon_perc", "price_perc", "frequency"],
+    "repo": ["settlement", "maturity", "coupon_perc", "price_perc", "frequency",
+             "bond_face_value", "repo_period", "repo_rate_perc"],
+    "future": ["settlement", "maturity", "coupon_perc", "price_perc", "frequency",
+               "repo_period", "repo_rate_perc", "futures_pr_perc", "conversion_factor"],
+}
+OPTIONAL_COLUMNS = {
+    "bond": {"basis": 1, "redemption": 100},
+    "repo": {"basis": 1, "type": "US"},
+    "future": {"basis": 1, "type": "US"},
+}
+OUTPUT_COLUMNS = {
+    "bond": ["accrint", "dirty_price", "yld", "mac_duration", "mod_duration", "DV01", "convexity"],
+    "repo": ["accrint", "dirty_price", "repo_end_date", "start_payment", "end_payment", "break_even_yld"],
+    "future": ["accrint", "dirty_price", "repo_end_date", "forward_price", "full_future_val",
+               "net_basis", "implied_repo_rate"],
+}
+ANALYTICS = {
+    "bond": batch.bond_analytics,
+    "repo": batch.repo_analytics,
+    "future": batch.future_analytics,
+}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("pyarrow is required for Arrow and Parquet support: pip install pyarrow")
+    return pyarrow
+
+
+def price_columns(columns, kind="bond"):
+    '''Price positions given as a dictionary of columns.
+
+    Parameters
+    ----------
+    columns: dict
+        A dictionary which maps column names to numpy arrays (one element per position).
+    kind: str, optional
+        The position type. It should be one of 'bond', 'repo' or 'future'. Default is 'bond'.
+
+    Returns
+    -------
+    dict
+        A dictionary which maps the names in OUTPUT_COLUMNS[kind] to numpy arrays.
+
+    Examples
+    --------
+    >>> res = price_columns({"settlement": np.array(["2020-07-15"], dtype="datetime64[D]"),
+            "maturity": np.array(["2030-05-15"], dtype="datetime64[D]"), "coupon_perc": np.array([0.625]),
+            "price_perc": np.array([100.015625]), "frequency": np.array([2])})
+    >>> res["yld"]
+    array([0.62334818])
+    '''
+    if kind not in ANALYTICS:
+        raise Exception("kind should be one of " + ", ".join(ANALYTICS) + ".")
+    missing = [col for col in REQUIRED_COLUMNS[kind] if col not in columns]
+    if missing:
+        raise Exception("missing input columns: " + ", ".join(missing))
+    kwargs = {col: columns[col] for col in REQUIRED_COLUMNS[kind]}
+    for col, default in OPTIONAL_COLUMNS[kind].items():
+        kwargs[col] = columns[col] if col in columns else default
+    res = ANALYTICS[kind](**kwargs)
+    return {col: res[col] for col in OUTPUT_COLUMNS[kind]}
+
+
+def column_to_numpy(column):
+    '''Convert an Arrow array or chunked array into a numpy array.
+
+    Numeric columns without nulls in a single chunk are returned as zero-copy views of the Arrow
+    buffers. Date and timestamp columns are converted into datetime64[D].
+    '''
+    pa = _import_pyarrow()
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+    if pa.types.is_date32(column.type) and column.null_count == 0:
+        # date32 stores days since epoch as int32; widening to datetime64[D] is the only copy
+        return column.view(pa.int32()).to_numpy(zero_copy_only=True).astype("datetime64[D]")
+    if pa.types.is_date(column.type) or pa.types.is_timestamp(column.type):
+        return column.to_numpy(zero_copy_only=False).astype("datetime64[D]")
+    if (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)) and column.null_count == 0:
+        return column.to_numpy(zero_copy_only=True)
+    return column.to_numpy(zero_copy_only=False)
+
+
+def table_to_columns(table, columns=None):
+    '''Convert an Arrow table (or record batch) into a dictionary of numpy arrays.
+
+    Parameters
+    ----------
+    table: pyarrow.Table or pyarrow.RecordBatch
+        The input table.
+    columns: list, optional
+        Names of the columns to convert. Default is None, which converts all columns.
+
+    Returns
+    -------
+    dict
+        A dictionary which maps column names to numpy arrays.
+    '''
+    if columns is None:
+        columns = table.schema.names
+    return {col: column_to_numpy(table.column(col)) for col in columns}
+
+
+def columns_to_table(columns):
+    '''Convert a dictionary of numpy arrays into an Arrow table.
+
+    Float and integer columns are wrapped without copying. datetime64[D] columns become date32.
+    '''
+    pa = _import_pyarrow()
+    arrays = {}
+    for col, values in columns.items():
+        values = np.asarray(values)
+        if values.dtype.kind == "M":
+            arrays[col] = pa.array(values.astype("datetime64[D]"), type=pa.date32())
+        else:
+            arrays[col] = pa.array(values)
+    return pa.table(arrays)
+
+
+def price_table(table, kind="bond"):
+    '''Price the positions in an Arrow table.
+
+    Parameters
+    ----------
+    table: pyarrow.Table or pyarrow.RecordBatch
+        A table which contains one position per row.
+    kind: str, optional
+        The position type. It should be one of 'bond', 'repo' or 'future'. Default is 'bond'.
+
+    Returns
+    -------
+    pyarrow.Table
+        The input table with one extra column per analytic.
+    '''
+    pa = _import_pyarrow()
+    names = [col for col in REQUIRED_COLUMNS[kind] + list(OPTIONAL_COLUMNS[kind]) if col in table.schema.names]
+    res = columns_to_table(price_columns(table_to_columns(table, names), kind))
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+    for col in res.column_names:
+        table = table.append_column(col, res.column(col))
+    return table
+
+
+def price_parquet(input_path, output_path, kind="bond", batch_size=1000000):
+    '''Price a Parquet position file and write a Parquet analytics file.
+
+    The input file is streamed in record batches, so memory use is bounded by batch_size
+    regardless of the number of positions in the file.
+
+    Parameters
+    ----------
+    input_path: str
+        Path of the input Parquet file.
+    output_path: str
+        Path of the output Parquet file.
+    kind: str, optional
+        The position type. It should be one of 'bond', 'repo' or 'future'. Default is 'bond'.
+    batch_size: int, optional
+        Maximum number of positions in one record batch. Default is 1000000.
+
+    Returns
+    -------
+    int
+        Number of positions written to the output file.
+    '''
+    pa = _import_pyarrow()
+    parquet_file = pa.parquet.ParquetFile(input_path)
+    writer = None
+    nrow = 0
+    try:
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+            res = price_table(record_batch, kind)
+            if writer is None:
+                writer = pa.parquet.ParquetWriter(output_path, res.schema)
+            writer.write_table(res)
+            nrow += res.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return nrow
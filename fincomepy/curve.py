@@ -0,0 +1,124 @@
+import numpy as np
+
+# key rate tenors (in years) used by Bond.key_rate_DV01
+KEY_TENORS = (2, 5, 10, 30)
+
+
+class ZeroCurve(object):
+    '''
+    A zero-coupon curve. Zero rates between the curve points are linearly interpolated, and zero
+    rates outside the curve are flat extrapolated.
+
+    Attributes
+    ----------
+    _maturity: np.array
+        A numpy array which contains the maturity of each curve point (in years).
+    _zero_rates: np.array
+        A numpy array which contains the zero-coupon rate of each curve point (regular quantity).
+    _compound: str
+        A string that is either "discrete" or "continuous". It specifies the compounding of the
+        zero-coupon rates.
+
+    Methods
+    -------
+    from_zspread(zspread_obj)
+        Construct a ZeroCurve from a ZspreadZero or ZspreadPar object.
+    zero_rates(times)
+        Interpolate the zero-coupon rates (regular quantity).
+    discount_factor(times)
+        Calculate the discount factors.
+    discount_factor_derivative(times)
+        Calculate the derivative of the discount factors with respect to the zero-coupon rates.
+    key_rate_weights(times, key_tenors)
+        Calculate the key rate weights of each time.
+    '''
+
+    def __init__(self, maturity, zero_rates_perc, compound="discrete"):
+        '''Constructor for ZeroCurve.
+
+        Parameters
+        ----------
+        maturity : np.array
+            A numpy array which contains the maturity of each curve point (in years), in increasing order.
+        zero_rates_perc : np.array
+            Zero-coupon rates (in percent).
+        compound : str, optional
+            A string that is either "discrete" or "continuous". Default is "discrete".
+
+        Examples
+        --------
+        >>> curve = ZeroCurve(np.array([1, 2, 5, 10, 30]), np.array([0.15, 0.2, 0.4, 0.7, 1.3]))
+        '''
+        if compound not in ["discrete", "continuous"]:
+            raise Exception(r"compound should be either 'discrete' or 'continuous' ")
+        self._maturity = np.asarray(maturity, dtype=float)
+        self._zero_rates = np.asarray(zero_rates_perc, dtype=float) * 0.01
+        assert self._maturity.shape == self._zero_rates.shape
+        assert (np.diff(self._maturity) > 0).all()
+        self._compound = compound
+
+    @classmethod
+    def from_zspread(cls, zspread_obj):
+        '''Construct a ZeroCurve from the zero-coupon rates of a ZspreadZero or ZspreadPar object.
+
+        For a ZspreadPar object the zero-coupon rates are bootstrapped first if necessary.
+
+        Examples
+        --------
+        >>> coupon_cf = np.array([3.0, 3.0, 3.0, 3.0, 103.0])
+        >>> par_rates = np.array([1.00, 1.50, 1.80, 2.05, 2.20])
+        >>> curve = ZeroCurve.from_zspread(ZspreadPar(par_rates, coupon_cf))
+        '''
+        if "zero_rates" not in zspread_obj._perc_dict:
+            zspread_obj.get_zspread()
+        compound = getattr(zspread_obj, "_compound", "discrete")
+        return cls(zspread_obj._maturity, zspread_obj._perc_dict["zero_rates"], compound)
+
+    def zero_rates(self, times):
+        '''Interpolate the zero-coupon rates (regular quantity) at times (in years).'''
+        return np.interp(times, self._maturity, self._zero_rates)
+
+    def discount_factor(self, times):
+        '''Calculate the discount factors at times (in years).'''
+        times = np.asarray(times, dtype=float)
+        zero_rates = self.zero_rates(times)
+        if self._compound == "discrete":
+            return (1 + zero_rates) ** (-times)
+        return np.exp(-zero_rates * times)
+
+    def discount_factor_derivative(self, times):
+        '''Calculate the derivative of the discount factors at times (in years) with respect to
+        the zero-coupon rates at the same times.'''
+        times = np.asarray(times, dtype=float)
+        zero_rates = self.zero_rates(times)
+        if self._compound == "discrete":
+            return -times * (1 + zero_rates) ** (-times - 1)
+        return -times * np.exp(-zero_rates * times)
+
+    @staticmethod
+    def key_rate_weights(times, key_tenors=KEY_TENORS):
+        '''Calculate the key rate weights of each time.
+
+        A shift of the key rate at key_tenors[k] moves the zero-coupon rate at time t by
+        weights[t, k] times the shift. The weights are triangular: 1 at the key tenor, falling
+        linearly to 0 at the neighbouring key tenors, and flat before the first and after the last
+        key tenor. The weights of every time sum to 1, so shifting all key rates together is a
+        parallel shift.
+
+        Parameters
+        ----------
+        times : np.array
+            Times (in years).
+        key_tenors : tuple, optional
+            Key rate tenors (in years), in increasing order. Default is (2, 5, 10, 30).
+
+        Returns
+        -------
+        np.array
+            A (len(times), len(key_tenors)) array.
+        '''
+        times = np.asarray(times, dtype=float)
+        key_tenors = np.asarray(key_tenors, dtype=float)
+        assert (np.diff(key_tenors) > 0).all()
+        identity = np.eye(key_tenors.size)
+        return np.stack([np.interp(times, key_tenors, identity[k]) for k in range(key_tenors.size)], axis=-1)
@@ -1,51 +1,104 @@
+from collections.abc import MutableMapping
 import numpy as np
+from fincomepy import instrumentation
+
+# multiplier which converts a quantity stored in one unit into the other unit
+_CONVERSION = {("perc", "reg"): 0.01, ("reg", "perc"): 100}
+
+
+class UnitView(MutableMapping):
+    '''
+    A dictionary-like view of the quantities of a FixedIncome object in one unit.
+
+    Every quantity is stored once, in the unit it was assigned in. Reading it through the view
+    of the other unit converts it on first access and caches the converted value until the
+    quantity is assigned again.
+
+    Attributes
+    ----------
+    _store : dict
+        The store shared by the regular and the percent views. It maps each key to a list
+        [value, unit, converted value or None].
+    _unit : str
+        Either "reg" or "perc".
+    '''
+
+    __slots__ = ("_store", "_unit")
+
+    def __init__(self, store, unit):
+        self._store = store
+        self._unit = unit
+
+    def __getitem__(self, key):
+        entry = self._store[key]
+        if entry[1] == self._unit:
+            return entry[0]
+        if entry[2] is None:
+            entry[2] = entry[0] * _CONVERSION[(entry[1], self._unit)]
+        return entry[2]
+
+    def __setitem__(self, key, value):
+        self._store[key] = [value, self._unit, None]
+
+    def __delitem__(self, key):
+        del self._store[key]
+
+    def __contains__(self, key):
+        return key in self._store
+
+    def __iter__(self):
+        return iter(self._store)
+
+    def __len__(self):
+        return len(self._store)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
 
 class FixedIncome(object):
     '''
-    A class used to represent general fixed income products. Used as a base class for other 
+    A class used to represent general fixed income products. Used as a base class for other
     classes to inherit from.
 
     Attributes
     ----------
-    _reg_dict : dict
-        A dictionary which contains the regular quantities. The keys of _reg_dict should be the
-        same as that of _perc_dict
-    _perc_dict : dict
-        A dictionary which contains the quantities in percent. The keys of _perc_dict should be the
-        same as that of _reg_dict
+    debug : bool
+        A class-level flag. If True, update_dict checks that _reg_dict and _perc_dict are
+        consistent. Default is False.
+    _reg_dict : UnitView
+        A dictionary-like view which contains the regular quantities. The keys of _reg_dict are
+        the same as that of _perc_dict.
+    _perc_dict : UnitView
+        A dictionary-like view which contains the quantities in percent. The keys of _perc_dict
+        are the same as that of _reg_dict.
 
     Methods
     -------
     update_dict()
-        Update both _reg_dict and _perc_dict.
+        Check that _reg_dict and _perc_dict are consistent when debug is True.
     '''
-    
+
+    debug = False
+
     def __init__(self):
-        self._reg_dict = {}
-        self._perc_dict = {}
-    
+        store = {}
+        self._reg_dict = UnitView(store, "reg")
+        self._perc_dict = UnitView(store, "perc")
+
     def update_dict(self):
         '''
-        Update both _reg_dict and _perc_dict.
+        Check that _reg_dict and _perc_dict are consistent when debug is True.
 
-        This function updates _reg_dict and _perc_dict by making them have the same keys. The values
-        in both dictionaries are updated such that for each key, the value in _reg_dict is equal to 
-        0.01 times the value in _perc_dict. 
+        _reg_dict and _perc_dict share one store, so they always have the same keys, and for each
+        key the value in _reg_dict is equal to 0.01 times the value in _perc_dict. Nothing has to
+        be synchronized, and this function returns immediately unless FixedIncome.debug is True.
         '''
-        # update keys and values in _reg_dict
-        for key, value in self._reg_dict.items():
-            if key not in self._perc_dict.keys():
-                self._perc_dict[key] = value * 100
-        
-        # update keys and values in _perc_dict
-        for key, value in self._perc_dict.items():
-            if key not in self._reg_dict.keys():
-                self._reg_dict[key] = value * 0.01
-        
-        # make sure the values in two dictionaries matches
+        instrumentation.count("fixedincome.update_dict")
+        if not FixedIncome.debug:
+            return
         for key, value in self._perc_dict.items():
             if isinstance(value, np.ndarray):
-                assert (self._reg_dict[key] == value * 0.01).all()
+                assert np.allclose(self._reg_dict[key], value * 0.01, rtol=1e-15, atol=0)
             else:
-                assert self._reg_dict[key] == value * 0.01
-
+                assert abs(self._reg_dict[key] - value * 0.01) <= 1e-15 * abs(value * 0.01)
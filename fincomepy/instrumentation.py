@@ -0,0 +1,177 @@
+'''
+Opt-in counters and timers for the hot paths of fincomepy.
+
+Instrumentation is disabled by default. When it is disabled, every hook returns after checking one
+module-level flag, so the instrumented functions run at practically full speed. Enable it with
+enable() or by setting the environment variable FINCOMEPY_INSTRUMENTATION=1 before importing
+fincomepy.
+
+Examples
+--------
+>>> from fincomepy import instrumentation
+>>> instrumentation.enable()
+>>> Bond.yld(settlement=date(2020,7,15), maturity=date(2030,5,15), rate=0.625,
+    pr=100.015625, redemption=100, frequency=2, basis=1)
+>>> instrumentation.stats()["counters"]["bond.yld.nfev"]
+9
+>>> print(instrumentation.to_prometheus())
+'''
+import functools
+import os
+import re
+import sys
+import threading
+import time
+
+_enabled = os.environ.get("FINCOMEPY_INSTRUMENTATION", "") not in ("", "0")
+_lock = threading.Lock()
+_counters = {}
+# name -> [number of observations, total seconds, maximum seconds]
+_timers = {}
+
+
+def enable():
+    '''Enable instrumentation.'''
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    '''Disable instrumentation. Collected statistics are kept until reset() is called.'''
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    '''Return whether instrumentation is enabled.'''
+    return _enabled
+
+
+def reset():
+    '''Discard all collected statistics.'''
+    with _lock:
+        _counters.clear()
+        _timers.clear()
+
+
+def count(name, value=1):
+    '''Add value to the counter called name.'''
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name, seconds):
+    '''Record one observation of the timer called name.'''
+    if not _enabled:
+        return
+    with _lock:
+        timer = _timers.get(name)
+        if timer is None:
+            _timers[name] = [1, seconds, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            if seconds > timer[2]:
+                timer[2] = seconds
+
+
+class timer(object):
+    '''A context manager which records the time spent in its block under name.
+
+    Examples
+    --------
+    >>> with instrumentation.timer("my_block"):
+            ...
+    '''
+
+    __slots__ = ("_name", "_start")
+
+    def __init__(self, name):
+        self._name = name
+        self._start = None
+
+    def __enter__(self):
+        if _enabled:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._start is not None:
+            observe(self._name, time.perf_counter() - self._start)
+        return False
+
+
+def instrument(name):
+    '''A decorator which times every call of the decorated function under name.'''
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def stats():
+    '''Return a snapshot of the collected statistics.
+
+    Returns
+    -------
+    dict
+        {"counters": {name: value}, "timers": {name: {"count": int, "total": float, "max": float}}},
+        where times are in seconds.
+    '''
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "timers": {name: {"count": t[0], "total": t[1], "max": t[2]} for name, t in _timers.items()},
+        }
+
+
+def dump_stats(file=None):
+    '''Write the collected statistics as a human readable table (default: sys.stdout).'''
+    file = sys.stdout if file is None else file
+    snapshot = stats()
+    for name, value in sorted(snapshot["counters"].items()):
+        file.write("{:<40s} {:>14}\n".format(name, value))
+    for name, t in sorted(snapshot["timers"].items()):
+        file.write("{:<40s} {:>14} calls {:>12.6f}s total {:>10.6f}s max\n".format(
+            name, t["count"], t["total"], t["max"]))
+
+
+def _metric_name(prefix, name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", prefix + "_" + name)
+
+
+def to_prometheus(prefix="fincomepy"):
+    '''Export the collected statistics in the Prometheus text exposition format.
+
+    Counters become "<prefix>_<name>_total" counters. Timers become "<prefix>_<name>_seconds"
+    summaries (with _count and _sum series) plus a "<prefix>_<name>_seconds_max" gauge.
+
+    Returns
+    -------
+    str
+        The metrics in Prometheus text format.
+    '''
+    snapshot = stats()
+    lines = []
+    for name, value in sorted(snapshot["counters"].items()):
+        metric = _metric_name(prefix, name) + "_total"
+        lines.append("# TYPE {} counter".format(metric))
+        lines.append("{} {}".format(metric, value))
+    for name, t in sorted(snapshot["timers"].items()):
+        metric = _metric_name(prefix, name) + "_seconds"
+        lines.append("# TYPE {} summary".format(metric))
+        lines.append("{}_count {}".format(metric, t["count"]))
+        lines.append("{}_sum {!r}".format(metric, t["total"]))
+        lines.append("# TYPE {}_max gauge".format(metric))
+        lines.append("{}_max {!r}".format(metric, t["max"]))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,194 @@
+'''
+Process-pool parallel map over columnar inputs.
+
+pmap splits the rows of a dictionary of NumPy columns into chunks and calls a function on each
+chunk in a pool of worker processes. The input columns and the output arrays live in shared
+memory (multiprocessing.shared_memory): every worker reads its rows of the inputs and writes its
+rows of the outputs in place, so only the names of the shared memory blocks and the row range of
+each chunk are pickled.
+
+tmap does the same with a pool of threads in the current process. It needs no shared memory and
+suits the fincomepy.batch kernels, which are thread-safe and release the GIL in their NumPy
+operations, e.g. inside a multi-threaded server.
+
+Any function which takes columns as keyword arguments and returns one array, or a dictionary of
+arrays, with one element per row can be mapped, e.g. fincomepy.batch.bond_analytics.
+'''
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+
+def _as_column(values):
+    '''Convert a column into an array with a fixed-size dtype, which can be put in shared memory.'''
+    values = np.asarray(values)
+    if values.dtype.kind == "O":
+        values = np.asarray(values.tolist())
+        if values.dtype.kind == "O":
+            raise Exception("object columns cannot be shared between processes.")
+    return values
+
+
+class _SharedArrays(object):
+    '''A set of numpy arrays, each backed by one shared memory block.'''
+
+    def __init__(self):
+        self._blocks = []
+        self.arrays = {}
+        self.specs = {}
+
+    def create(self, name, shape, dtype):
+        dtype = np.dtype(dtype)
+        block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self._blocks.append(block)
+        self.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        self.specs[name] = (block.name, shape, dtype.str)
+        return self.arrays[name]
+
+    def close(self):
+        self.arrays = {}
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+
+def _attach(specs):
+    blocks, arrays = [], {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return blocks, arrays
+
+
+def _run_chunk(func, input_specs, output_specs, start, stop, kwargs):
+    '''Run func on rows [start, stop) of the shared inputs and write the shared outputs.'''
+    blocks, inputs = _attach(input_specs)
+    out_blocks, outputs = _attach(output_specs)
+    res = None
+    try:
+        res = func(**{name: values[start:stop] for name, values in inputs.items()}, **kwargs)
+        if not isinstance(res, dict):
+            res = {None: res}
+        for name, values in outputs.items():
+            values[start:stop] = res[name]
+    finally:
+        # drop the views before closing the blocks they point to
+        del inputs, outputs, res
+        for block in blocks + out_blocks:
+            block.close()
+
+
+def _check_columns(columns):
+    lengths = {values.shape[0] if values.ndim > 0 else None for values in columns.values()}
+    if len(lengths) != 1 or None in lengths:
+        raise Exception("columns should be arrays with the same length.")
+    return lengths.pop()
+
+
+def pmap(func, columns, workers=None, chunksize=None, **kwargs):
+    '''Apply func to chunks of rows of columns in parallel.
+
+    Parameters
+    ----------
+    func: callable
+        A module-level function (it is pickled by reference), which takes the columns as keyword
+        arguments and returns an array, or a dictionary of arrays, with one element per row.
+    columns: dict
+        A dictionary which maps argument names to arrays of the same length (one element per row).
+    workers: int, optional
+        Number of worker processes. Default is None, which uses all cores. With 1 worker, func is
+        called in the current process.
+    chunksize: int, optional
+        Number of rows per chunk. Default is None, which makes four chunks per worker.
+    **kwargs: optional
+        Arguments passed to every call of func unchanged (e.g. scalars).
+
+    Returns
+    -------
+    np.array or dict
+        The outputs of func for all rows, in the order of the rows.
+
+    Examples
+    --------
+    >>> from fincomepy import batch
+    >>> res = pmap(batch.bond_analytics, {"settlement": settlement, "maturity": maturity,
+            "coupon_perc": coupon_perc, "price_perc": price_perc}, frequency=2, workers=8)
+    >>> res["mod_duration"]
+    '''
+    columns = {name: _as_column(values) for name, values in columns.items()}
+    nrow = _check_columns(columns)
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, math.ceil(nrow / (4 * workers)))
+    if workers == 1 or nrow <= chunksize:
+        return func(**columns, **kwargs)
+    # call func on the first row to find the names, dtypes and shapes of the outputs
+    probe = func(**{name: values[:1] for name, values in columns.items()}, **kwargs)
+    is_dict = isinstance(probe, dict)
+    if not is_dict:
+        probe = {None: probe}
+    inputs, outputs = _SharedArrays(), _SharedArrays()
+    try:
+        for name, values in columns.items():
+            inputs.create(name, values.shape, values.dtype)[...] = values
+        for name, values in probe.items():
+            values = np.asarray(values)
+            outputs.create(name, (nrow,) + values.shape[1:], values.dtype)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_chunk, func, inputs.specs, outputs.specs, start,
+                                       min(start + chunksize, nrow), kwargs) for start in range(0, nrow, chunksize)]
+            for future in futures:
+                future.result()
+        res = {name: values.copy() for name, values in outputs.arrays.items()}
+    finally:
+        inputs.close()
+        outputs.close()
+    return res if is_dict else res[None]
+
+
+def tmap(func, columns, threads=None, chunksize=None, **kwargs):
+    '''Apply func to chunks of rows of columns in a pool of threads.
+
+    func must be thread-safe, e.g. one of the fincomepy.batch functions. The chunks run
+    concurrently as far as func releases the GIL, which the NumPy operations of fincomepy.batch do.
+
+    Parameters
+    ----------
+    func: callable
+        A function which takes the columns as keyword arguments and returns an array, or a
+        dictionary of arrays, with one element per row.
+    columns: dict
+        A dictionary which maps argument names to arrays of the same length (one element per row).
+    threads: int, optional
+        Number of threads. Default is None, which uses one thread per core.
+    chunksize: int, optional
+        Number of rows per chunk. Default is None, which makes one chunk per thread.
+    **kwargs: optional
+        Arguments passed to every call of func unchanged (e.g. scalars).
+
+    Returns
+    -------
+    np.array or dict
+        The outputs of func for all rows, in the order of the rows.
+
+    Examples
+    --------
+    >>> res = tmap(batch.bond_analytics, columns, threads=4, frequency=2)
+    '''
+    columns = {name: np.asarray(values) for name, values in columns.items()}
+    nrow = _check_columns(columns)
+    threads = threads or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, math.ceil(nrow / threads))
+    if threads == 1 or nrow <= chunksize:
+        return func(**columns, **kwargs)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        chunks = list(executor.map(lambda start: func(**{name: values[start:start + chunksize]
+            for name, values in columns.items()}, **kwargs), range(0, nrow, chunksize)))
+    if isinstance(chunks[0], dict):
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+    return np.concatenate(chunks)
@@ -0,0 +1,312 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from fincomepy.bond import Bond
+from fincomepy.record import BondBook
+from fincomepy import batch
+from fincomepy.cashflows import CashFlows
+
+# per-cash-flow quantities kept for every position, see Portfolio._project
+MEASURES = ("CF", "PV", "DV01", "convexity")
+# per-cash-flow matrices: the measures, plus the time of each cash flow in coupon periods
+MATRICES = MEASURES + ("periods",)
+
+
+class Portfolio(object):
+    '''
+    A portfolio of bond positions whose cash flows are projected onto a shared date grid.
+
+    For each measure in MEASURES the portfolio keeps a sparse (positions x dates) matrix, whose
+    row i holds the per-unit-face quantities of position i on its cash flow dates:
+
+    CF: the cash flow (regular quantity).
+    PV: the cash flow discounted at the yield of the bond.
+    DV01: the derivative of PV with respect to the yield (with the sign flipped), so that the row
+        sum is Bond.DV01().
+    convexity: the contribution of the cash flow to Bond.convexity() times the dirty price.
+
+    The notional-weighted column sums of these matrices (the ladders) are kept up to date when
+    positions are added or removed, so the aggregates never have to be recomputed from scratch.
+
+    Attributes
+    ----------
+    _names: list
+        The name of each position, in row order.
+    _notionals: np.array
+        The face value of each position.
+    _dates: np.array
+        The date grid (sorted datetime64[D] array) shared by all positions.
+    _yld: np.array
+        The yield (in percent) of each position.
+    _frequency: np.array
+        The coupon payment frequency of each position.
+    _matrices: dict
+        A dictionary which maps each measure, and "periods" (the time from settlement to each cash
+        flow in coupon periods), to a scipy.sparse.csr_matrix of shape
+        (number of positions, number of dates).
+    _ladders: dict
+        A dictionary which maps each measure to a numpy array with the notional-weighted sum of
+        each column of the corresponding matrix.
+
+    Methods
+    -------
+    add(instruments, notionals, names=None)
+        Add positions to the portfolio.
+    remove(names)
+        Remove positions from the portfolio.
+    cash_flows()
+        Get the cash flows per unit face value of the positions as a CashFlows container.
+    cf_matrix()
+        Get the sparse cash flow matrix.
+    PV()
+        Calculate the present value of the portfolio.
+    DV01()
+        Calculate the DV01 of the portfolio.
+    convexity()
+        Calculate the convexity of the portfolio.
+    ladder(measure="CF")
+        Get the notional-weighted ladder of a measure over the date grid.
+    '''
+
+    def __init__(self, instruments=None, notionals=None, names=None):
+        '''Constructor for Portfolio.
+
+        Parameters
+        ----------
+        instruments: Bond, list of Bond, or BondBook, optional
+            The bonds of the initial positions. Default is None (an empty portfolio).
+        notionals: float or np.array, optional
+            The face value of each position.
+        names: list, optional
+            The name of each position. Default is None, which numbers the positions 0, 1, 2, ...
+
+        Examples
+        --------
+        >>> bond1 = Bond(settlement=date(2020,7,15), maturity=date(2030,5,15),
+            coupon_perc=0.625, price_perc=100.015625, frequency=2, basis=1)
+        >>> bond2 = Bond(settlement=date(2020,7,15), maturity=date(2025,6,30),
+            coupon_perc=0.25, price_perc=99.8125, frequency=2, basis=1)
+        >>> portfolio = Portfolio([bond1, bond2], notionals=[1e6, 2e6])
+        '''
+        self._names = []
+        self._notionals = np.empty(0)
+        self._yld = np.empty(0)
+        self._frequency = np.empty(0, dtype=np.int64)
+        self._dates = np.empty(0, dtype="datetime64[D]")
+        self._matrices = {key: sparse.csr_matrix((0, 0)) for key in MATRICES}
+        self._ladders = {measure: np.empty(0) for measure in MEASURES}
+        self._next_name = 0
+        if instruments is not None:
+            self.add(instruments, notionals, names)
+
+    def __len__(self):
+        return len(self._names)
+
+    @property
+    def names(self):
+        return list(self._names)
+
+    @staticmethod
+    def _columns(instruments):
+        '''Extract the bond terms of instruments as arrays.'''
+        if isinstance(instruments, BondBook):
+            data = instruments._data
+            return (data["settlement"], data["maturity"], data["coupon"] * 100, data["clean_price"] * 100,
+                    data["frequency"], data["basis"], data["redemption"] * 100, np.full(data.size, np.nan))
+        if isinstance(instruments, Bond):
+            instruments = [instruments]
+        for bond in instruments:
+            if not isinstance(bond, Bond):
+                raise Exception("instruments should be a Bond, a list of Bond objects, or a BondBook.")
+        return (batch.as_dates([bond._settlement for bond in instruments]),
+                batch.as_dates([bond._maturity for bond in instruments]),
+                np.array([bond._perc_dict["coupon"] for bond in instruments], dtype=float),
+                np.array([bond._perc_dict["clean_price"] for bond in instruments], dtype=float),
+                np.array([bond._frequency for bond in instruments]),
+                np.array([bond._basis for bond in instruments]),
+                np.array([bond._redemption for bond in instruments], dtype=float),
+                np.array([np.nan if bond._yld is None else bond._yld for bond in instruments], dtype=float))
+
+    @staticmethod
+    def _project(settlement, maturity, coupon_perc, price_perc, frequency, basis, redemption, yld_perc):
+        '''Project the cash flows of many bonds at once.
+
+        Returns
+        -------
+        tuple
+            (indptr, dates, values, yld_perc), where the cash flows of bond i are
+            dates[indptr[i]:indptr[i+1]] in increasing order, values maps each key of MATRICES to
+            an array aligned with dates, and yld_perc contains the yield of each bond.
+        '''
+        frequency = np.asarray(frequency, dtype=np.int64)
+        pcd, ncd, nperiod = batch.schedule(settlement, maturity, frequency)
+        if (nperiod == 0).any():
+            raise Exception("settlement should be earlier than maturity.")
+        fp = batch.first_period(pcd, ncd, settlement, frequency, basis)
+        solve = np.isnan(yld_perc)
+        if solve.any():
+            dirty_price = price_perc + batch.accrint(pcd, ncd, settlement, coupon_perc, frequency, basis)
+            yld_perc = yld_perc.copy()
+            yld_perc[solve] = batch._yld_from_schedule(fp[solve], nperiod[solve], coupon_perc[solve],
+                redemption[solve], frequency[solve], dirty_price[solve])
+            if np.isnan(yld_perc).any():
+                raise Exception("the yield of a bond could not be calculated.")
+        cash_flows = batch.cash_flows_from_schedule(fp, nperiod, coupon_perc, redemption, frequency, maturity)
+        indptr, dates, CF, periods = cash_flows.offsets, cash_flows.dates, cash_flows.values, cash_flows.times
+        rows = cash_flows.rows()
+        freq = frequency[rows]
+        growth = 1 + yld_perc[rows] * 0.01 / freq
+        PV = CF * growth ** (-periods)
+        values = {
+            "CF": CF,
+            "PV": PV,
+            "DV01": PV * periods / freq / growth,
+            # the divisor 4 matches Bond.convexity
+            "convexity": PV * (periods + periods * periods) / (4 * growth * growth),
+            "periods": periods,
+        }
+        return indptr, dates, values, yld_perc
+
+    def add(self, instruments, notionals, names=None):
+        '''Add positions to the portfolio.
+
+        Only the cash flows of the new positions are projected. The ladders are updated by adding
+        the contributions of the new positions.
+
+        Parameters
+        ----------
+        instruments: Bond, list of Bond, or BondBook
+            The bonds of the new positions.
+        notionals: float or np.array
+            The face value of each new position.
+        names: list, optional
+            The name of each new position. Default is None, which continues the numbering of the
+            positions.
+
+        Examples
+        --------
+        >>> portfolio = Portfolio()
+        >>> portfolio.add(bond1, 1e6, names=["UST 0.625 2030"])
+        '''
+        columns = self._columns(instruments)
+        n = columns[0].size
+        notionals = np.broadcast_to(np.asarray(notionals, dtype=float), (n,)).copy()
+        if names is None:
+            names = list(range(self._next_name, self._next_name + n))
+            self._next_name += n
+        names = list(names)
+        if len(names) != n:
+            raise Exception("names should have one element per instrument.")
+        if len(set(names)) != n or set(names) & set(self._names):
+            raise Exception("position names should be unique.")
+        indptr, dates, values, yld_perc = self._project(*columns)
+        # extend the date grid and remap the columns of the existing matrices
+        grid = np.union1d(self._dates, dates)
+        if grid.size != self._dates.size:
+            remap = np.searchsorted(grid, self._dates)
+            for key in MATRICES:
+                matrix = self._matrices[key]
+                self._matrices[key] = sparse.csr_matrix((matrix.data, remap[matrix.indices], matrix.indptr),
+                                                        shape=(matrix.shape[0], grid.size))
+            for measure in MEASURES:
+                ladder = np.zeros(grid.size)
+                ladder[remap] = self._ladders[measure]
+                self._ladders[measure] = ladder
+            self._dates = grid
+        indices = np.searchsorted(grid, dates)
+        for key in MATRICES:
+            new = sparse.csr_matrix((values[key], indices, indptr), shape=(n, grid.size))
+            self._matrices[key] = sparse.vstack([self._matrices[key], new], format="csr")
+            if key in MEASURES:
+                self._ladders[key] = self._ladders[key] + new.T @ notionals
+        self._names.extend(names)
+        self._notionals = np.concatenate([self._notionals, notionals])
+        self._yld = np.concatenate([self._yld, yld_perc])
+        self._frequency = np.concatenate([self._frequency, np.asarray(columns[4], dtype=np.int64)])
+
+    def remove(self, names):
+        '''Remove positions from the portfolio.
+
+        The ladders are updated by subtracting the contributions of the removed positions.
+
+        Parameters
+        ----------
+        names: list
+            The names of the positions to remove.
+        '''
+        index = {name: i for i, name in enumerate(self._names)}
+        missing = [name for name in names if name not in index]
+        if missing:
+            raise Exception("unknown positions: " + ", ".join(str(name) for name in missing))
+        removed = np.zeros(len(self._names), dtype=bool)
+        removed[[index[name] for name in names]] = True
+        for measure in MEASURES:
+            self._ladders[measure] = self._ladders[measure] - \
+                self._matrices[measure][removed].T @ self._notionals[removed]
+        for key in MATRICES:
+            self._matrices[key] = self._matrices[key][~removed]
+        self._names = [name for name, flag in zip(self._names, removed) if not flag]
+        self._notionals = self._notionals[~removed]
+        self._yld = self._yld[~removed]
+        self._frequency = self._frequency[~removed]
+
+    def cash_flows(self):
+        '''Get the cash flows per unit face value of the positions as a CashFlows container.
+
+        The times (in coupon periods from settlement) and values wrap the data of the sparse matrices
+        without copying them. The payment dates are looked up from the date grid.
+
+        Returns
+        -------
+        CashFlows
+            The cash flows of each position, in the order of names.
+        '''
+        CF = self._matrices["CF"]
+        return CashFlows(CF.indptr, self._matrices["periods"].data, CF.data, self._frequency, self._dates[CF.indices])
+
+    def cf_matrix(self):
+        '''Get the sparse (positions x dates) matrix of cash flows per unit face value.
+
+        Returns
+        -------
+        tuple
+            (matrix, dates), where matrix is a scipy.sparse.csr_matrix and dates is the date grid.
+        '''
+        return self._matrices["CF"], self._dates
+
+    def PV(self):
+        '''Calculate the present value (dirty value) of the portfolio.'''
+        return self._ladders["PV"].sum()
+
+    def DV01(self):
+        '''Calculate the DV01 of the portfolio, i.e. the sum of the notional times Bond.DV01() of
+        every position.'''
+        return self._ladders["DV01"].sum()
+
+    def convexity(self):
+        '''Calculate the convexity of the portfolio, i.e. the average of Bond.convexity() of the
+        positions weighted by their present values.'''
+        return self._ladders["convexity"].sum() / self.PV()
+
+    def ladder(self, measure="CF"):
+        '''Get the notional-weighted ladder of a measure over the date grid.
+
+        Parameters
+        ----------
+        measure: str, optional
+            One of "CF", "PV", "DV01" and "convexity". Default is "CF".
+
+        Returns
+        -------
+        pd.Series
+            The ladder indexed by date. Dates without cash flows are dropped.
+
+        Examples
+        --------
+        >>> portfolio.ladder("CF").head()
+        '''
+        if measure not in MEASURES:
+            raise Exception("measure should be one of " + ", ".join(MEASURES) + ".")
+        ladder = self._ladders[measure]
+        nonzero = self._matrices[measure].getnnz(axis=0) > 0
+        return pd.Series(ladder[nonzero], index=pd.DatetimeIndex(self._dates[nonzero]), name=measure)
@@ -0,0 +1,143 @@
+'''
+Vectorized parsing and formatting of Treasury price quotes in 32nds.
+
+A quote is a handle and a number of 32nds separated by "-", e.g. "99-30" is 99 + 30/32. The 32nds
+can be followed by a fraction of a 32nd:
+
+    "99-30+"      half a 32nd (one 64th), i.e. 99 + 30.5/32
+    "99-30 1/4"   a quarter, a half or three quarters of a 32nd ("1/4", "1/2", "3/4")
+    "99-302"      a third digit with the number of eighths of a 32nd (0, 2, 4 or 6)
+
+A quote without "-" is a whole number of points, e.g. "100". Spaces are ignored.
+
+The quotes are parsed as a matrix of character codes (one row per quote), so a whole array of
+quotes is converted with a handful of NumPy operations. Invalid quotes do not raise: they get a
+NaN price and False in the returned mask.
+'''
+import numpy as np
+
+# denominators which format_quotes can round prices to
+DENOMINATORS = (32, 64, 128)
+
+_ZERO, _NINE = ord("0"), ord("9")
+_DASH, _PLUS, _SLASH = ord("-"), ord("+"), ord("/")
+
+
+def _as_quote_array(quotes):
+    '''Convert quotes (a sequence, a numpy array or an Arrow string column) into a str or bytes array.'''
+    if hasattr(quotes, "to_numpy") and hasattr(quotes, "fill_null"):
+        # pyarrow Array or ChunkedArray: nulls become empty (invalid) quotes
+        quotes = quotes.fill_null("").to_numpy(zero_copy_only=False)
+    quotes = np.asarray(quotes)
+    if quotes.dtype.kind == "O":
+        quotes = quotes.astype(str)
+    if quotes.dtype.kind not in "SU":
+        raise Exception("quotes should be an array of str or bytes.")
+    return quotes
+
+
+def parse_quotes(quotes):
+    '''Convert price quotes in 32nds into float prices.
+
+    Parameters
+    ----------
+    quotes: np.array
+        A numpy str or bytes array, a sequence of str, or a pyarrow string Array/ChunkedArray.
+
+    Returns
+    -------
+    tuple
+        (prices, valid), where prices is a float array of prices (in percent) with NaN for invalid
+        quotes, and valid is a boolean array which is True for valid quotes.
+
+    Examples
+    --------
+    >>> parse_quotes(np.array(["99-30+", "100-01 1/4", "99-302", "101", "99-32"]))
+    (array([ 99.953125  , 100.0390625 ,  99.9453125 , 101.        ,          nan]),
+     array([ True,  True,  True,  True, False]))
+    '''
+    quotes = _as_quote_array(quotes)
+    shape = quotes.shape
+    space = b" " if quotes.dtype.kind == "S" else " "
+    quotes = np.char.replace(np.char.strip(quotes.ravel()), space, space[:0])
+    nquote = quotes.size
+    if quotes.dtype.itemsize == 0 or nquote == 0:
+        return np.full(shape, np.nan), np.zeros(shape, dtype=bool)
+    code_type = np.uint8 if quotes.dtype.kind == "S" else np.uint32
+    codes = np.ascontiguousarray(quotes).view(code_type).reshape(nquote, -1).astype(np.int64)
+    width = codes.shape[1]
+    position = np.arange(width)
+    length = (codes != 0).sum(axis=1)
+    is_digit = (codes >= _ZERO) & (codes <= _NINE)
+    digits = np.where(is_digit, codes - _ZERO, 0)
+    is_dash = codes == _DASH
+    has_dash = is_dash.any(axis=1)
+    # the handle ends at the dash, or at the end of a quote without a dash
+    dash = np.where(has_dash, is_dash.argmax(axis=1), length)
+    in_handle = position < dash[:, None]
+    exponent = np.where(in_handle, dash[:, None] - 1 - position, 0)
+    handle = (digits * 10.0 ** exponent * in_handle).sum(axis=1)
+    valid = (dash > 0) & (is_digit | ~in_handle).all(axis=1)
+
+    def char(offset):
+        '''Character codes at dash + offset (0 beyond the end of the quote).'''
+        index = np.minimum(dash + offset, width - 1)
+        return np.where(dash + offset < width, codes[np.arange(nquote), index], 0)
+
+    first, second = char(1), char(2)
+    ticks = (first - _ZERO) * 10 + (second - _ZERO)
+    tail = length - dash - 3
+    c3, c4, c5 = char(3), char(4), char(5)
+    fraction = np.full(nquote, np.nan)
+    fraction[tail == 0] = 0.0
+    # "+" is half a 32nd, a third digit is the number of eighths of a 32nd
+    fraction[(tail == 1) & (c3 == _PLUS)] = 0.5
+    eighths = (tail == 1) & np.isin(c3, [ord("0"), ord("2"), ord("4"), ord("6")])
+    fraction[eighths] = (c3[eighths] - _ZERO) / 8
+    # "1/4", "1/2" and "3/4" of a 32nd
+    numerator, denominator = c3 - _ZERO, c5 - _ZERO
+    quarters = (tail == 3) & (c4 == _SLASH) & (((numerator == 1) & np.isin(denominator, [2, 4])) |
+                                                ((numerator == 3) & (denominator == 4)))
+    fraction[quarters] = numerator[quarters] / denominator[quarters]
+    valid_fraction = ((first >= _ZERO) & (first <= _NINE) & (second >= _ZERO) & (second <= _NINE) &
+                      (ticks <= 31) & ~np.isnan(fraction))
+    valid &= ~has_dash | valid_fraction
+    price = handle + np.where(has_dash, (ticks + np.nan_to_num(fraction)) / 32, 0.0)
+    price = np.where(valid, price, np.nan)
+    return price.reshape(shape), valid.reshape(shape)
+
+
+def format_quotes(price_perc, denominator=64):
+    '''Format prices as quotes in 32nds, the inverse of parse_quotes.
+
+    Parameters
+    ----------
+    price_perc: np.array
+        Prices (in percent).
+    denominator: int, optional
+        The prices are rounded to the nearest 1/32 (32), 1/64 (64, "+" for half a 32nd) or
+        1/128 (128, a third digit with the number of eighths of a 32nd). Default is 64.
+
+    Returns
+    -------
+    np.array
+        A str array of quotes, with an empty string for prices which are not finite.
+
+    Examples
+    --------
+    >>> format_quotes(np.array([99.953125, 100.0390625, 101.0]), denominator=128)
+    array(['99-30+', '100-012', '101-00'], dtype='<U7')
+    '''
+    if denominator not in DENOMINATORS:
+        raise Exception("denominator should be one of " + ", ".join(str(d) for d in DENOMINATORS) + ".")
+    price = np.asarray(price_perc, dtype=float)
+    finite = np.isfinite(price)
+    units = np.round(np.where(finite, price, 0.0) * denominator).astype(np.int64)
+    handle, remainder = np.divmod(units, denominator)
+    ticks, part = np.divmod(remainder * 128 // denominator, 4)
+    if denominator == 128:
+        suffix = np.array(["", "2", "+", "6"])[part]
+    else:
+        suffix = np.where(part == 2, "+", "")
+    quote = np.char.add(np.char.add(np.char.add(handle.astype(str), "-"), np.char.zfill(ticks.astype(str), 2)), suffix)
+    return np.where(finite, quote, "")
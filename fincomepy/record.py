@@ -0,0 +1,198 @@
+import numpy as np
+from fincomepy.bond import Bond
+from fincomepy import batch
+
+# one bond per row of a BondBook: 8-byte dates and floats, 1-byte frequency and basis
+BOND_DTYPE = np.dtype([
+    ("settlement", "datetime64[D]"),
+    ("maturity", "datetime64[D]"),
+    ("coupon", "f8"),
+    ("clean_price", "f8"),
+    ("redemption", "f8"),
+    ("frequency", "i1"),
+    ("basis", "i1"),
+])
+
+
+class BondRecord(object):
+    '''
+    A compact representation of a bond position.
+
+    BondRecord stores the bond terms in __slots__ and in regular units only (e.g. a 0.625% coupon
+    is stored as 0.00625). Quantities in percent are computed on demand. It has no per-instance
+    dictionary, so it needs a small fraction of the memory of a Bond object.
+
+    Attributes
+    ----------
+    settlement: datetime.date
+        A date object which specifies the bond settlement date.
+    maturity: datetime.date
+        A date object which specifies the maturity date.
+    coupon: float
+        A float which indicates the coupon rate (regular quantity).
+    clean_price: float
+        A float which indicates the clean price (regular quantity).
+    frequency: int
+        An integer which specifies coupon payment frequency.
+    basis: int
+        An integer which indicates day count convention.
+    redemption: float
+        A float which specifies bond redemption (regular quantity).
+
+    Methods
+    -------
+    accrint()
+        Calculate the accrued interest (in percent).
+    dirty_price()
+        Calculate the dirty price (in percent).
+    yld()
+        Calculate the yield (in percent).
+    analytics()
+        Calculate yield, durations, DV01 and convexity.
+    to_bond()
+        Construct a Bond object with the same terms.
+    '''
+
+    __slots__ = ("settlement", "maturity", "coupon", "clean_price", "frequency", "basis", "redemption")
+
+    def __init__(self, settlement, maturity, coupon_perc, price_perc, frequency, basis=1, redemption=100):
+        '''
+        Constructor for BondRecord. The arguments are the same as those of Bond.
+
+        Examples
+        --------
+        >>> record = BondRecord(settlement=date(2020,7,15), maturity=date(2030,5,15),
+            coupon_perc=0.625, price_perc=100.015625, frequency=2, basis=1)
+        '''
+        self.settlement = settlement
+        self.maturity = maturity
+        self.coupon = coupon_perc * 0.01
+        self.clean_price = Bond._parse_price(price_perc) * 0.01
+        self.frequency = frequency
+        self.basis = basis
+        self.redemption = redemption * 0.01
+
+    @property
+    def coupon_perc(self):
+        return self.coupon * 100
+
+    @property
+    def clean_price_perc(self):
+        return self.clean_price * 100
+
+    @property
+    def redemption_perc(self):
+        return self.redemption * 100
+
+    def __repr__(self):
+        return "BondRecord(settlement={!r}, maturity={!r}, coupon_perc={!r}, price_perc={!r}, frequency={!r}, " \
+            "basis={!r}, redemption={!r})".format(self.settlement, self.maturity, self.coupon_perc,
+            self.clean_price_perc, self.frequency, self.basis, self.redemption_perc)
+
+    def accrint(self):
+        '''Calculate the accrued interest (in percent).'''
+        pcd = Bond.couppcd(self.settlement, self.maturity, self.frequency, self.basis)
+        ncd = Bond.coupncd(self.settlement, self.maturity, self.frequency, self.basis)
+        return Bond.accrint(pcd, ncd, self.settlement, self.coupon_perc, 1, self.frequency, self.basis)
+
+    def dirty_price(self):
+        '''Calculate the dirty price (in percent).'''
+        return self.clean_price_perc + self.accrint()
+
+    def yld(self, *args, **kwargs):
+        '''Calculate the yield (in percent). The arguments are passed to Bond.yld.'''
+        return Bond.yld(self.settlement, self.maturity, self.coupon_perc, self.clean_price_perc,
+                        self.redemption_perc, self.frequency, self.basis, *args, **kwargs)
+
+    def analytics(self):
+        '''Calculate yield, durations, DV01 and convexity.
+
+        Returns
+        -------
+        dict
+            A dictionary with the same keys as fincomepy.batch.bond_analytics, holding scalars.
+        '''
+        res = batch.bond_analytics([self.settlement], [self.maturity], self.coupon_perc, self.clean_price_perc,
+                                   self.frequency, self.basis, self.redemption_perc)
+        return {key: value[0] for key, value in res.items()}
+
+    def to_bond(self):
+        '''Construct a Bond object with the same terms.'''
+        return Bond(self.settlement, self.maturity, self.coupon_perc, self.clean_price_perc, self.frequency,
+                    self.basis, self.redemption_perc)
+
+
+class BondBook(object):
+    '''
+    A book of bond positions stored in one numpy structured array (see BOND_DTYPE).
+
+    Each position takes BOND_DTYPE.itemsize bytes. Values are stored in regular units, and
+    analytics are calculated for the whole book at once with fincomepy.batch.
+
+    Attributes
+    ----------
+    _data: np.array
+        A structured array with dtype BOND_DTYPE.
+
+    Methods
+    -------
+    from_records(records)
+        Construct a BondBook from BondRecord objects.
+    analytics()
+        Calculate yield, durations, DV01 and convexity of every position.
+    '''
+
+    def __init__(self, settlement, maturity, coupon_perc, price_perc, frequency, basis=1, redemption=100):
+        '''
+        Constructor for BondBook. The arguments are the same as those of Bond, given as arrays with
+        one element per position.
+
+        Examples
+        --------
+        >>> book = BondBook(settlement=[date(2020,7,15)] * 2, maturity=[date(2030,5,15), date(2025,6,30)],
+            coupon_perc=[0.625, 0.25], price_perc=[100.015625, 99.8125], frequency=2)
+        '''
+        columns = np.broadcast_arrays(batch.as_dates(settlement), batch.as_dates(maturity),
+            np.asarray(coupon_perc, dtype=float), batch.parse_price(price_perc), np.asarray(redemption, dtype=float),
+            np.asarray(frequency), np.asarray(basis))
+        self._data = np.empty(columns[0].shape, dtype=BOND_DTYPE)
+        self._data["settlement"] = columns[0]
+        self._data["maturity"] = columns[1]
+        self._data["coupon"] = columns[2] * 0.01
+        self._data["clean_price"] = columns[3] * 0.01
+        self._data["redemption"] = columns[4] * 0.01
+        self._data["frequency"] = columns[5]
+        self._data["basis"] = columns[6]
+
+    @classmethod
+    def from_records(cls, records):
+        '''Construct a BondBook from an iterable of BondRecord objects.'''
+        records = list(records)
+        return cls([r.settlement for r in records], [r.maturity for r in records],
+                   [r.coupon_perc for r in records], [r.clean_price_perc for r in records],
+                   [r.frequency for r in records], [r.basis for r in records], [r.redemption_perc for r in records])
+
+    def __len__(self):
+        return self._data.size
+
+    def __getitem__(self, i):
+        row = self._data[i]
+        return BondRecord(row["settlement"].item(), row["maturity"].item(), row["coupon"] * 100,
+                          row["clean_price"] * 100, int(row["frequency"]), int(row["basis"]), row["redemption"] * 100)
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def analytics(self):
+        '''Calculate yield, durations, DV01 and convexity of every position.
+
+        Returns
+        -------
+        dict
+            A dictionary of numpy arrays, see fincomepy.batch.bond_analytics.
+        '''
+        data = self._data
+        return batch.bond_analytics(data["settlement"], data["maturity"], data["coupon"] * 100,
+                                    data["clean_price"] * 100, data["frequency"], data["basis"],
+                                    data["redemption"] * 100)
@@ -3,6 +3,8 @@ import numpy as np
 from scipy.optimize import root
 from fincomepy.fixedincome import FixedIncome
 from fincomepy.bond import Bond
+from fincomepy import instrumentation
+from fincomepy.calendar import get_calendar
 
 class Repo(Bond):
     '''
@@ -75,11 +77,13 @@ class Repo(Bond):
         Calculate the convexity of a bond.
     price_change(yld_change_perc)
         Calculate the bond price change based on yield change.
+    key_rate_DV01(curve, key_tenors)
+        Calculate the key rate DV01s of a bond against a zero curve.
     diff_month(date1, date2)
         Get the month difference between two dates.
     last_day_in_month(original_date)
         Get the last day for the input month.
-    coupon_dates()
+    coupon_dates(calendar=None, convention="following")
         Obtain the coupon payment dates of a bond.
     start_payment()
         Calculate repo start payment.
@@ -98,7 +102,8 @@ class Repo(Bond):
     '''
 
     def __init__(self, settlement, maturity, coupon_perc, price_perc, frequency, basis, 
-                 bond_face_value, repo_period, repo_rate_perc, type='US'):
+                 bond_face_value, repo_period, repo_rate_perc, type='US',
+                 calendar=None, convention="following"):
         '''
         Constructor for Repo.
 
@@ -132,6 +137,12 @@ class Repo(Bond):
         type: str, optional
             A string which specifies the money market of repo. It should be either 'US' or 'UK'.
             Default is 'US'.
+        calendar: str or HolidayCalendar, optional
+            The business-day calendar ("US", "UK" or a fincomepy.calendar.HolidayCalendar) used to
+            move the repo end date to a business day. The repo period becomes the number of days
+            to the adjusted end date. Default is None (no adjustment).
+        convention: str, optional
+            "following", "modified_following" or "preceding". Default is "following".
 
         Examples
         --------
@@ -140,6 +151,9 @@ class Repo(Bond):
                 bond_face_value=100000000, repo_period=1, repo_rate_perc=0.145)
         '''
         super().__init__(settlement, maturity, coupon_perc, price_perc, frequency, basis)
+        if calendar is not None:
+            repo_end_date = get_calendar(calendar).adjust(self._settlement + timedelta(days=repo_period), convention)
+            repo_period = (repo_end_date.item() - self._settlement).days
         self._repo_period = repo_period
         self._perc_dict["repo_rate"] = repo_rate_perc
         self._face_value = bond_face_value
@@ -151,7 +165,7 @@ class Repo(Bond):
     
     @classmethod
     def from_end_date(cls, settlement, maturity, coupon_perc, price_perc, frequency, basis, 
-        bond_face_value, repo_end_date, repo_rate_perc, type='US'):
+        bond_face_value, repo_end_date, repo_rate_perc, type='US', calendar=None, convention="following"):
         '''
         Constructor for Repo.
 
@@ -185,6 +199,12 @@ class Repo(Bond):
         type: str, optional
             A string which specifies the money market of repo. It should be either 'US' or 'UK'.
             Default is 'US'.
+        calendar: str or HolidayCalendar, optional
+            The business-day calendar ("US", "UK" or a fincomepy.calendar.HolidayCalendar) used to
+            move the repo end date to a business day. The repo period becomes the number of days
+            to the adjusted end date. Default is None (no adjustment).
+        convention: str, optional
+            "following", "modified_following" or "preceding". Default is "following".
 
         Examples
         --------
@@ -193,7 +213,8 @@ class Repo(Bond):
                 bond_face_value=100000000, repo_end_date=date(2020,7,16), repo_rate_perc=0.145)
         '''
         repo_period = (repo_end_date - settlement).days
-        return cls(settlement, maturity, coupon_perc, price_perc, frequency, basis, bond_face_value, repo_period, repo_rate_perc, type)
+        return cls(settlement, maturity, coupon_perc, price_perc, frequency, basis, bond_face_value, repo_period, repo_rate_perc, type,
+                   calendar, convention)
         
     def start_payment(self):
         '''Calculate repo start payment.
@@ -374,6 +395,7 @@ class Repo(Bond):
             return self.start_payment()
         return self.start_payment() * (1.0 - haircut_perc * 0.01)
         
+    @instrumentation.instrument("repo.break_even_yld")
     def break_even_yld(self, *args, **kwargs):
         '''Calculate bond break even yield.
 
@@ -406,6 +428,7 @@ class Repo(Bond):
         forward_DP_perc = forward_DP_regular * 100
         sol = root(lambda x: self.dirty_price(self._settlement, self._maturity, self._perc_dict["coupon"], 
             x, self._redemption, self._frequency, self._basis) - forward_DP_perc, [0.01], *args, **kwargs)
+        instrumentation.count("repo.break_even_yld.nfev", sol.nfev)
         forward_yield_perc = sol.x[0]
         assert forward_yield_perc >= 0 and forward_yield_perc <= 100
         return forward_yield_perc
@@ -0,0 +1,652 @@
+'''
+asyncio interface of the pricing functions.
+
+The CPU-heavy work always runs in an executor (by default the thread pool of the event loop), so
+the event loop stays responsive. The fincomepy.batch kernels are thread-safe and release the GIL
+in their NumPy operations.
+
+price_bonds, price_repos and price_futures price arrays of instruments, like fincomepy.batch.
+PricingService prices single instruments: the requests of all concurrent callers which arrive
+within a short window are coalesced into one vectorized batch (micro-batching), and the results
+are fanned back out to the callers. create_asgi_app serves a PricingService over HTTP with JSON,
+with any ASGI server (e.g. uvicorn).
+
+SyncPricingService does the same for threaded (e.g. Flask) servers: the requests of concurrent
+threads are coalesced by a Coalescer.
+'''
+import asyncio
+import inspect
+import json
+import math
+import threading
+from datetime import date
+from functools import partial
+import numpy as np
+from fincomepy import batch
+from fincomepy import instrumentation
+from fincomepy import quotes
+from fincomepy.cds import CDS
+from fincomepy.zspread import ZspreadPar
+
+# the batch function of each kind of instrument
+KINDS = {
+    "bond": batch.bond_analytics,
+    "repo": batch.repo_analytics,
+    "bond_future": batch.future_analytics,
+}
+
+# default coalescing window (in seconds) and maximum batch size
+WINDOW = 0.002
+MAX_BATCH = 1024
+
+
+async def _run(executor, func, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+async def price_bonds(settlement, maturity, coupon_perc, price_perc, frequency, basis=1, redemption=100,
+                      yld_perc=None, executor=None):
+    '''Calculate the analytics of many bonds in an executor. See fincomepy.batch.bond_analytics.
+
+    Examples
+    --------
+    >>> res = await price_bonds(settlement, maturity, coupon_perc, price_perc, frequency=2)
+    '''
+    return await _run(executor, batch.bond_analytics, settlement, maturity, coupon_perc, price_perc, frequency,
+                      basis, redemption, yld_perc)
+
+
+async def price_repos(settlement, maturity, coupon_perc, price_perc, frequency, basis, bond_face_value, repo_period,
+                      repo_rate_perc, type="US", executor=None):
+    '''Calculate the analytics of many repos in an executor. See fincomepy.batch.repo_analytics.'''
+    return await _run(executor, batch.repo_analytics, settlement, maturity, coupon_perc, price_perc, frequency,
+                      basis, bond_face_value, repo_period, repo_rate_perc, type)
+
+
+async def price_futures(settlement, maturity, coupon_perc, price_perc, frequency, basis, repo_period, repo_rate_perc,
+                        futures_pr_perc, conversion_factor, type="US", executor=None):
+    '''Calculate the analytics of many bond futures in an executor. See fincomepy.batch.future_analytics.'''
+    return await _run(executor, batch.future_analytics, settlement, maturity, coupon_perc, price_perc, frequency,
+                      basis, repo_period, repo_rate_perc, futures_pr_perc, conversion_factor, type)
+
+
+# the arguments of each kind of instrument, with None for required arguments. Optional arguments
+# without a default value (e.g. yld_perc) are not supported for single instruments.
+_FIELDS = {kind: {name: None if param.default is inspect.Parameter.empty else param.default
+                  for name, param in inspect.signature(func).parameters.items() if param.default is not None}
+           for kind, func in KINDS.items()}
+
+
+# the arguments which are dates, integers or strings; the other arguments (except price_perc) are floats
+_DATES = ("settlement", "maturity")
+_INTEGERS = ("frequency", "basis", "repo_period")
+_STRINGS = ("type", "convention")
+
+
+def _coerce(name, value):
+    '''Convert one argument into the type of its column, or raise if it is invalid.'''
+    if name in _DATES:
+        try:
+            value = np.datetime64(value, "D") if isinstance(value, (str, date, np.datetime64)) else None
+        except ValueError:
+            value = None
+        if value is None or np.isnat(value):
+            raise Exception("{} should be a date.".format(name))
+        return value
+    if name in _STRINGS:
+        if not isinstance(value, str):
+            raise Exception("{} should be a str.".format(name))
+        return value
+    if name == "price_perc" and isinstance(value, str):
+        price, valid = quotes.parse_quotes(np.array([value]))
+        if not valid[0]:
+            raise Exception("invalid price quote: " + value)
+        return float(price[0])
+    if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)):
+        raise Exception("{} should be a number.".format(name))
+    if name in _INTEGERS:
+        if not math.isfinite(value) or value != int(value):
+            raise Exception("{} should be an integer.".format(name))
+        value = int(value)
+        if name == "frequency" and (value <= 0 or 12 % value):
+            raise Exception("frequency should be 1, 2, 3, 4, 6 or 12.")
+        if name == "basis" and not 0 <= value <= 4:
+            raise Exception("basis should be between 0 and 4.")
+        return value
+    return float(value)
+
+
+def _row(kind, terms):
+    '''Check the arguments of one instrument, convert them and fill in the default values.
+
+    Every argument is checked here, before the row joins a batch, so that an invalid request fails
+    alone instead of failing (and splitting) the batch of the other callers.
+    '''
+    if kind not in KINDS:
+        raise Exception("kind should be one of " + ", ".join(KINDS) + ".")
+    fields = _FIELDS[kind]
+    unknown = set(terms) - set(fields)
+    if unknown:
+        raise Exception("unknown arguments: " + ", ".join(sorted(unknown)))
+    row = {name: terms.get(name, default) for name, default in fields.items()}
+    missing = [name for name, value in row.items() if value is None]
+    if missing:
+        raise Exception("missing arguments: " + ", ".join(missing))
+    return {name: _coerce(name, value) for name, value in row.items()}
+
+
+def _column(values):
+    # a column which mixes strings (e.g. quotes in 32nds) and numbers keeps the Python objects
+    kinds = {isinstance(value, str) for value in values}
+    return np.asarray(values, dtype=object) if len(kinds) > 1 else np.asarray(values)
+
+
+def _run_rows(func, rows):
+    '''Call func on the columns of rows (dictionaries with the same keys), return one dictionary per row.'''
+    res = func(**{name: _column([row[name] for row in rows]) for name in rows[0]})
+    columns = {name: np.asarray(values).tolist() for name, values in res.items()}
+    return [{name: values[i] for name, values in columns.items()} for i in range(len(rows))]
+
+
+def _run_split(func, rows):
+    '''Like _run_rows, but a failing batch is split in halves until the failing rows are isolated.
+
+    The failing rows get their exception instead of results. A single failing row costs about
+    2 * log2(len(rows)) more calls rather than one call per row.
+    '''
+    try:
+        return _run_rows(func, rows)
+    except Exception as err:
+        if len(rows) == 1:
+            return [err]
+    half = len(rows) // 2
+    return _run_split(func, rows[:half]) + _run_split(func, rows[half:])
+
+
+async def _run_split_async(executor, func, rows):
+    '''The asyncio version of _run_split, which runs every call in the executor.'''
+    try:
+        return await _run(executor, _run_rows, func, rows)
+    except Exception as err:
+        if len(rows) == 1:
+            return [err]
+    half = len(rows) // 2
+    return await _run_split_async(executor, func, rows[:half]) + await _run_split_async(executor, func, rows[half:])
+
+
+def _count_batch(rows):
+    instrumentation.count("service.batches")
+    instrumentation.count("service.requests", len(rows))
+
+
+class MicroBatcher(object):
+    '''
+    A class used to coalesce concurrent single-row requests into vectorized batches.
+
+    A batch is run when window seconds have passed since its first request, or as soon as it has
+    max_batch requests. If a batch fails, it is split in halves until the failing requests are
+    isolated, so that an invalid request only fails its own caller.
+
+    Attributes
+    ----------
+    _func: callable
+        A function which takes columns as keyword arguments and returns a dictionary of arrays
+        with one element per row, e.g. fincomepy.batch.bond_analytics.
+    _window: float
+        The coalescing window (in seconds).
+    _max_batch: int
+        The maximum number of requests in one batch.
+    _executor: concurrent.futures.Executor
+        The executor which runs the batches. None is the default executor of the event loop.
+    _pending: list
+        The (row, future) pairs of the batch being collected.
+    _timer: asyncio.TimerHandle
+        The timer which runs the batch being collected.
+    _tasks: set
+        The running batches.
+
+    Methods
+    -------
+    submit(row)
+        Add a row to the next batch and return its results.
+    '''
+
+    def __init__(self, func, window=WINDOW, max_batch=MAX_BATCH, executor=None):
+        '''Constructor for MicroBatcher.
+
+        Parameters
+        ----------
+        func: callable
+            A function which takes columns as keyword arguments and returns a dictionary of arrays
+            with one element per row.
+        window: float, optional
+            The coalescing window (in seconds). Default is 0.002.
+        max_batch: int, optional
+            The maximum number of requests in one batch. Default is 1024.
+        executor: concurrent.futures.Executor, optional
+            The executor which runs the batches. Default is None (the default executor of the loop).
+
+        Examples
+        --------
+        >>> batcher = MicroBatcher(batch.bond_analytics)
+        >>> res = await batcher.submit({"settlement": "2020-07-15", "maturity": "2030-05-15",
+                "coupon_perc": 0.625, "price_perc": 100.015625, "frequency": 2, "basis": 1, "redemption": 100})
+        '''
+        self._func = func
+        self._window = window
+        self._max_batch = max_batch
+        self._executor = executor
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def submit(self, row):
+        '''Add a row to the next batch and return its results.
+
+        Parameters
+        ----------
+        row: dict
+            The arguments of one row. All rows should have the same keys.
+
+        Returns
+        -------
+        dict
+            The results of the row.
+        '''
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.ensure_future(self._run_batch(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, pending):
+        rows = [row for row, _ in pending]
+        _count_batch(rows)
+        results = await _run_split_async(self._executor, self._func, rows)
+        for (_, future), result in zip(pending, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class PricingService(object):
+    '''
+    A class used to price single instruments for many concurrent asyncio callers.
+
+    The requests of each kind of instrument are coalesced by a MicroBatcher and priced with the
+    function of fincomepy.batch (see KINDS). Curve calculations (CDS spreads and z-spreads) run in
+    the executor.
+
+    Attributes
+    ----------
+    _batchers: dict
+        The MicroBatcher of each kind of instrument.
+    _executor: concurrent.futures.Executor
+        The executor which runs the calculations.
+
+    Methods
+    -------
+    price(kind, **terms)
+        Price one instrument.
+    price_bond(**terms)
+        Price one bond.
+    price_repo(**terms)
+        Price one repo.
+    price_bond_future(**terms)
+        Price one bond future.
+    cds_spread(risk_free_perc, risky_perc, face_value_perc=100, rr_perc=50, maturity=None)
+        Calculate CDS spreads.
+    zspread_par(par_rates_perc, CF_perc, face_value_perc=100, compound="discrete")
+        Calculate the z-spread from par-coupon rates.
+    '''
+
+    def __init__(self, window=WINDOW, max_batch=MAX_BATCH, executor=None):
+        '''Constructor for PricingService.
+
+        Parameters
+        ----------
+        window: float, optional
+            The coalescing window (in seconds). Default is 0.002.
+        max_batch: int, optional
+            The maximum number of requests in one batch. Default is 1024.
+        executor: concurrent.futures.Executor, optional
+            The executor which runs the calculations. Default is None (the default executor of the loop).
+
+        Examples
+        --------
+        >>> service = PricingService()
+        >>> res = await service.price_bond(settlement="2020-07-15", maturity="2030-05-15",
+                coupon_perc=0.625, price_perc=100.015625, frequency=2)
+        >>> res["yld"]
+        0.6233481811...
+        '''
+        self._executor = executor
+        self._batchers = {kind: MicroBatcher(func, window, max_batch, executor) for kind, func in KINDS.items()}
+
+    async def price(self, kind, **terms):
+        '''Price one instrument.
+
+        Parameters
+        ----------
+        kind: str
+            "bond", "repo" or "bond_future".
+        **terms:
+            The arguments of the batch function of the kind (see KINDS), with one value each.
+
+        Returns
+        -------
+        dict
+            The analytics of the instrument.
+        '''
+        return await self._batchers[kind].submit(_row(kind, terms))
+
+    async def price_bond(self, **terms):
+        '''Price one bond. See fincomepy.batch.bond_analytics for the arguments and results.'''
+        return await self.price("bond", **terms)
+
+    async def price_repo(self, **terms):
+        '''Price one repo. See fincomepy.batch.repo_analytics for the arguments and results.'''
+        return await self.price("repo", **terms)
+
+    async def price_bond_future(self, **terms):
+        '''Price one bond future. See fincomepy.batch.future_analytics for the arguments and results.'''
+        return await self.price("bond_future", **terms)
+
+    async def cds_spread(self, risk_free_perc, risky_perc, face_value_perc=100, rr_perc=50, maturity=None):
+        '''Calculate CDS spreads in the executor. See CDS.cds_spread.'''
+        def calculate():
+            return CDS(np.asarray(risk_free_perc, dtype=float), np.asarray(risky_perc, dtype=float), face_value_perc,
+                       rr_perc, None if maturity is None else np.asarray(maturity, dtype=float)).cds_spread()
+        return await _run(self._executor, calculate)
+
+    async def zspread_par(self, par_rates_perc, CF_perc, face_value_perc=100, compound="discrete"):
+        '''Calculate the z-spread from par-coupon rates in the executor. See ZspreadPar.get_zspread.'''
+        def calculate():
+            return ZspreadPar(np.asarray(par_rates_perc, dtype=float), np.asarray(CF_perc, dtype=float),
+                              face_value_perc, compound).get_zspread()
+        return await _run(self._executor, calculate)
+
+
+class _Request(object):
+    __slots__ = ("row", "done", "result", "error")
+
+    def __init__(self, row):
+        self.row = row
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Coalescer(object):
+    '''
+    A class used to coalesce single-row requests from many threads into vectorized batches.
+
+    This is the thread version of MicroBatcher, for threaded servers such as Flask. The first
+    request of a batch waits up to window seconds for more requests (or until the batch has
+    max_batch requests) and then runs the whole batch in its own thread; the other requests wait
+    for their results. If a batch fails, it is split in halves like in MicroBatcher.
+
+    Attributes
+    ----------
+    _func: callable
+        A function which takes columns as keyword arguments and returns a dictionary of arrays
+        with one element per row, e.g. fincomepy.batch.bond_analytics.
+    _window: float
+        The coalescing window (in seconds).
+    _max_batch: int
+        The maximum number of requests in one batch.
+    _condition: threading.Condition
+        Protects _batch and wakes the first request of a full batch.
+    _batch: list
+        The requests of the batch being collected.
+
+    Methods
+    -------
+    submit(row)
+        Add a row to the next batch and return its results.
+    '''
+
+    def __init__(self, func, window=WINDOW, max_batch=MAX_BATCH):
+        '''Constructor for Coalescer.
+
+        Parameters
+        ----------
+        func: callable
+            A function which takes columns as keyword arguments and returns a dictionary of arrays
+            with one element per row.
+        window: float, optional
+            The coalescing window (in seconds). Default is 0.002.
+        max_batch: int, optional
+            The maximum number of requests in one batch. Default is 1024.
+        '''
+        self._func = func
+        self._window = window
+        self._max_batch = max_batch
+        self._condition = threading.Condition()
+        self._batch = []
+
+    def submit(self, row):
+        '''Add a row to the next batch and return its results.
+
+        Parameters
+        ----------
+        row: dict
+            The arguments of one row. All rows should have the same keys.
+
+        Returns
+        -------
+        dict
+            The results of the row.
+        '''
+        request = _Request(row)
+        run = None
+        with self._condition:
+            current = self._batch
+            current.append(request)
+            if len(current) >= self._max_batch:
+                self._batch = []
+                self._condition.notify_all()
+                run = current
+            elif len(current) == 1:
+                # the first request collects the batch, unless it fills up and is run by another thread
+                self._condition.wait_for(lambda: self._batch is not current, timeout=self._window)
+                if self._batch is current:
+                    self._batch = []
+                    run = current
+        if run is not None:
+            self._run_batch(run)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run_batch(self, requests):
+        rows = [request.row for request in requests]
+        _count_batch(rows)
+        results = _run_split(self._func, rows)
+        for request, result in zip(requests, results):
+            if isinstance(result, Exception):
+                request.error = result
+            else:
+                request.result = result
+            request.done.set()
+
+
+class SyncPricingService(object):
+    '''
+    A class used to price single instruments for many concurrent threads, e.g. the request
+    threads of a Flask app. The requests of each kind of instrument are coalesced by a Coalescer.
+
+    Attributes
+    ----------
+    _coalescers: dict
+        The Coalescer of each kind of instrument.
+
+    Methods
+    -------
+    price(kind, **terms)
+        Price one instrument.
+    price_many(kind, rows)
+        Price a list of instruments in one batch.
+    '''
+
+    def __init__(self, window=WINDOW, max_batch=MAX_BATCH):
+        '''Constructor for SyncPricingService.
+
+        Parameters
+        ----------
+        window: float, optional
+            The coalescing window (in seconds). Default is 0.002.
+        max_batch: int, optional
+            The maximum number of requests in one batch. Default is 1024.
+
+        Examples
+        --------
+        >>> service = SyncPricingService()
+        >>> service.price("bond", settlement="2020-07-15", maturity="2030-05-15", coupon_perc=0.625,
+                price_perc=100.015625, frequency=2)["yld"]
+        0.6233481811...
+        '''
+        self._coalescers = {kind: Coalescer(func, window, max_batch) for kind, func in KINDS.items()}
+
+    def price(self, kind, **terms):
+        '''Price one instrument. See PricingService.price.'''
+        row = _row(kind, terms)
+        return self._coalescers[kind].submit(row)
+
+    def price_many(self, kind, rows):
+        '''Price a list of instruments (dictionaries of arguments) in one batch, without waiting.'''
+        rows = [_row(kind, terms) for terms in rows]
+        if not rows:
+            return []
+        _count_batch(rows)
+        return _run_rows(KINDS[kind], rows)
+
+
+def _jsonable(value):
+    '''Convert results into JSON values: NaN becomes null and dates become ISO strings.'''
+    if isinstance(value, dict):
+        return {name: _jsonable(item) for name, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_jsonable(item) for item in (value.tolist() if isinstance(value, np.ndarray) else value)]
+    if isinstance(value, (float, np.floating)):
+        return None if math.isnan(value) else float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def dumps(res):
+    '''Serialize results into JSON: NaN becomes null and dates become ISO strings.'''
+    return json.dumps(_jsonable(res), allow_nan=False)
+
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            return body
+
+
+async def _respond(send, status, body, content_type=b"application/json"):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_asgi_app(service=None):
+    '''Create an ASGI application which serves a PricingService with JSON.
+
+    Routes (POST, JSON body):
+
+    /bond, /repo, /bond_future
+        An object with the arguments of one instrument returns an object with its analytics; a
+        list of objects returns a list of results. Every instrument goes through the coalescing
+        PricingService.
+    /cds
+        An object with the arguments of CDS returns {"cds_spread": [...]}.
+    /zspread_par
+        An object with the arguments of ZspreadPar returns {"zspread": ...}.
+
+    GET /metrics returns the instrumentation metrics in the Prometheus text format. Invalid
+    requests return status 400 with {"error": message}.
+
+    Parameters
+    ----------
+    service: PricingService, optional
+        The service to serve. Default is None, which creates a PricingService with default options.
+
+    Returns
+    -------
+    callable
+        The ASGI application.
+
+    Examples
+    --------
+    In app/asgi.py: app = create_asgi_app(), then run: uvicorn asgi:app
+    '''
+    service = service or PricingService()
+
+    async def handle(path, payload):
+        kind = path.strip("/")
+        if kind in KINDS:
+            if isinstance(payload, list):
+                return await asyncio.gather(*[service.price(kind, **terms) for terms in payload])
+            return await service.price(kind, **payload)
+        if kind == "cds":
+            return {"cds_spread": await service.cds_spread(**payload)}
+        if kind == "zspread_par":
+            return {"zspread": await service.zspread_par(**payload)}
+        return None
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        path, method = scope["path"], scope["method"]
+        if path == "/metrics" and method == "GET":
+            await _respond(send, 200, instrumentation.to_prometheus().encode(), b"text/plain; charset=utf-8")
+            return
+        if path.strip("/") not in list(KINDS) + ["cds", "zspread_par"]:
+            await _respond(send, 404, json.dumps({"error": "not found"}).encode())
+            return
+        if method != "POST":
+            await _respond(send, 405, json.dumps({"error": "method not allowed"}).encode())
+            return
+        with instrumentation.timer("asgi." + path.strip("/")):
+            try:
+                payload = json.loads(await _read_body(receive))
+                if not isinstance(payload, (dict, list)):
+                    raise Exception("the body should be a JSON object or list.")
+                res = await handle(path, payload)
+            except Exception as err:
+                await _respond(send, 400, json.dumps({"error": str(err)}).encode())
+                return
+            await _respond(send, 200, dumps(res).encode())
+
+    return app
@@ -0,0 +1,424 @@
+'''
+A persistent, memory-mapped store of precomputed coupon schedules and discount-factor curves.
+
+The store is a directory with one subdirectory per valuation date:
+
+    <path>/<YYYY-MM-DD>/schedules/*.npy   the cash flows of a universe of bonds
+    <path>/<YYYY-MM-DD>/curves/*.npy      discount-factor curves, e.g. bootstrapped from ZspreadPar
+
+Each array is a plain .npy file. Variable-length data (the cash flows of each bond, the points of
+each curve) is stored in compressed sparse row layout: the entries of row i are
+values[indptr[i]:indptr[i+1]]. The ids of each table are sorted, so an id is found with a binary
+search instead of a dictionary built at startup.
+
+Each table is a symlink to a hidden version directory (e.g. schedules -> .schedules-x1y2z3). Writing
+a table creates a new version and switches the symlink atomically, so workers can open the store
+while it is being rewritten.
+
+MappedStore opens the arrays read-only with numpy memory mapping. Opening a store only maps the
+files, so a worker process starts in milliseconds, and all processes which open the same store
+share one copy of the data in the page cache.
+'''
+import os
+import shutil
+import tempfile
+import numpy as np
+from fincomepy import batch
+from fincomepy.cashflows import CashFlows
+
+SCHEDULES = "schedules"
+CURVES = "curves"
+# the variable-length (per cash flow or per curve point) arrays of each table
+ENTRIES = {
+    SCHEDULES: ("dates", "periods", "cash_flows"),
+    CURVES: ("maturity", "discount_factor"),
+}
+
+
+def _save(directory, arrays):
+    os.makedirs(directory, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(os.path.join(directory, name + ".npy"), np.ascontiguousarray(values))
+
+
+def _replace(path, valuation_date, table, arrays):
+    '''Write arrays as a new version of <path>/<valuation_date>/<table>.
+
+    The arrays are written to a hidden version directory, then the symlink <table> is switched to it
+    with one os.replace, so a reader finds either the old or the new table and never a missing one.
+    The previous version is kept for readers which resolved the link just before the switch; older
+    versions are removed.
+    '''
+    directory = os.path.join(path, str(batch.as_dates(valuation_date)))
+    os.makedirs(directory, exist_ok=True)
+    version = tempfile.mkdtemp(prefix="." + table + "-", dir=directory)
+    _save(version, arrays)
+    target = os.path.join(directory, table)
+    previous = os.readlink(target) if os.path.islink(target) else None
+    link = os.path.join(directory, ".link" + os.path.basename(version))
+    os.symlink(os.path.basename(version), link)
+    os.replace(link, target)
+    for name in os.listdir(directory):
+        if name.startswith("." + table + "-") and name not in (os.path.basename(version), previous):
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    return target
+
+
+def _sorted_ids(ids):
+    ids = np.asarray(ids)
+    if ids.dtype.kind == "O":
+        ids = ids.astype(str)
+    order = np.argsort(ids, kind="stable")
+    if (ids[order][1:] == ids[order][:-1]).any():
+        raise Exception("ids should be unique.")
+    return ids[order], order
+
+
+def write_schedules(path, valuation_date, ids, maturity, coupon_perc, frequency, basis=1, redemption=100):
+    '''Precompute the coupon schedules of many bonds and write them to the store.
+
+    Parameters
+    ----------
+    path: str
+        The directory of the store.
+    valuation_date: datetime.date or np.datetime64
+        The valuation (settlement) date of the schedules.
+    ids: np.array
+        The id (str or int) of each bond.
+    maturity: np.array
+        Maturity dates.
+    coupon_perc: np.array
+        Coupon rates (in percent).
+    frequency: int or np.array
+        Coupon payment frequency.
+    basis: int or np.array, optional
+        Day count convention. Default is 1.
+    redemption: float or np.array, optional
+        Redemption (in percent). Default is 100.
+
+    Returns
+    -------
+    str
+        The directory of the written schedules.
+
+    Examples
+    --------
+    >>> write_schedules("/data/store", date(2020,7,15), ids, maturity, coupon_perc, 2)
+    '''
+    ids, order = _sorted_ids(ids)
+    maturity = batch.as_dates(maturity)
+    coupon_perc, frequency, basis, redemption = np.broadcast_arrays(np.asarray(coupon_perc, dtype=float),
+        np.asarray(frequency, dtype=np.int64), np.asarray(basis, dtype=np.int64), np.asarray(redemption, dtype=float))
+    if maturity.shape != ids.shape or coupon_perc.shape != ids.shape:
+        raise Exception("maturity and coupon_perc should have one element per id.")
+    maturity, coupon_perc, frequency, basis, redemption = [values[order] for values in
+                                                           [maturity, coupon_perc, frequency, basis, redemption]]
+    settlement = np.broadcast_to(batch.as_dates(valuation_date), maturity.shape)
+    pcd, ncd, nperiod = batch.schedule(settlement, maturity, frequency)
+    fp = batch.first_period(pcd, ncd, settlement, frequency, basis)
+    cash_flows = batch.cash_flows_from_schedule(fp, nperiod, coupon_perc, redemption, frequency, maturity)
+    return _replace(path, valuation_date, SCHEDULES, {
+        "ids": ids,
+        "indptr": cash_flows.offsets,
+        "dates": cash_flows.dates,
+        "periods": cash_flows.times,
+        "cash_flows": cash_flows.values,
+        "couppcd": pcd,
+        "coupncd": ncd,
+        "accrint": batch.accrint(pcd, ncd, settlement, coupon_perc, frequency, basis),
+        "frequency": frequency,
+    })
+
+
+def write_curves(path, valuation_date, curves):
+    '''Write discount-factor curves to the store.
+
+    Parameters
+    ----------
+    path: str
+        The directory of the store.
+    valuation_date: datetime.date or np.datetime64
+        The valuation date of the curves.
+    curves: dict
+        A dictionary which maps the id of each curve to a (maturity, discount_factor) tuple of
+        numpy arrays, with the maturities in years.
+
+    Returns
+    -------
+    str
+        The directory of the written curves.
+
+    Examples
+    --------
+    >>> zspr = ZspreadPar(par_rates, coupon_cf)
+    >>> zspr.get_zspread()
+    >>> write_curves("/data/store", date(2020,7,15), {"USD": (zspr._maturity, zspr._discount_factor)})
+    '''
+    ids, order = _sorted_ids(list(curves))
+    items = list(curves.values())
+    maturity = [np.asarray(items[i][0], dtype=float).ravel() for i in order]
+    discount_factor = [np.asarray(items[i][1], dtype=float).ravel() for i in order]
+    if any(m.shape != df.shape for m, df in zip(maturity, discount_factor)):
+        raise Exception("maturity and discount_factor of a curve should have the same length.")
+    return _replace(path, valuation_date, CURVES, {
+        "ids": ids,
+        "indptr": np.concatenate([[0], np.cumsum([m.size for m in maturity])]).astype(np.int64),
+        "maturity": np.concatenate(maturity) if maturity else np.zeros(0),
+        "discount_factor": np.concatenate(discount_factor) if discount_factor else np.zeros(0),
+    })
+
+
+class MappedTable(object):
+    '''
+    A read-only table of the store, with sorted ids and memory-mapped arrays.
+
+    Attributes
+    ----------
+    ids: np.array
+        The sorted ids of the rows.
+    indptr: np.array
+        The entries of row i are at indptr[i]:indptr[i+1] of the variable-length arrays.
+    _entries: tuple
+        The names of the variable-length arrays.
+    _arrays: dict
+        A dictionary which maps the name of each array to a read-only numpy memmap.
+
+    Methods
+    -------
+    rows(ids)
+        Find the rows of ids.
+    row(id)
+        Get the variable-length arrays of one row.
+    entries(rows)
+        Get the positions of the entries of many rows in the variable-length arrays.
+    '''
+
+    def __init__(self, directory, entries):
+        '''Constructor for MappedTable.
+
+        Parameters
+        ----------
+        directory: str
+            The directory of the .npy files of the table.
+        entries: tuple
+            The names of the variable-length arrays.
+        '''
+        self._entries = entries
+        self._arrays = {name[:-4]: np.load(os.path.join(directory, name), mmap_mode="r")
+                        for name in os.listdir(directory) if name.endswith(".npy")}
+        self.ids = self._arrays["ids"]
+        self.indptr = self._arrays["indptr"]
+
+    def __getitem__(self, name):
+        return self._arrays[name]
+
+    def __len__(self):
+        return self.ids.size
+
+    def rows(self, ids):
+        '''Find the rows of ids.
+
+        Parameters
+        ----------
+        ids: np.array
+            The ids to find.
+
+        Returns
+        -------
+        np.array
+            The row of each id.
+        '''
+        ids = np.asarray(ids)
+        if ids.dtype.kind == "O":
+            ids = ids.astype(str)
+        rows = np.searchsorted(self.ids, ids)
+        found = rows < self.ids.size
+        found[found] = self.ids[rows[found]] == ids[found]
+        if not found.all():
+            raise Exception("unknown id: " + str(ids[~found].ravel()[0]))
+        return rows
+
+    def row(self, id):
+        '''Get the variable-length arrays of one row.
+
+        Parameters
+        ----------
+        id: str or int
+            The id of the row.
+
+        Returns
+        -------
+        dict
+            A dictionary which maps the name of each variable-length array to a read-only view of
+            the entries of the row.
+        '''
+        i = int(self.rows([id])[0])
+        start, stop = self.indptr[i], self.indptr[i + 1]
+        return {name: self._arrays[name][start:stop] for name in self._entries}
+
+    def entries(self, rows):
+        '''Get the positions of the entries of many rows in the variable-length arrays.
+
+        Parameters
+        ----------
+        rows: np.array
+            The rows, e.g. from rows(ids).
+
+        Returns
+        -------
+        tuple
+            (index, owner), where index contains the positions of the entries of rows[0], then
+            those of rows[1], ..., and owner[k] is the position in rows of the row of index[k].
+        '''
+        start, stop = self.indptr[rows], self.indptr[rows + 1]
+        count = stop - start
+        owner = np.repeat(np.arange(rows.size), count)
+        offset = np.concatenate([[0], np.cumsum(count)[:-1]]).astype(np.int64)
+        index = np.arange(count.sum()) - offset[owner] + start[owner]
+        return index, owner
+
+
+class MappedStore(object):
+    '''
+    A class used to open the store read-only with memory mapping.
+
+    Attributes
+    ----------
+    _path: str
+        The directory of the store.
+    _tables: dict
+        The tables opened so far, keyed by (valuation date, table name).
+
+    Methods
+    -------
+    valuation_dates()
+        Get the valuation dates in the store.
+    schedules(valuation_date)
+        Get the coupon schedules of a valuation date.
+    curves(valuation_date)
+        Get the curves of a valuation date.
+    curve(valuation_date, curve_id)
+        Get one discount-factor curve.
+    cash_flows(valuation_date, ids=None)
+        Get the stored cash flows as a CashFlows container.
+    dirty_price(valuation_date, ids, yld_perc)
+        Calculate dirty prices from the stored schedules.
+    '''
+
+    def __init__(self, path):
+        '''Constructor for MappedStore.
+
+        Parameters
+        ----------
+        path: str
+            The directory of the store.
+
+        Examples
+        --------
+        >>> store = MappedStore("/data/store")
+        >>> schedules = store.schedules(date(2020,7,15))
+        >>> schedules.row("912828ZQ6")["dates"]
+        '''
+        if not os.path.isdir(path):
+            raise Exception("store not found: " + str(path))
+        self._path = path
+        self._tables = {}
+
+    def _table(self, valuation_date, name):
+        key = (str(batch.as_dates(valuation_date)), name)
+        if key not in self._tables:
+            # resolve the symlink once, so all the arrays come from the same version of the table
+            directory = os.path.realpath(os.path.join(self._path, key[0], name))
+            if not os.path.isdir(directory):
+                raise Exception("no " + name + " for valuation date " + key[0] + ".")
+            self._tables[key] = MappedTable(directory, ENTRIES[name])
+        return self._tables[key]
+
+    def valuation_dates(self):
+        '''Get the valuation dates in the store.
+
+        Returns
+        -------
+        np.array
+            The sorted valuation dates (datetime64[D]).
+        '''
+        return np.sort(batch.as_dates([name for name in os.listdir(self._path) if not name.startswith(".")]))
+
+    def schedules(self, valuation_date):
+        '''Get the coupon schedules of a valuation date.
+
+        Returns
+        -------
+        MappedTable
+            A table with per-bond arrays "couppcd", "coupncd", "accrint" and "frequency", and
+            per-cash-flow arrays "dates", "periods" (time from the valuation date in coupon periods)
+            and "cash_flows" (regular quantities).
+        '''
+        return self._table(valuation_date, SCHEDULES)
+
+    def curves(self, valuation_date):
+        '''Get the curves of a valuation date.
+
+        Returns
+        -------
+        MappedTable
+            A table with per-point arrays "maturity" (in years) and "discount_factor".
+        '''
+        return self._table(valuation_date, CURVES)
+
+    def curve(self, valuation_date, curve_id):
+        '''Get one discount-factor curve.
+
+        Returns
+        -------
+        tuple
+            (maturity, discount_factor), read-only views of the stored arrays.
+        '''
+        row = self.curves(valuation_date).row(curve_id)
+        return row["maturity"], row["discount_factor"]
+
+    def cash_flows(self, valuation_date, ids=None):
+        '''Get the stored cash flows as a CashFlows container.
+
+        Parameters
+        ----------
+        valuation_date: datetime.date or np.datetime64
+            The valuation date.
+        ids: np.array, optional
+            The ids of the bonds. Default is None, which returns all the bonds in the order of
+            the sorted ids.
+
+        Returns
+        -------
+        CashFlows
+            The cash flows (regular quantities, times in coupon periods from the valuation date).
+            Without ids the container wraps the memory-mapped arrays without copying them.
+
+        Examples
+        --------
+        >>> store.cash_flows(date(2020,7,15), ["UST 0.625 2030"]).to_arrow()
+        '''
+        table = self.schedules(valuation_date)
+        cash_flows = CashFlows(table.indptr, table["periods"], table["cash_flows"], table["frequency"], table["dates"])
+        if ids is None:
+            return cash_flows
+        return cash_flows.take(table.rows(np.atleast_1d(ids)))
+
+    def dirty_price(self, valuation_date, ids, yld_perc):
+        '''Calculate dirty prices from the stored schedules.
+
+        Parameters
+        ----------
+        valuation_date: datetime.date or np.datetime64
+            The valuation date.
+        ids: np.array
+            The ids of the bonds.
+        yld_perc: float or np.array
+            The yield (in percent) of each bond.
+
+        Returns
+        -------
+        np.array
+            The dirty price (in percent) of each bond.
+        '''
+        return self.cash_flows(valuation_date, ids).present_value(yld_perc) * 100
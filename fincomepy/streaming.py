@@ -0,0 +1,290 @@
+'''
+Tick-by-tick yield and risk updates for a fixed set of bonds.
+
+StreamingBondPricer precomputes the cash flows and the periods (in coupon periods) of every bond
+once, for one settlement date. Each price tick then only solves the yield with Newton iterations,
+warm-started from the last yield of the bond, and recalculates the risk measures from the same
+discounted cash flows. Ticks are processed in small vectorized batches: stream takes them from a
+(synchronous) iterator, astream from an asynchronous iterator.
+'''
+import asyncio
+from itertools import islice
+import numpy as np
+from fincomepy import batch
+from fincomepy import instrumentation
+
+# analytics calculated for each tick
+FIELDS = ("price", "dirty_price", "yld", "mac_duration", "mod_duration", "DV01", "convexity")
+
+
+class StreamingBondPricer(object):
+    '''
+    A class used to update the yield and risk of bonds for each price tick.
+
+    The results match fincomepy.batch.bond_analytics for the same settlement date and prices (the
+    yields agree within the Newton tolerance).
+
+    Attributes
+    ----------
+    _index: dict
+        A dictionary which maps the id of each bond to its row.
+    _periods: np.array
+        A (bonds x periods) array with the time of each cash flow (in coupon periods).
+    _CF: np.array
+        A (bonds x periods) array with the cash flows (regular quantities), padded with 0.
+    _frequency: np.array
+        Coupon payment frequency of each bond.
+    _accrint: np.array
+        Accrued interest (in percent) of each bond.
+    _yld: np.array
+        The last yield (in percent) of each bond, used as the starting point of the next solve.
+    _tol: float
+        The tolerance of the Newton iterations.
+    _max_iter: int
+        The maximum number of Newton iterations.
+    _yld_change_perc: float
+        The yield change used to calculate modified duration.
+
+    Methods
+    -------
+    update(ids, price_perc)
+        Calculate the analytics of a batch of ticks.
+    stream(ticks, batch_size=256)
+        Yield the analytics of each tick of an iterator.
+    astream(ticks, batch_size=256)
+        Yield the analytics of each tick of an asynchronous iterator.
+    '''
+
+    def __init__(self, ids, settlement, maturity, coupon_perc, frequency, basis=1, redemption=100, tol=1e-10,
+                 max_iter=50, yld_change_perc=0.01):
+        '''Constructor for StreamingBondPricer.
+
+        Parameters
+        ----------
+        ids: list
+            The id of each bond, as used in the ticks.
+        settlement: datetime.date or np.datetime64
+            The settlement date of the prices.
+        maturity: np.array
+            Maturity dates.
+        coupon_perc: np.array
+            Coupon rates (in percent).
+        frequency: int or np.array
+            Coupon payment frequency.
+        basis: int or np.array, optional
+            Day count convention. Default is 1.
+        redemption: float or np.array, optional
+            Redemption (in percent). Default is 100.
+        tol: float, optional
+            The tolerance of the Newton iterations. Default is 1e-10.
+        max_iter: int, optional
+            The maximum number of Newton iterations. Default is 50.
+        yld_change_perc: float, optional
+            The yield change used to calculate modified duration. Default is 0.01.
+
+        Examples
+        --------
+        >>> pricer = StreamingBondPricer(["T 0.625 05/30", "T 0.25 06/25"], date(2020,7,15),
+            [date(2030,5,15), date(2025,6,30)], [0.625, 0.25], 2)
+        >>> for bond_id, analytics in pricer.stream(ticks):
+                print(bond_id, analytics["yld"], analytics["DV01"])
+        '''
+        ids = list(ids)
+        self._index = {bond_id: row for row, bond_id in enumerate(ids)}
+        if len(self._index) != len(ids):
+            raise Exception("ids should be unique.")
+        maturity = batch.as_dates(maturity)
+        settlement = np.broadcast_to(batch.as_dates(settlement), maturity.shape)
+        coupon_perc, frequency, basis, redemption = np.broadcast_arrays(np.asarray(coupon_perc, dtype=float),
+            np.asarray(frequency, dtype=np.int64), np.asarray(basis), np.asarray(redemption, dtype=float))
+        if maturity.shape != (len(ids),) or coupon_perc.shape != maturity.shape:
+            raise Exception("maturity and coupon_perc should have one element per id.")
+        pcd, ncd, nperiod = batch.schedule(settlement, maturity, frequency)
+        if (nperiod == 0).any():
+            raise Exception("every bond should mature after the settlement date.")
+        fp = batch.first_period(pcd, ncd, settlement, frequency, basis)
+        k = np.arange(int(nperiod.max()))
+        self._periods = fp[:, None] + k
+        self._CF = np.where(k < nperiod[:, None], (coupon_perc * 0.01 / frequency)[:, None], 0.0)
+        self._CF[np.arange(len(ids)), nperiod - 1] += redemption * 0.01
+        self._frequency = frequency.astype(float)
+        self._accrint = batch.accrint(pcd, ncd, settlement, coupon_perc, frequency, basis)
+        self._yld = np.maximum(coupon_perc, 0.5)
+        self._tol = tol
+        self._max_iter = max_iter
+        self._yld_change_perc = yld_change_perc
+
+    def _rows(self, ids):
+        try:
+            return np.fromiter((self._index[bond_id] for bond_id in ids), dtype=np.int64, count=len(ids))
+        except KeyError as err:
+            raise Exception("unknown bond id: " + str(err.args[0]))
+
+    @staticmethod
+    def _discounted(CF, periods, frequency, yld):
+        # CF * (1 + yld / frequency) ** -t with one exp per cash flow
+        return CF * np.exp(periods * -np.log1p(yld * 0.01 / frequency)[:, None])
+
+    def update(self, ids, price_perc):
+        '''Calculate the analytics of a batch of ticks.
+
+        Parameters
+        ----------
+        ids: list
+            The bond id of each tick.
+        price_perc: np.array
+            The clean price (in percent) of each tick. Strings are parsed with the 32nd convention,
+            see fincomepy.batch.parse_price.
+
+        Returns
+        -------
+        dict
+            A dictionary of numpy arrays with one element per tick and keys "price", "dirty_price",
+            "yld", "mac_duration", "mod_duration", "DV01" and "convexity". Ticks with an invalid price
+            (e.g. None or a malformed quote), or whose yield does not converge or falls outside
+            [0, 100], get NaN.
+        '''
+        rows = self._rows(ids)
+        if not isinstance(price_perc, np.ndarray):
+            # a list mixing numbers and quotes keeps its Python objects instead of becoming strings
+            price_perc = np.fromiter(price_perc, dtype=object, count=len(price_perc))
+        price = batch.parse_price(price_perc).reshape(rows.shape)
+        instrumentation.count("streaming.ticks", rows.size)
+        CF, periods, frequency = self._CF[rows], self._periods[rows], self._frequency[rows]
+        dirty_price = price + self._accrint[rows]
+        target = dirty_price * 0.01
+        yld = self._yld[rows]
+        active = np.isfinite(target)
+        for _ in range(self._max_iter):
+            if not active.any():
+                break
+            CF_PV = self._discounted(CF, periods, frequency, yld)
+            f = CF_PV.sum(axis=1) - target
+            fprime = -(CF_PV * periods).sum(axis=1) * 0.01 / ((1 + yld * 0.01 / frequency) * frequency)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = np.where(active, f / fprime, 0.0)
+            yld = np.maximum(yld - step, -100 * frequency + 1e-8)
+            active = active & (np.abs(step) > self._tol * np.maximum(1.0, np.abs(yld)))
+        yld = np.where(active | ~np.isfinite(target) | (yld < 0) | (yld > 100), np.nan, yld)
+        # the next tick of a bond starts from its last valid yield
+        valid = np.isfinite(yld)
+        self._yld[rows[valid]] = yld[valid]
+        CF_PV = self._discounted(CF, periods, frequency, yld)
+        s1 = (CF_PV * periods).sum(axis=1)
+        s2 = (CF_PV * periods * periods).sum(axis=1)
+        dy = self._yld_change_perc
+        price_up = self._discounted(CF, periods, frequency, yld + dy).sum(axis=1) * 100
+        price_down = self._discounted(CF, periods, frequency, yld - dy).sum(axis=1) * 100
+        mod_duration = (np.abs(price_up - dirty_price) + np.abs(price_down - dirty_price)) / 2 \
+            / dirty_price / (dy * 0.01)
+        # the convexity has the same convention as Bond.convexity
+        return {
+            "price": price,
+            "dirty_price": dirty_price,
+            "yld": yld,
+            "mac_duration": s1 / target / frequency,
+            "mod_duration": mod_duration,
+            "DV01": mod_duration * target,
+            "convexity": (s1 + s2) / target / (4 * (1 + yld * 0.01 / frequency) ** 2),
+        }
+
+    def _known(self, bond_id):
+        try:
+            return bond_id in self._index
+        except TypeError:
+            return False
+
+    def _results(self, ticks):
+        # A malformed tick, an unknown id or an invalid price gets NaN analytics instead of failing
+        # the other ticks of its batch. The prices keep their Python objects, so that a batch mixing
+        # numbers and quotes in 32nds is not converted into strings.
+        ticks = [tick if isinstance(tick, (tuple, list)) and len(tick) == 2 else (tick, None) for tick in ticks]
+        ids = [bond_id for bond_id, _ in ticks]
+        known = np.array([self._known(bond_id) for bond_id in ids], dtype=bool)
+        prices = np.fromiter((price for _, price in ticks), dtype=object, count=len(ticks))
+        res = {field: np.full(len(ticks), np.nan) for field in FIELDS}
+        if known.any():
+            update = self.update([bond_id for bond_id, ok in zip(ids, known) if ok], prices[known])
+            for field in FIELDS:
+                res[field][known] = update[field]
+        columns = [res[field].tolist() for field in FIELDS]
+        return [(bond_id, dict(zip(FIELDS, values))) for bond_id, *values in zip(ids, *columns)]
+
+    def stream(self, ticks, batch_size=256):
+        '''Yield the analytics of each tick of an iterator.
+
+        The ticks are taken from the iterator batch_size at a time and solved together, so a tick is
+        only priced once its batch is complete (or the iterator is exhausted). Use batch_size=1 for
+        the lowest latency.
+
+        Parameters
+        ----------
+        ticks: iterable
+            An iterable of (id, clean price) tuples. A malformed tick, an unknown id or an invalid
+            price gets NaN analytics.
+        batch_size: int, optional
+            Number of ticks solved together. Default is 256.
+
+        Yields
+        ------
+        tuple
+            (id, analytics), where analytics is a dictionary with the keys of update.
+        '''
+        ticks = iter(ticks)
+        while True:
+            chunk = list(islice(ticks, batch_size))
+            if not chunk:
+                return
+            yield from self._results(chunk)
+
+    async def astream(self, ticks, batch_size=256):
+        '''Yield the analytics of each tick of an asynchronous iterator.
+
+        The ticks are read by a background task. Every batch contains all ticks which have arrived
+        since the previous batch (at most batch_size), so a tick is never held back waiting for more
+        ticks, and batches grow with the tick rate.
+
+        Parameters
+        ----------
+        ticks: async iterable
+            An asynchronous iterable of (id, clean price) tuples, handled like in stream.
+        batch_size: int, optional
+            Maximum number of ticks solved together. Default is 256.
+
+        Yields
+        ------
+        tuple
+            (id, analytics), where analytics is a dictionary with the keys of update.
+
+        Examples
+        --------
+        >>> async for bond_id, analytics in pricer.astream(feed):
+                publish(bond_id, analytics["yld"])
+        '''
+        queue = asyncio.Queue()
+        done = object()
+
+        async def read():
+            try:
+                async for tick in ticks:
+                    queue.put_nowait(tick)
+            finally:
+                queue.put_nowait(done)
+
+        reader = asyncio.ensure_future(read())
+        try:
+            finished = False
+            while not finished:
+                chunk = [await queue.get()]
+                while len(chunk) < batch_size and not queue.empty():
+                    chunk.append(queue.get_nowait())
+                if chunk[-1] is done:
+                    finished = True
+                    chunk.pop()
+                if chunk:
+                    for result in self._results(chunk):
+                        yield result
+            # re-raise an error of the tick iterator
+            await reader
+        finally:
+            reader.cancel()
@@ -0,0 +1,99 @@
+'''
+Time series pricing of one bond over many valuation dates.
+
+The coupon schedule of the bond is generated once, from maturity back to the earliest valuation
+date. The previous and next coupon dates of every valuation date are found with searchsorted,
+and the analytics of all dates are calculated at once with fincomepy.batch.
+'''
+import numpy as np
+from fincomepy import batch
+
+
+def coupon_schedule(maturity, frequency, start):
+    '''Get the coupon dates of a bond from the last coupon date on or before start to maturity.
+
+    Parameters
+    ----------
+    maturity: datetime.date or np.datetime64
+        The maturity date.
+    frequency: int
+        Coupon payment frequency.
+    start: datetime.date or np.datetime64
+        The earliest date the schedule has to cover.
+
+    Returns
+    -------
+    np.array
+        The coupon dates in increasing order (datetime64[D]).
+    '''
+    maturity = batch.as_dates(maturity)
+    nperiod = batch.schedule(start, maturity, frequency)[2]
+    return batch.coupon_date(maturity, np.arange(int(nperiod), -1, -1), frequency)
+
+
+def bond_history(valuation_dates, maturity, coupon_perc, frequency, basis=1, redemption=100, price_perc=None,
+                 yld_perc=None, yld_change_perc=0.01):
+    '''Calculate the analytics of one bond on many valuation (settlement) dates.
+
+    Either the clean price or the yield on each valuation date should be given.
+
+    Parameters
+    ----------
+    valuation_dates: np.array
+        The valuation dates, used as settlement dates.
+    maturity: datetime.date or np.datetime64
+        The maturity date of the bond.
+    coupon_perc: float
+        The coupon rate (in percent).
+    frequency: int
+        Coupon payment frequency.
+    basis: int, optional
+        Day count convention. Default is 1.
+    redemption: float, optional
+        Redemption (in percent). Default is 100.
+    price_perc: np.array, optional
+        The clean price (in percent) on each valuation date. Default is None.
+    yld_perc: np.array, optional
+        The yield (in percent) on each valuation date. Default is None.
+    yld_change_perc: float, optional
+        The yield change used to calculate modified duration. Default is 0.01.
+
+    Returns
+    -------
+    dict
+        A dictionary of numpy arrays with one element per valuation date and keys "settlement",
+        "couppcd", "coupncd", "accrint", "clean_price", "dirty_price", "yld", "mac_duration",
+        "mod_duration", "DV01" and "convexity". Valuation dates on or after maturity get NaN.
+
+    Examples
+    --------
+    >>> dates = np.arange(np.datetime64("2020-07-15"), np.datetime64("2020-07-25"))
+    >>> res = bond_history(dates, maturity=date(2030,5,15), coupon_perc=0.625, frequency=2,
+            price_perc=np.full(dates.size, 100.015625))
+    >>> res["yld"][0]
+    0.6233481811...
+    '''
+    if (price_perc is None) == (yld_perc is None):
+        raise Exception("either price_perc or yld_perc should be given.")
+    settlement = batch.as_dates(valuation_dates)
+    maturity = batch.as_dates(maturity)
+    if settlement.size == 0:
+        raise Exception("valuation_dates should not be empty.")
+    coupon_dates = coupon_schedule(maturity, frequency, settlement.min())
+    # index of the next coupon date of each valuation date
+    index = np.searchsorted(coupon_dates, settlement, side="right")
+    nperiod = np.where(settlement < maturity, coupon_dates.size - index, 0)
+    pcd = coupon_dates[np.clip(index - 1, 0, coupon_dates.size - 1)]
+    ncd = coupon_dates[np.clip(index, 0, coupon_dates.size - 1)]
+    if yld_perc is not None:
+        yld_perc = np.broadcast_to(np.asarray(yld_perc, dtype=float), settlement.shape)
+    # valuation dates on or after maturity have pcd == ncd; their results are discarded below
+    with np.errstate(divide="ignore", invalid="ignore"):
+        res = batch._analytics_from_schedule(settlement, pcd, ncd, nperiod, coupon_perc, price_perc, frequency,
+                                             basis, redemption, yld_perc, yld_change_perc)
+        res["clean_price"] = res["dirty_price"] - res["accrint"]
+    expired = nperiod == 0
+    for key, values in res.items():
+        res[key] = np.where(expired, np.datetime64("NaT") if values.dtype.kind == "M" else np.nan, values)
+    res["settlement"] = settlement
+    return res
@@ -2,6 +2,9 @@ import numpy as np
 from scipy.optimize import root
 import matplotlib.pyplot as plt
 from fincomepy.fixedincome import FixedIncome
+from fincomepy import instrumentation
+from fincomepy import batch
+from fincomepy.cashflows import CashFlows
 
 class ZspreadZero(FixedIncome):
     '''
@@ -17,18 +20,27 @@ class ZspreadZero(FixedIncome):
         same as that of _reg_dict.
     _maturity: np.array
         A numpy array which contains the maturity of each zero-coupon bonds (in years). 
+    _compound : str
+        A string that is either "discrete" or "continuous". It specifies whether the zero coupon rates
+        and the z-spread are discretely or continuously compounded.
+    _table : DiscountTable
+        The discount table of the zero-coupon rates, built on first use.
 
     Methods
     -------
     get_zspread(*args, **kwargs)
         Calculate and return z-spread.
+    discount_table()
+        Get the discount table of the zero-coupon rates.
+    cash_flows()
+        Get the cash flows of the bond as a CashFlows container.
     plot_zspread(maturity=None, zero_rates_perc=None, zspread=None)
         Visualize z-spread by plotting zero-coupon rates and bond pricing rates.
     total_CF_zspread(zspread, zero_rates_regular, CF_regular, maturity)
         Calculate the total cash flow.
     '''
 
-    def __init__(self, zero_rates_perc, CF_perc, face_value_perc=100, maturity=None):
+    def __init__(self, zero_rates_perc, CF_perc, face_value_perc=100, maturity=None, compound="discrete"):
         """Constructor for ZspreadZero.
 
         Parameters
@@ -42,6 +54,9 @@ class ZspreadZero(FixedIncome):
         maturity : np.array, optional
             A numpy array which contains the maturity of each zero-coupon bonds (in years).
             Default is None.
+        compound : str, optional
+            A string that is either "discrete" or "continuous". It specifies whether the zero coupon
+            rates and the z-spread are discretely or continuously compounded. Default is "discrete".
         
         Examples
         --------
@@ -50,6 +65,10 @@ class ZspreadZero(FixedIncome):
         >>> zspr_test1 = ZspreadZero(zero_discrete, coupon_cf)  
         """
         super().__init__()
+        if compound not in ["discrete", "continuous"]:
+            raise Exception(r"compound should be either 'discrete' or 'continuous' ")
+        self._compound = compound
+        self._table = None
         self._perc_dict["zero_rates"] = zero_rates_perc
         self._perc_dict["CF"] = CF_perc
         self._perc_dict["face_value"] = face_value_perc
@@ -65,6 +84,7 @@ class ZspreadZero(FixedIncome):
             return self._perc_dict["zspread"]
         return self.get_zspread()
 
+    @instrumentation.instrument("zspread.get_zspread")
     def get_zspread(self, *args, **kwargs):
         """Calculate and return z-spread.
 
@@ -88,14 +108,56 @@ class ZspreadZero(FixedIncome):
         >>> zspr_test1.get_zspread()
         0.8071473072171145
         """
-        sol = root(lambda x: self.total_CF_zspread(x, self._reg_dict["zero_rates"], self._reg_dict["CF"], 
-                   self._maturity) - self._reg_dict["face_value"], [0.01], *args, **kwargs)
+        table = self.discount_table()
+        CF_regular = self._reg_dict["CF"]
+        face_value = self._reg_dict["face_value"]
+        # the discount table gives the present value and its derivative in one pass
+        kwargs.setdefault("jac", True)
+        if kwargs["jac"] is True:
+            def func(x):
+                PV, PV_derivative = table.present_value(x[0], CF_regular)
+                return [PV - face_value], [[PV_derivative]]
+        else:
+            def func(x):
+                return table.present_value(x[0], CF_regular)[0] - face_value
+        sol = root(func, [0.01], *args, **kwargs)
+        instrumentation.count("zspread.get_zspread.nfev", sol.nfev)
         zspread = sol.x[0]
         assert zspread >= 0 and zspread <=1
         self._reg_dict["zspread"] = zspread
         self.update_dict()
         return self._perc_dict["zspread"]
 
+    def discount_table(self):
+        '''Get the discount table of the zero-coupon rates.
+
+        The table is built once and reused by every z-spread solve, e.g. to solve the z-spreads of
+        many bonds against the same curve with DiscountTable.zspread.
+
+        Returns
+        -------
+        DiscountTable
+            The discount table.
+        '''
+        if self._table is None:
+            self._table = DiscountTable(self._perc_dict["zero_rates"], self._maturity, self._compound)
+        return self._table
+
+    def cash_flows(self):
+        '''Get the cash flows of the bond as a CashFlows container.
+
+        Returns
+        -------
+        CashFlows
+            One instrument with the cash flows (regular quantities) at the maturities (in years).
+
+        Examples
+        --------
+        >>> DiscountTable(zero_discrete, np.arange(1, 6)).zspread(zspr_test1.cash_flows())
+        '''
+        CF_regular = np.asarray(self._reg_dict["CF"], dtype=float)
+        return CashFlows([0, CF_regular.size], self._maturity, CF_regular)
+
     def plot_zspread(self, maturity=None, zero_rates_perc=None, zspread_perc=None):
         '''
         Visualize z-spread by plotting zero-coupon rates and bond pricing rates.
@@ -153,14 +215,26 @@ class ZspreadPar(ZspreadZero):
         same as that of _reg_dict.
     _compound : str
         A string that is either "discrete" or "continuous". It specifies whether discrete or continuous
-        zero coupon rate will be used.
+        zero coupon rate (and z-spread) will be used.
     _maturity: np.array
         A numpy array which contains the maturity of each zero-coupon bonds (in years). 
+    _table : DiscountTable
+        The discount table of the bootstrapped zero-coupon rates.
+    _discount_factor : np.array
+        The bootstrapped discount factors.
+    _sensitivity : np.array
+        The derivative of the z-spread with respect to each par rate.
 
     Methods
     -------
     get_zspread(*args, **kwargs)
         Calculate and return z-spread.
+    update_par_rate(i, rate_perc, *args, **kwargs)
+        Change one par rate and recalculate the z-spread.
+    par_rate_sensitivities()
+        Get the sensitivity of the z-spread to each par rate.
+    discount_table()
+        Get the discount table of the zero-coupon rates.
     plot_zspread(maturity=None, zero_rates_perc=None, zspread=None)
         Visualize z-spread by plotting zero-coupon rates and bond pricing rates.
     '''
@@ -190,6 +264,7 @@ class ZspreadPar(ZspreadZero):
         >>> zspr_test2 = ZspreadPar(par_rates, coupon_cf)
         '''
         FixedIncome.__init__(self)
+        self._table = None
         self._perc_dict["par_rates"] = par_rates_perc
         self._perc_dict["CF"] = CF_perc
         self._perc_dict["face_value"] = face_value_perc
@@ -201,6 +276,7 @@ class ZspreadPar(ZspreadZero):
         else:
             self._maturity = maturity
         self._discount_factor = None
+        self._sensitivity = None
         self.update_dict()
     
     @property
@@ -232,22 +308,287 @@ class ZspreadPar(ZspreadZero):
         >>> zspr_test2.get_zspread()
         0.8071642537725563
         """
-        # calculate discount factors
-        discount_factor = []
-        discount_factor.append(self._reg_dict["face_value"] / (self._reg_dict["face_value"] + self._reg_dict["par_rates"][0]))
-        for i in range(1, self._reg_dict["par_rates"].size):
-            df = (self._reg_dict["face_value"] - self._reg_dict["par_rates"][i] * sum(discount_factor)) / \
-                 (self._reg_dict["face_value"] + self._reg_dict["par_rates"][i])
-            discount_factor.append(df)
-        discount_factor = np.array(discount_factor)
+        self._bootstrap(0)
+        return self._solve(*args, **kwargs)
+
+    def update_par_rate(self, i, rate_perc, *args, **kwargs):
+        """Change one par rate and recalculate the z-spread.
+
+        Only the discount factors and zero-coupon rates from point i onwards are bootstrapped again,
+        since the earlier ones do not depend on the changed rate.
+
+        Parameters
+        ----------
+        i : int
+            The index of the par rate.
+        rate_perc : float
+            The new par rate (in percent).
+        *args : optional
+            Positional argument passed to scipy.optimize.root.
+        **kwargs : optional
+            Keyword argument passed to scipy.optimize.root.
+
+        Returns
+        -------
+        float
+            The calculated z-spread (in percent).
+
+        Examples
+        --------
+        >>> zspr_test2 = ZspreadPar(par_rates, coupon_cf)
+        >>> zspr_test2.get_zspread()
+        >>> zspr_test2.update_par_rate(2, 1.85)
+        """
+        par_rates = np.array(self._perc_dict["par_rates"], dtype=float)
+        if not -par_rates.size <= i < par_rates.size:
+            raise Exception("i should be the index of a par rate.")
+        i = i % par_rates.size
+        par_rates[i] = rate_perc
+        self._perc_dict["par_rates"] = par_rates
+        self._bootstrap(i if self._discount_factor is not None else 0)
+        return self._solve(*args, **kwargs)
+
+    def par_rate_sensitivities(self):
+        """Get the sensitivity of the z-spread to each par rate.
+
+        The sensitivities are calculated with the z-spread, by get_zspread and update_par_rate.
+
+        Returns
+        -------
+        np.array
+            The derivative of the z-spread with respect to each par rate (both in percent).
+
+        Examples
+        --------
+        >>> zspr_test2 = ZspreadPar(par_rates, coupon_cf)
+        >>> zspr_test2.get_zspread()
+        >>> zspr_test2.par_rate_sensitivities()
+        """
+        if self._sensitivity is None:
+            self.get_zspread()
+        return self._sensitivity
+
+    def _bootstrap(self, start):
+        '''Bootstrap the discount factors and zero-coupon rates from point start onwards.'''
+        par_rates = self._perc_dict["par_rates"]
+        face_value = self._perc_dict["face_value"]
+        if start == 0:
+            discount_factor = batch.bootstrap_discount_factors(par_rates, face_value)
+        else:
+            # the cumulative sum of the unchanged discount factors is the start of the recursion
+            discount_factor = self._discount_factor.copy()
+            discount_factor[start:] = batch.bootstrap_discount_factors(par_rates[start:], face_value,
+                                                                       discount_factor[:start].sum())
         self._discount_factor = discount_factor
+        maturity = np.broadcast_to(self._maturity, discount_factor.shape)
+        zero_rates = np.array(self._reg_dict["zero_rates"], dtype=float) if start > 0 else \
+            np.empty_like(discount_factor)
         # convert discount factors into discrete or continuous zero coupon rates
         if self._compound == "discrete":
-            self._reg_dict["zero_rates"] = (1 / discount_factor) ** (1 / self._maturity) - 1
+            zero_rates[start:] = (1 / discount_factor[start:]) ** (1 / maturity[start:]) - 1
         else:
-            self._reg_dict["zero_rates"] = -np.log(discount_factor) / self._maturity
+            zero_rates[start:] = -np.log(discount_factor[start:]) / maturity[start:]
+        self._reg_dict["zero_rates"] = zero_rates
+        self._table = None
+
+    def _solve(self, *args, **kwargs):
+        '''Solve the z-spread and its sensitivities to the par rates.'''
         # obtain zspread by calling get_zspread function in the parent class
         super().get_zspread(*args, **kwargs)
+        self._sensitivity = self._sensitivities()
         return self._perc_dict["zspread"]
 
+    def _sensitivities(self):
+        '''Differentiate the z-spread with respect to the par rates with the implicit function theorem.
+
+        The z-spread z solves PV(z, DF(c)) = face, so dz/dc_k = -(dPV/dc_k) / (dPV/dz). dPV/dc_k is
+        calculated in reverse (adjoint) mode through the bootstrap recursion
+        S_k = a_k * (S_{k-1} + 1), a_k = face / (face + c_k), where S_k = DF_1 + ... + DF_k.
+        '''
+        table = self.discount_table()
+        zspread = self._reg_dict["zspread"]
+        CF_regular = self._reg_dict["CF"]
+        face_value = self._reg_dict["face_value"]
+        par_rates = np.asarray(self._reg_dict["par_rates"], dtype=float)
+        discount_factor = self._discount_factor
+        PV_derivative = table.present_value(zspread, CF_regular)[1]
+        # the discount factor with the z-spread is DF * (1 + s / (1 + r)) ** -t (discrete) or
+        # DF * exp(-s * t) (continuous), and the zero rate r is a function of DF
+        if self._compound == "discrete":
+            x = zspread * table._inv_growth
+            weight = np.exp(-table._maturity * np.log1p(x)) / (1 + x)
+        else:
+            weight = np.exp(-zspread * table._maturity)
+        # dPV/dDF_k, then dPV/dS_k with DF_k = S_k - S_{k-1}
+        w = CF_regular * weight
+        u = w - np.append(w[1:], 0.0)
+        a = face_value / (face_value + par_rates)
+        # adjoint of the recursion: lambda_k = u_k + a_{k+1} * lambda_{k+1}, solved with cumulative products
+        product = np.cumprod(a)
+        adjoint = np.cumsum((u * product)[::-1])[::-1] / product
+        cumulative = np.cumsum(discount_factor)
+        PV_par_derivative = -adjoint * cumulative / (face_value + par_rates)
+        return -PV_par_derivative / PV_derivative
+
+
+class DiscountTable(object):
+    '''
+    A table of precomputed quantities of a zero-coupon curve, used for repeated z-spread solves.
+
+    With discrete compounding the discount factor of a cash flow at time t is
+    (1 + r + s) ** -t = DF0 * exp(-t * log(1 + s / (1 + r))), and with continuous compounding it
+    is exp(-(r + s) * t) = DF0 * exp(-s * t), where DF0 is the discount factor at a zero z-spread.
+    DF0, t and 1 / (1 + r) are computed once per curve, so every evaluation of the present value
+    and its derivative needs a single exp (and, for discrete compounding, a log1p) per cash flow.
+
+    Attributes
+    ----------
+    _maturity : np.array
+        The time of each cash flow (in years).
+    _zero_rates : np.array
+        The zero-coupon rates (regular quantities).
+    _compound : str
+        Either "discrete" or "continuous".
+    _discount_factor : np.array
+        The discount factors at a zero z-spread.
+    _inv_growth : np.array
+        1 / (1 + r) for each zero-coupon rate r (discrete compounding only).
+
+    Methods
+    -------
+    present_value(zspread, CF_regular)
+        Calculate the present value of cash flows and its derivative with respect to the z-spread.
+    zspread(CF_perc, face_value_perc=100, tol=1e-12, max_iter=100)
+        Solve the z-spreads of one or many bonds.
+    '''
 
+    def __init__(self, zero_rates_perc, maturity, compound="discrete"):
+        '''Constructor for DiscountTable.
+
+        Parameters
+        ----------
+        zero_rates_perc : np.array
+            Zero-coupon rates (in percent).
+        maturity : np.array
+            The time of each cash flow (in years).
+        compound : str, optional
+            A string that is either "discrete" or "continuous". Default is "discrete".
+
+        Examples
+        --------
+        >>> table = DiscountTable(np.array([1.0, 1.5038, 1.8085, 2.0652, 2.2199]), np.arange(1, 6))
+        >>> table.zspread(np.array([3.0, 3.0, 3.0, 3.0, 103.0]))
+        0.8071473072171...
+        '''
+        if compound not in ["discrete", "continuous"]:
+            raise Exception(r"compound should be either 'discrete' or 'continuous' ")
+        zero_rates = np.asarray(zero_rates_perc, dtype=float) * 0.01
+        self._maturity = np.asarray(maturity, dtype=float)
+        self._zero_rates = zero_rates
+        self._compound = compound
+        if compound == "discrete":
+            self._inv_growth = 1 / (1 + zero_rates)
+            self._discount_factor = np.exp(-self._maturity * np.log1p(zero_rates))
+        else:
+            self._inv_growth = None
+            self._discount_factor = np.exp(-self._maturity * zero_rates)
+
+    def present_value(self, zspread, CF_regular):
+        '''Calculate the present value of cash flows and its derivative with respect to the z-spread.
+
+        Parameters
+        ----------
+        zspread : float or np.array
+            The z-spread (regular quantity). An array has one element per row of CF_regular.
+        CF_regular : np.array
+            The cash flows (regular quantities) on the times of the table. A two-dimensional array
+            has one bond per row.
+
+        Returns
+        -------
+        tuple
+            (present value, derivative of the present value).
+        '''
+        zspread = np.expand_dims(np.asarray(zspread, dtype=float), -1)
+        if self._compound == "discrete":
+            # d/ds (1 + r + s) ** -t = -t * DF / (1 + r + s)
+            x = zspread * self._inv_growth
+            CF_PV = CF_regular * self._discount_factor * np.exp(-self._maturity * np.log1p(x))
+            derivative = -(CF_PV * self._maturity * self._inv_growth / (1 + x)).sum(axis=-1)
+        else:
+            CF_PV = CF_regular * self._discount_factor * np.exp(-zspread * self._maturity)
+            derivative = -(CF_PV * self._maturity).sum(axis=-1)
+        return CF_PV.sum(axis=-1), derivative
+
+    def zspread(self, CF_perc, face_value_perc=100, tol=1e-12, max_iter=100):
+        '''Solve the z-spreads of one or many bonds with Newton iterations.
+
+        Parameters
+        ----------
+        CF_perc : np.array or CashFlows
+            The cash flows (in percent) on the times of the table. A two-dimensional array has one
+            bond per row. A CashFlows container (regular quantities) may also be given, which returns
+            one z-spread per instrument. Its cash flows are discounted in place at the zero-coupon
+            rates interpolated at their times (in years), so they need not be on the table times.
+        face_value_perc : float or np.array, optional
+            The price (in percent) of each bond. Default is 100.
+        tol : float, optional
+            The tolerance of the Newton steps. Default is 1e-12.
+        max_iter : int, optional
+            The maximum number of Newton iterations. Default is 100.
+
+        Returns
+        -------
+        float or np.array
+            The z-spread (in percent) of each bond. Bonds whose z-spread does not converge get NaN.
+        '''
+        if isinstance(CF_perc, CashFlows):
+            return self._zspread_cash_flows(CF_perc, face_value_perc, tol, max_iter)
+        CF_regular = np.asarray(CF_perc, dtype=float) * 0.01
+        face_value = np.asarray(face_value_perc, dtype=float) * 0.01
+        zspread = np.full(np.broadcast(CF_regular[..., 0], face_value).shape, 0.01)
+        active = np.ones(zspread.shape, dtype=bool)
+        # the discount factors are undefined for 1 + r + s <= 0
+        floor = -1 / self._inv_growth.max() + 1e-12 if self._compound == "discrete" else -np.inf
+        for _ in range(max_iter):
+            if not active.any():
+                break
+            PV, derivative = self.present_value(zspread, CF_regular)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = np.where(active, (PV - face_value) / derivative, 0.0)
+            zspread = np.maximum(zspread - step, floor)
+            active = active & (np.abs(step) > tol * np.maximum(1.0, np.abs(zspread)))
+        zspread = np.where(active, np.nan, zspread) * 100
+        return zspread if zspread.ndim else float(zspread)
+
+    def _zspread_cash_flows(self, cash_flows, face_value_perc, tol, max_iter):
+        '''DiscountTable.zspread for a CashFlows container, working on its buffers.'''
+        times = cash_flows.years()
+        zero_rates = np.interp(times, self._maturity, self._zero_rates)
+        if self._compound == "discrete":
+            inv_growth = 1 / (1 + zero_rates)
+            CF_DF = cash_flows.values * np.exp(-times * np.log1p(zero_rates))
+            floor = -1 / inv_growth.max(initial=1.0) + 1e-12
+        else:
+            CF_DF = cash_flows.values * np.exp(-times * zero_rates)
+            floor = -np.inf
+        rows = cash_flows.rows()
+        face_value = np.broadcast_to(np.asarray(face_value_perc, dtype=float) * 0.01, (len(cash_flows),))
+        zspread = np.full(len(cash_flows), 0.01)
+        active = np.ones(zspread.shape, dtype=bool)
+        for _ in range(max_iter):
+            if not active.any():
+                break
+            s = zspread[rows]
+            if self._compound == "discrete":
+                x = s * inv_growth
+                CF_PV = CF_DF * np.exp(-times * np.log1p(x))
+                derivative = cash_flows.sum(-CF_PV * times * inv_growth / (1 + x))
+            else:
+                CF_PV = CF_DF * np.exp(-s * times)
+                derivative = cash_flows.sum(-CF_PV * times)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = np.where(active, (cash_flows.sum(CF_PV) - face_value) / derivative, 0.0)
+            zspread = np.maximum(zspread - step, floor)
+            active = active & (np.abs(step) > tol * np.maximum(1.0, np.abs(zspread)))
+        return np.where(active, np.nan, zspread) * 100
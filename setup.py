@@ -28,7 +28,16 @@ setup(
         'Programming Language :: Python :: 3.8',
     ],
     description="Fixed income related calculation in Python",
+    entry_points={
+        'console_scripts': [
+            'fincomepy-price=fincomepy.cli:main',
+        ],
+    },
     install_requires=requirements,
+    extras_require={
+        'arrow': ['pyarrow'],
+        'numba': ['numba'],
+    },
     license="MIT license",
     long_description=readme + '\n\n',
     include_package_data=True,
@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+import fincomepy
+from fincomepy import batch, backend, ZspreadPar
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.original = fincomepy.get_backend()
+        rng = np.random.default_rng(1)
+        n = 500
+        self.settlement = np.datetime64("2020-07-15") + rng.integers(0, 30, n).astype("timedelta64[D]")
+        self.maturity = self.settlement + rng.integers(-30, 30 * 365, n).astype("timedelta64[D]")
+        self.coupon_perc = np.round(rng.uniform(0, 6, n), 3)
+        self.price_perc = rng.uniform(80, 120, n)
+        self.frequency = rng.choice([1, 2, 4], n)
+        self.basis = rng.choice([0, 1, 2, 3, 4], n)
+
+    def tearDown(self):
+        fincomepy.set_backend(self.original)
+
+    def test_set_backend(self):
+        self.assertTrue("numpy" in backend.available_backends())
+        fincomepy.set_backend("numpy")
+        self.assertEqual(fincomepy.get_backend(), "numpy")
+        self.assertTrue(backend.kernels() is None)
+        with self.assertRaises(Exception):
+            fincomepy.set_backend("fortran")
+        if backend.numba is None:
+            with self.assertRaises(Exception):
+                fincomepy.set_backend("numba")
+
+    @unittest.skipIf(backend.numba is None, "numba is not installed")
+    def test_parity(self):
+        results = {}
+        for name in ["numpy", "numba"]:
+            fincomepy.set_backend(name)
+            res = batch.bond_analytics(self.settlement, self.maturity, self.coupon_perc, self.price_perc,
+                                       self.frequency, self.basis)
+            res["dirty_price_from_yld"] = batch.dirty_price(self.settlement, self.maturity, self.coupon_perc, 2.5,
+                                                            frequency=self.frequency, basis=self.basis)
+            res["discount_factor"] = batch.bootstrap_discount_factors(
+                np.linspace(0.5, 3.0, 40).reshape(2, 20), np.array([[100.0], [95.0]]).ravel())
+            res["discount_factor_tail"] = batch.bootstrap_discount_factors(
+                np.linspace(0.5, 3.0, 40).reshape(2, 20), 100, np.array([0.0, 2.5]))
+            res["approx_yld"], res["error_bound"] = batch.approx_yld(self.settlement, self.maturity, self.coupon_perc,
+                                                                    self.price_perc, 100, self.frequency, self.basis)
+            pcd, ncd, nperiod = batch.schedule(self.settlement, self.maturity, self.frequency)
+            fp = batch.first_period(pcd, ncd, self.settlement, self.frequency, self.basis)
+            cash_flows = batch.cash_flows_from_schedule(fp, nperiod, self.coupon_perc, 100, self.frequency)
+            res["approx_yld_from_cash_flows"], res["error_bound_from_cash_flows"] = batch.approx_yld_from_cash_flows(
+                cash_flows, res["dirty_price"])
+            results[name] = res
+        self.assertTrue(np.isfinite(results["numba"]["yld"]).sum() > 100)
+        self.assertTrue(np.isnan(results["numba"]["yld"]).sum() > 10)
+        for key, expected in results["numpy"].items():
+            value = results["numba"][key]
+            if expected.dtype.kind == "M":
+                self.assertTrue(np.array_equal(value, expected, equal_nan=True))
+            else:
+                # mod_duration and DV01 are finite differences, which amplify rounding differences
+                rtol = 1e-9 if key in ["mod_duration", "DV01"] else 1e-12
+                # the approximate yields are midpoints of brackets whose ends depend on rounding
+                atol = 1e-10 if key.startswith(("approx_yld", "error_bound")) else 0
+                self.assertTrue(np.allclose(value, expected, rtol=rtol, atol=atol, equal_nan=True), key)
+        # the classes use the batch bootstrap
+        fincomepy.set_backend("numba")
+        zspr = ZspreadPar(np.array([1.00, 1.50, 1.80, 2.05, 2.20]), np.array([3.0, 3.0, 3.0, 3.0, 103.0]))
+        self.assertAlmostEqual(zspr.get_zspread(), 0.8071642537725563, places=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
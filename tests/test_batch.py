@@ -0,0 +1,172 @@
+import unittest
+from datetime import date
+import numpy as np
+from fincomepy import Bond, Repo, BondFuture, ZspreadPar, batch
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.settlement = np.array([date(2020,7,15), date(2020,7,15), date(2020,8,31), date(2020,8,15),
+            date(2020,8,10), date(2020,7,15)], dtype="datetime64[D]")
+        self.maturity = np.array([date(2030,5,15), date(2025,6,30), date(2046,8,31), date(2046,8,31),
+            date(2046,8,15), date(2022,6,30)], dtype="datetime64[D]")
+        self.coupon = np.array([0.625, 0.25, 1.375, 1.375, 2.0, 0.125])
+        self.price = np.array([100 + 0.5 / 32, 99 + 26 / 32, 99.8, 99.8, 101.5, 99 + 30 / 32])
+
+    def test_schedule(self):
+        for frequency in [1, 2, 4, 12]:
+            pcd, ncd, nperiod = batch.schedule(self.settlement, self.maturity, frequency)
+            for i in range(self.settlement.size):
+                settlement, maturity = self.settlement[i].item(), self.maturity[i].item()
+                self.assertEqual(pcd[i].item(), Bond.couppcd(settlement, maturity, frequency, 1))
+                self.assertEqual(ncd[i].item(), Bond.coupncd(settlement, maturity, frequency, 1))
+                self.assertEqual(nperiod[i], Bond.get_nperiod(settlement, maturity, 12 / frequency))
+        _, _, nperiod = batch.schedule(date(2030,5,15), date(2030,5,15), 2)
+        self.assertEqual(nperiod, 0)
+
+    def test_day_count(self):
+        pcd, ncd, _ = batch.schedule(self.settlement, self.maturity, 2)
+        for basis in range(5):
+            accrued = batch.accrint(pcd, ncd, self.settlement, self.coupon, 2, basis)
+            first_period = batch.first_period(pcd, ncd, self.settlement, 2, basis)
+            for i in range(self.settlement.size):
+                self.assertAlmostEqual(accrued[i], Bond.accrint(pcd[i].item(), ncd[i].item(),
+                    self.settlement[i].item(), self.coupon[i], 1, 2, basis), places=12)
+                self.assertAlmostEqual(first_period[i], Bond._first_period(pcd[i].item(), ncd[i].item(),
+                    self.settlement[i].item(), 2, basis), places=12)
+
+    def test_bond_analytics(self):
+        for basis in [0, 1, 3]:
+            res = batch.bond_analytics(self.settlement, self.maturity, self.coupon, self.price, 2, basis)
+            for i in range(self.settlement.size):
+                bond_test = Bond(settlement=self.settlement[i].item(), maturity=self.maturity[i].item(),
+                    coupon_perc=self.coupon[i], price_perc=self.price[i], frequency=2, basis=basis)
+                self.assertAlmostEqual(res["accrint"][i], bond_test._perc_dict["accrint"], places=10)
+                self.assertAlmostEqual(res["mac_duration"][i], bond_test.mac_duration(), places=8)
+                self.assertAlmostEqual(res["yld"][i], bond_test._yld, places=8)
+                self.assertAlmostEqual(res["mod_duration"][i], bond_test.mod_duration(), places=6)
+                self.assertAlmostEqual(res["DV01"][i], bond_test.DV01(), places=6)
+                self.assertAlmostEqual(res["convexity"][i], bond_test.convexity(), places=5)
+        yld = batch.yld(self.settlement, self.maturity, self.coupon, self.price, basis=3)
+        dirty_price = batch.dirty_price(self.settlement, self.maturity, self.coupon, yld, basis=3)
+        self.assertTrue(np.allclose(dirty_price, res["dirty_price"], atol=1e-10))
+        res = batch.bond_analytics(self.settlement[:2], self.maturity[:2], self.coupon[:2],
+            np.array(["100-00+", "99-26"], dtype=object), 2)
+        self.assertAlmostEqual(res["yld"][0], 0.6233, places=4)
+        self.assertAlmostEqual(res["yld"][1], 0.2881, places=4)
+
+    def test_approx_yld(self):
+        # grid of coupons, maturities (3 months to 30 years), yields and frequencies
+        coupon, months, yld, frequency = [values.ravel() for values in np.meshgrid(
+            [0.0, 0.125, 1.0, 2.5, 5.0, 8.0, 12.0], [3, 7, 18, 36, 61, 119, 241, 360],
+            [0.01, 0.5, 2.0, 5.0, 10.0, 15.0], [1, 2, 4])]
+        settlement = np.full(coupon.size, np.datetime64("2020-07-15"))
+        maturity = settlement + (months * 30.4).astype("timedelta64[D]")
+        pcd, ncd, _ = batch.schedule(settlement, maturity, frequency)
+        price = batch.dirty_price(settlement, maturity, coupon, yld, 100, frequency) - \
+            batch.accrint(pcd, ncd, settlement, coupon, frequency)
+        exact = batch.yld(settlement, maturity, coupon, price, 100, frequency)
+        approx, error_bound = batch.approx_yld(settlement, maturity, coupon, price, 100, frequency)
+        self.assertTrue((error_bound <= 1e-4).all())
+        # the exact solver itself converges to a relative tolerance of 1e-12
+        self.assertTrue((np.abs(approx - exact) <= error_bound + 1e-10).all())
+        # after one or two bracketing steps the bound is reported as it is
+        for max_iter in [1, 2]:
+            approx, error_bound = batch.approx_yld(settlement, maturity, coupon, price, 100, frequency,
+                                                   max_iter=max_iter)
+            self.assertTrue((np.abs(approx - exact) <= error_bound + 1e-10).all())
+        self.assertTrue((error_bound[yld <= 5] <= 1e-4).all())
+        # the same bonds from their cash flows, without their schedules
+        pcd, ncd, nperiod = batch.schedule(settlement, maturity, frequency)
+        cash_flows = batch.cash_flows_from_schedule(batch.first_period(pcd, ncd, settlement, frequency, 1), nperiod,
+                                                    coupon, 100, frequency)
+        dirty_price = price + batch.accrint(pcd, ncd, settlement, coupon, frequency)
+        approx, error_bound = batch.approx_yld_from_cash_flows(cash_flows, dirty_price)
+        self.assertTrue((error_bound <= 1e-4).all())
+        self.assertTrue((np.abs(approx - exact) <= error_bound + 1e-10).all())
+        approx, error_bound = batch.approx_yld_from_cash_flows(cash_flows.take([0, 1]), [np.nan, -1.0])
+        self.assertTrue(np.isnan(approx).all() and np.isnan(error_bound).all())
+        approx, error_bound = batch.approx_yld(self.settlement, self.maturity, self.coupon, self.price)
+        for i in range(self.settlement.size):
+            exact = Bond.yld(self.settlement[i].item(), self.maturity[i].item(), self.coupon[i], self.price[i], 100, 2, 1)
+            self.assertLessEqual(abs(approx[i] - exact), error_bound[i] + 1e-8)
+        approx, error_bound = batch.approx_yld([date(2031,1,1)], [date(2030,5,15)], [0.625], [100])
+        self.assertTrue(np.isnan(approx[0]) and np.isnan(error_bound[0]))
+
+    def test_parse_price(self):
+        prices = [100.5, "99-16", 101, "99-30+", np.float32(98.5), None, "abc", "99-3", b"100-08", "99-32"]
+        price, valid = batch.parse_price(np.array(prices, dtype=object), return_valid=True)
+        self.assertEqual(valid.tolist(), [True, True, True, True, True, False, False, False, True, False])
+        self.assertTrue(np.allclose(price[valid], [100.5, 99.5, 101, 99 + 30.5 / 32, 98.5, 100.25]))
+        self.assertTrue(np.isnan(price[~valid]).all())
+        # a str array gives the same prices as the same quotes in an object array
+        quotes = np.array(["99-16", "99-3", "abc", "100"])
+        for array in [quotes, quotes.astype(object)]:
+            price, valid = batch.parse_price(array, return_valid=True)
+            self.assertEqual(valid.tolist(), [True, False, False, True])
+            self.assertTrue(np.allclose(price, [99.5, np.nan, np.nan, 100], equal_nan=True))
+        self.assertTrue(np.isnan(batch.parse_price(np.array([["abc"]]))).all())
+        # the other instruments are still priced
+        res = batch.bond_analytics(self.settlement[:2], self.maturity[:2], self.coupon[:2],
+            np.array(["100-00+", "abc"], dtype=object), 2)
+        self.assertAlmostEqual(res["yld"][0], 0.6233, places=4)
+        self.assertTrue(np.isnan(res["yld"][1]))
+
+    def test_invalid_input(self):
+        res = batch.bond_analytics([date(2020,7,15), date(2031,1,1)], [date(2030,5,15), date(2030,5,15)],
+            [0.625, 0.625], [100, 100], 2)
+        self.assertFalse(np.isnan(res["yld"][0]))
+        self.assertTrue(np.isnan(res["yld"][1]))
+        self.assertTrue(np.isnan(res["DV01"][1]))
+        # a matured bond gets no schedule, accrued interest or price either
+        self.assertTrue(np.isnan(res["accrint"][1]) and np.isnan(res["dirty_price"][1]))
+        self.assertTrue(np.isnat(res["couppcd"][1]) and np.isnat(res["coupncd"][1]))
+        self.assertFalse(np.isnat(res["couppcd"][0]) or np.isnan(res["dirty_price"][0]))
+
+    def test_repo_analytics(self):
+        res = batch.repo_analytics([date(2020,7,15), date(2020,7,16), date(2020,7,17)],
+            [date(2030,5,15), date(2030,5,15), date(2028,10,22)], [0.625, 0.625, 1.625],
+            [99 + 30 / 32, 99.953125, 113.321], 2, 1, 100000000, [1, 32, 276], [0.145, 0.145, 0.575],
+            np.array(["US", "US", "UK"]))
+        self.assertTrue(np.allclose(res["start_payment"], [100041100.54, 100058423.91, 113702830.60], atol=0.01))
+        self.assertTrue(np.allclose(res["end_payment"], [100041503.49, 100071320.33, 113382413.14], atol=0.01))
+        repo_test = Repo(settlement=date(2020,7,16), maturity=date(2030,5,15), coupon_perc=0.625, 
+            price_perc=99.953125, frequency=2, basis=1, 
+            bond_face_value=100000000, repo_period=32, repo_rate_perc=0.145)
+        repo_test.start_payment()
+        repo_test.end_payment()
+        self.assertAlmostEqual(res["break_even_yld"][1], repo_test.break_even_yld(), places=8)
+        self.assertEqual(res["repo_end_date"][2].item(), date(2021, 4, 19))
+
+    def test_future_analytics(self):
+        res = batch.future_analytics([date(2020,7,17), date(2020,7,17)], [date(2027,5,15), date(2027,5,15)],
+            2.375, 113.015625, 2, 1, [75, 200], 0.14, 139.4375, 0.8072)
+        for i, repo_period in enumerate([75, 200]):
+            bf_test = BondFuture(settlement=date(2020,7,17), maturity=date(2027,5,15), coupon_perc=2.375, 
+                price_perc=113.015625, frequency=2, basis=1, repo_period=repo_period, repo_rate_perc=0.14,
+                futures_pr_perc=139.4375, conversion_factor=0.8072)
+            self.assertAlmostEqual(res["forward_price"][i], bf_test.forward_price(), places=10)
+            self.assertAlmostEqual(res["full_future_val"][i], bf_test.full_future_val(), places=10)
+            self.assertAlmostEqual(res["net_basis"][i], bf_test.net_basis(), places=8)
+            self.assertAlmostEqual(res["implied_repo_rate"][i], bf_test.implied_repo_rate(), places=10)
+
+    def test_bootstrap(self):
+        par_rates = np.array([[1.00, 1.50, 1.80, 2.05, 2.20], [0.5, 0.8, 1.2, 1.5, 1.6]])
+        discount_factor = batch.bootstrap_discount_factors(par_rates)
+        for i in range(2):
+            zspr = ZspreadPar(par_rates[i], np.array([3.0, 3.0, 3.0, 3.0, 103.0]))
+            zspr.get_zspread()
+            # the loop of the original bootstrap
+            expected = []
+            for c in par_rates[i] * 0.01:
+                expected.append((1 - c * sum(expected)) / (1 + c))
+            self.assertTrue(np.allclose(discount_factor[i], expected, rtol=1e-14))
+            self.assertTrue(np.allclose(zspr._discount_factor, expected, rtol=1e-14))
+        zero = batch.zero_rates(discount_factor, np.arange(1, 6))
+        self.assertAlmostEqual(zero[0, 0], 1.0)
+        self.assertTrue(np.allclose(batch.zero_rates(discount_factor, np.arange(1, 6), "continuous"),
+                                    -np.log(discount_factor) / np.arange(1, 6) * 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from datetime import date
+import numpy as np
+from fincomepy import Bond, Repo, BondFuture, batch
+from fincomepy.calendar import HolidayCalendar, get_calendar, easter_sunday
+
+class Test(unittest.TestCase):
+
+    def test_holidays(self):
+        self.assertEqual(easter_sunday([2019, 2020, 2024]).tolist(), [date(2019,4,21), date(2020,4,12), date(2024,3,31)])
+        us = get_calendar("US")
+        self.assertEqual(us.holidays("2020-01-01", "2020-12-31").tolist(), [
+            date(2020,1,1), date(2020,1,20), date(2020,2,17), date(2020,4,10), date(2020,5,25), date(2020,7,3),
+            date(2020,9,7), date(2020,10,12), date(2020,11,11), date(2020,11,26), date(2020,12,25)])
+        # Juneteenth from 2022; New Year's Day on a Saturday is not observed on the Friday before
+        self.assertIn(date(2022,6,20), us.holidays("2022-01-01", "2022-12-31").tolist())
+        self.assertTrue(us.is_business_day(np.datetime64("2021-12-31")))
+        # one-off full closes, e.g. national days of mourning
+        closed = np.array(["2018-12-05", "2004-06-11", "2001-09-11", "2001-09-12", "2012-10-30"],
+                          dtype="datetime64[D]")
+        self.assertFalse(us.is_business_day(closed).any())
+        self.assertIn(date(2018,12,5), us.holidays("2018-01-01", "2018-12-31").tolist())
+        self.assertEqual(us.adjust(np.datetime64("2001-09-11"), "following"), np.datetime64("2001-09-13"))
+        uk = get_calendar("UK")
+        self.assertEqual(uk.holidays("2020-01-01", "2020-12-31").tolist(), [
+            date(2020,1,1), date(2020,4,10), date(2020,4,13), date(2020,5,8), date(2020,5,25), date(2020,8,31),
+            date(2020,12,25), date(2020,12,28)])
+        # Christmas Day and Boxing Day on a weekend, and one-off closures
+        self.assertEqual(uk.holidays("2021-12-01", "2021-12-31").tolist(), [date(2021,12,27), date(2021,12,28)])
+        self.assertIn(date(2022,9,19), uk.holidays("2022-01-01", "2022-12-31").tolist())
+        self.assertIs(get_calendar("US"), us)
+        with self.assertRaises(Exception):
+            get_calendar("JP")
+
+    def test_adjust(self):
+        us = get_calendar("US")
+        dates = np.array(["2020-07-04", "2020-10-31", "2021-01-01", "2020-11-26", "2021-12-31"], dtype="datetime64[D]")
+        self.assertEqual(us.adjust(dates).tolist(), [date(2020,7,6), date(2020,11,2), date(2021,1,4),
+                                                     date(2020,11,27), date(2021,12,31)])
+        self.assertEqual(us.adjust(dates, "modified_following").tolist(), [date(2020,7,6), date(2020,10,30),
+                                                                          date(2021,1,4), date(2020,11,27),
+                                                                          date(2021,12,31)])
+        self.assertEqual(us.adjust(dates, "preceding").tolist(), [date(2020,7,2), date(2020,10,30), date(2020,12,31),
+                                                                 date(2020,11,25), date(2021,12,31)])
+        self.assertEqual(us.is_business_day(dates).tolist(), [False, False, False, False, True])
+        # every adjusted date is a business day, and business days are not moved
+        days = np.arange(np.datetime64("2000-01-01"), np.datetime64("2030-01-01"))
+        for convention in ["following", "modified_following", "preceding"]:
+            adjusted = us.adjust(days, convention)
+            self.assertTrue(us.is_business_day(adjusted).all())
+            business = us.is_business_day(days)
+            self.assertTrue((adjusted[business] == days[business]).all())
+        with self.assertRaises(Exception):
+            us.adjust(dates, "nearest")
+        with self.assertRaises(Exception):
+            us.adjust(np.datetime64("2200-01-01"))
+        custom = HolidayCalendar("custom", ["2021-01-01", "2021-04-02", "2021-04-05"], 2021, 2021)
+        self.assertEqual(custom.adjust(np.datetime64("2021-04-02")), np.datetime64("2021-04-06"))
+        with self.assertRaises(Exception):
+            custom.adjust(np.datetime64("2021-01-02"), "preceding")
+
+    def test_instruments(self):
+        bond = Bond(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625,
+                    price_perc=100.015625, frequency=2, basis=1)
+        adjusted = bond.coupon_dates(calendar="US")
+        self.assertEqual(adjusted, get_calendar("US").adjust(bond.coupon_dates()).tolist())
+        # 2021-05-15 is a Saturday
+        self.assertIn(date(2021,5,17), adjusted)
+        self.assertNotIn(date(2021,5,15), adjusted)
+
+        # 2020-07-18 is a Saturday, the repo ends on Monday 2020-07-20
+        repo = Repo(settlement=date(2020,7,16), maturity=date(2030,5,15), coupon_perc=0.625, price_perc=99.953125,
+                    frequency=2, basis=1, bond_face_value=100000000, repo_period=2, repo_rate_perc=0.145, calendar="US")
+        self.assertEqual(repo._repo_end_date, date(2020,7,20))
+        expected = Repo(settlement=date(2020,7,16), maturity=date(2030,5,15), coupon_perc=0.625, price_perc=99.953125,
+                        frequency=2, basis=1, bond_face_value=100000000, repo_period=4, repo_rate_perc=0.145)
+        repo.start_payment()
+        expected.start_payment()
+        self.assertAlmostEqual(repo.end_payment(), expected.end_payment(), places=6)
+        res = batch.repo_analytics([date(2020,7,16)], [date(2030,5,15)], [0.625], [99.953125], 2, 1, [100000000],
+                                   [2], [0.145], calendar="US")
+        self.assertEqual(res["repo_end_date"][0], np.datetime64("2020-07-20"))
+        self.assertAlmostEqual(res["end_payment"][0], expected.end_payment(), places=6)
+
+        bf = BondFuture.from_end_date(settlement=date(2020,7,17), maturity=date(2027,5,15), coupon_perc=2.375,
+                                      price_perc=113.015625, frequency=2, basis=1, repo_end_date=date(2020,10,31),
+                                      repo_rate_perc=0.14, futures_pr_perc=139.4375, conversion_factor=0.8072,
+                                      calendar="US", convention="modified_following")
+        self.assertEqual(bf._repo_end_date, date(2020,10,30))
+        res = batch.future_analytics([date(2020,7,17)], [date(2027,5,15)], [2.375], [113.015625], 2, 1, [106], [0.14],
+                                     [139.4375], [0.8072], calendar="US", convention="modified_following")
+        self.assertAlmostEqual(res["net_basis"][0], bf.net_basis(), places=8)
+
+if __name__ == '__main__':
+    unittest.main()
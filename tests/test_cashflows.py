@@ -0,0 +1,115 @@
+import shutil
+import tempfile
+import unittest
+from datetime import date
+import numpy as np
+import pyarrow as pa
+from fincomepy import Bond, Portfolio, ZspreadZero, batch
+from fincomepy.cashflows import CashFlows
+from fincomepy.scenario import ScenarioEngine
+from fincomepy.store import MappedStore, write_schedules
+from fincomepy.zspread import DiscountTable
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.bonds = [
+            Bond(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625, price_perc=100.015625,
+                 frequency=2, basis=1),
+            Bond(settlement=date(2020,7,15), maturity=date(2025,6,30), coupon_perc=0.25, price_perc="99-26",
+                 frequency=2, basis=1),
+            Bond(settlement=date(2020,7,15), maturity=date(2027,3,31), coupon_perc=1.5, price_perc=104.5,
+                 frequency=1, basis=0),
+        ]
+
+    def test_container(self):
+        cash_flows = CashFlows([0, 2, 2, 5], [0.5, 1.5, 0.2, 1.2, 2.2], [0.01, 1.01, 0.03, 0.03, 1.03],
+                               frequency=[2, 1, 1])
+        self.assertEqual(len(cash_flows), 3)
+        self.assertEqual(cash_flows.rows().tolist(), [0, 0, 2, 2, 2])
+        self.assertEqual(cash_flows.row(2)["times"].tolist(), [0.2, 1.2, 2.2])
+        self.assertTrue(np.shares_memory(cash_flows.row(2)["values"], cash_flows.values))
+        self.assertEqual(cash_flows.years().tolist(), [0.25, 0.75, 0.2, 1.2, 2.2])
+        PV = cash_flows.present_value([2.0, 1.0, 3.0])
+        self.assertAlmostEqual(PV[0], 0.01 / 1.01 ** 0.5 + 1.01 / 1.01 ** 1.5)
+        self.assertEqual(PV[1], 0)
+        self.assertAlmostEqual(PV[2], sum(c / 1.03 ** t for c, t in [(0.03, 0.2), (0.03, 1.2), (1.03, 2.2)]))
+        subset = cash_flows.take([2, 0])
+        self.assertEqual(subset.offsets.tolist(), [0, 3, 5])
+        self.assertEqual(subset.frequency.tolist(), [1, 2])
+        self.assertEqual(subset.present_value([3.0, 2.0]).tolist(), PV[[2, 0]].tolist())
+        dense = CashFlows.from_dense([[3.0, 3.0, 103.0], [0.0, 0.0, 100.0]])
+        self.assertEqual(dense.to_dense([1, 2, 3]).tolist(), [[0.03, 0.03, 1.03], [0, 0, 1]])
+        with self.assertRaises(Exception):
+            dense.to_dense([1, 2])
+        with self.assertRaises(Exception):
+            CashFlows([0, 3], [1.0, 2.0], [0.5, 0.5])
+
+    def test_export(self):
+        cash_flows = batch.cash_flows_from_schedule([0.3, 0.9], [3, 2], [1.0, 2.0], 100, [2, 1],
+                                                    [date(2021,12,31), date(2022,5,15)])
+        arrays = cash_flows.to_numpy()
+        self.assertIs(arrays["values"], cash_flows.values)
+        self.assertEqual(arrays["dates"].tolist(), [date(2020,12,31), date(2021,6,30), date(2021,12,31),
+                                                    date(2021,5,15), date(2022,5,15)])
+        table = cash_flows.to_arrow()
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.column("values").type, pa.large_list(pa.float64()))
+        # the arrow arrays wrap the numpy buffers
+        values = table.column("values").chunk(0).values.to_numpy(zero_copy_only=True)
+        self.assertTrue(np.shares_memory(values, cash_flows.values))
+        restored = CashFlows.from_arrow(table)
+        self.assertTrue(np.shares_memory(restored.times, cash_flows.times))
+        for name in ["offsets", "times", "values", "frequency", "dates"]:
+            self.assertEqual(getattr(restored, name).tolist(), getattr(cash_flows, name).tolist())
+        sliced = CashFlows.from_arrow(table.slice(1))
+        self.assertEqual(sliced.offsets.tolist(), [0, 2])
+        self.assertEqual(sliced.values.tolist(), [0.02, 1.02])
+
+    def test_instruments(self):
+        portfolio = Portfolio(self.bonds, notionals=1e6)
+        cash_flows = portfolio.cash_flows()
+        self.assertTrue(np.shares_memory(cash_flows.values, portfolio.cf_matrix()[0].data))
+        for i, bond in enumerate(self.bonds):
+            own = bond.cash_flows()
+            self.assertEqual(own.dates.tolist(), sorted(bond.coupon_dates()))
+            self.assertEqual(own.dates.tolist(), cash_flows.row(i)["dates"].tolist())
+            self.assertTrue(np.allclose(own.times, cash_flows.row(i)["times"], rtol=0, atol=1e-12))
+            self.assertAlmostEqual(own.present_value(portfolio._yld[i])[0], bond._reg_dict["dirty_price"], places=12)
+        self.assertAlmostEqual(cash_flows.present_value(portfolio._yld).sum() * 1e6 / portfolio.PV(), 1, places=12)
+        # a parallel scenario reprices each bond at its yield plus the shift
+        pnl = ScenarioEngine(portfolio, [2, 10]).parallel([0.5])[0]
+        expected = (cash_flows.present_value(portfolio._yld + 0.5) - cash_flows.present_value(portfolio._yld)) * 1e6
+        self.assertTrue(np.allclose(pnl, expected, rtol=1e-12))
+
+        zero_discrete = np.array([1.0, 1.5038, 1.8085, 2.0652, 2.2199])
+        zspread = ZspreadZero(zero_discrete, np.array([3.0, 3.0, 3.0, 3.0, 103.0]))
+        table = DiscountTable(zero_discrete, np.arange(1, 6))
+        self.assertAlmostEqual(table.zspread(zspread.cash_flows())[0], zspread.get_zspread(), places=6)
+        dense = np.array([[3.0, 3.0, 3.0, 3.0, 103.0], [0.0, 0.0, 0.0, 0.0, 100.0]])
+        for compound in ["discrete", "continuous"]:
+            table = DiscountTable(zero_discrete, np.arange(1, 6), compound)
+            self.assertTrue(np.allclose(table.zspread(CashFlows.from_dense(dense), [100, 90]),
+                                        table.zspread(dense, [100, 90]), rtol=0, atol=1e-10))
+        # cash flows off the table times are discounted at interpolated zero-coupon rates
+        off_grid = CashFlows([0, 2], [1.5, 2.5], [0.02, 1.02])
+        rates = np.interp([1.5, 2.5], np.arange(1, 6), zero_discrete) * 0.01
+        zspr = table.zspread(off_grid, 99.0)[0] * 0.01
+        self.assertAlmostEqual(0.02 * np.exp(-1.5 * (rates[0] + zspr)) + 1.02 * np.exp(-2.5 * (rates[1] + zspr)),
+                               0.99, places=12)
+
+        path = tempfile.mkdtemp()
+        try:
+            write_schedules(path, date(2020,7,15), ["a", "b", "c"], [bond._maturity for bond in self.bonds],
+                            [bond._perc_dict["coupon"] for bond in self.bonds], [2, 2, 1], [1, 1, 0])
+            store = MappedStore(path)
+            stored = store.cash_flows(date(2020,7,15))
+            self.assertTrue(np.shares_memory(stored.values, store.schedules(date(2020,7,15))["cash_flows"]))
+            self.assertTrue(np.allclose(stored.values, cash_flows.values, rtol=0, atol=1e-15))
+            self.assertEqual(store.cash_flows(date(2020,7,15), ["c"]).dates.tolist(),
+                             sorted(self.bonds[2].coupon_dates()))
+        finally:
+            shutil.rmtree(path)
+
+if __name__ == '__main__':
+    unittest.main()
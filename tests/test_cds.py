@@ -1,6 +1,6 @@
 import unittest
 import numpy as np
-from fincomepy import CDS
+from fincomepy import CDS, HazardCurve, ZeroCurve
 
 class Test(unittest.TestCase):
 
@@ -15,6 +15,77 @@ class Test(unittest.TestCase):
         res2 = cds_test2.cds_spread()
         self.assertTrue(abs(res - res2).mean() < 1e-6)
 
+    def test_update_tenor(self):
+        risk_free = np.linspace(1.0, 4.0, 20)
+        risky = risk_free + np.linspace(0.5, 1.5, 20)
+        cds_test = CDS(risk_free, risky, rr_perc=40)
+        res = cds_test.cds_spread()
+        # the original bootstrap and cumulative spreads
+        df_risk_free, df_risky = [], []
+        for i in range(20):
+            df_risk_free.append((1 - risk_free[i] * 0.01 * sum(df_risk_free)) / (1 + risk_free[i] * 0.01))
+            df_risky.append((1 - risky[i] * 0.01 * sum(df_risky)) / (1 + risky[i] * 0.01))
+        self.assertTrue(np.allclose(cds_test._df_risky, df_risky, rtol=1e-13))
+        self.assertTrue(np.allclose(cds_test._survival, np.cumprod(1 - cds_test._hazard_rates), rtol=1e-13))
+
+        new_risky = risky.copy()
+        new_risky[12] = 4.5
+        updated = cds_test.update_tenor(12, 4.5)
+        expected = CDS(risk_free, new_risky, rr_perc=40)
+        self.assertTrue(np.allclose(updated, expected.cds_spread(), rtol=1e-13))
+        self.assertTrue(np.allclose(cds_test._survival, expected._survival, rtol=1e-13))
+        self.assertTrue(np.array_equal(updated[:12], res[:12]))
+        self.assertFalse(np.array_equal(updated[12:], res[12:]))
+        self.assertEqual(risky[12], risk_free[12] + np.linspace(0.5, 1.5, 20)[12])
+        with self.assertRaises(Exception):
+            cds_test.update_tenor(20, 4.5)
+
+    def test_hazard_curve(self):
+        discount_curve = ZeroCurve(np.array([1, 5, 10]), np.array([2.0, 3.0, 3.5]), "continuous")
+        tenors = np.array([1, 3, 5, 7, 10])
+        par_spreads = np.array([0.6, 0.7, 0.8, 0.85, 0.9])
+        curve = HazardCurve.bootstrap(tenors, par_spreads, discount_curve, rr_perc=40)
+        res = curve.price(tenors, par_spreads)
+        self.assertTrue(np.allclose(res["par_spread"], par_spreads, rtol=1e-10))
+        self.assertTrue(np.allclose(res["upfront"], 0, atol=1e-10))
+        # piecewise-constant hazard rates
+        survival = np.exp(-np.cumsum(curve._hazard_rates * np.diff(np.append(0, tenors))))
+        self.assertTrue(np.allclose(curve.survival_probability(tenors), survival, rtol=1e-12))
+        # the segments built during the bootstrap match a curve built at once from the hazard rates
+        rebuilt = HazardCurve(tenors, curve._hazard_rates * 100, discount_curve, rr_perc=40)
+        self.assertTrue(np.allclose(curve._log_survival, rebuilt._log_survival, rtol=0, atol=1e-13))
+        self.assertTrue(np.allclose(curve._protection, rebuilt._protection, rtol=0, atol=1e-13))
+
+        # protection leg against a brute force integral
+        times = np.linspace(0, 7, 700001)
+        mid = (times[1:] + times[:-1]) / 2
+        integral = (discount_curve.discount_factor(mid) * -np.diff(curve.survival_probability(times))).sum()
+        self.assertAlmostEqual(res["protection_leg"][3], 0.6 * integral, places=6)
+
+        # flat hazard rate: the par spread is close to hazard rate * (1 - recovery rate)
+        flat = HazardCurve(10, 2.0, discount_curve, rr_perc=40)
+        self.assertAlmostEqual(flat.price(5.0, 1.0)["par_spread"][0], 1.2, places=2)
+
+    def test_price_contracts(self):
+        discount_curve = ZeroCurve(np.array([1, 5, 10]), np.array([2.0, 3.0, 3.5]))
+        curve = HazardCurve.bootstrap(np.array([1, 3, 5, 7, 10]), np.array([0.6, 0.7, 0.8, 0.85, 0.9]),
+                                      discount_curve)
+        maturity = np.array([0.3, 2.4, 4.9, 9.95])
+        notional = np.array([1e6, -2e6, 1e6, 5e5])
+        res = curve.price(maturity, 1.0, notional)
+        for i in range(maturity.size):
+            res_i = curve.price(maturity[i], 1.0, notional[i])
+            for key in res:
+                self.assertAlmostEqual(res[key][i], res_i[key][0], places=10)
+        self.assertTrue(np.allclose(res["accrued"], [0.2, 0.1, 0.1, 0.05]))
+        self.assertTrue(np.allclose(res["MTM"], notional * res["upfront"] * 0.01))
+        # buying protection below the par spread has a positive value
+        self.assertTrue((np.sign(res["MTM"]) == np.sign(notional) * np.sign(res["par_spread"] - 1.0)).all())
+        # a contract at its par spread is worth nothing
+        self.assertTrue(np.allclose(curve.price(maturity, res["par_spread"])["MTM"], 0, atol=1e-12))
+        with self.assertRaises(Exception):
+            curve.price(10.5, 1.0)
+
 
 if __name__ == '__main__':
     unittest.main()
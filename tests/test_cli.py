@@ -0,0 +1,125 @@
+import unittest
+import os
+import tempfile
+from datetime import date
+import pandas as pd
+from fincomepy import Bond, Repo
+from fincomepy import cli
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmpdir.name, "positions.csv")
+        self.output_path = os.path.join(self.tmpdir.name, "analytics.csv")
+        pd.DataFrame({
+            "settlement": ["2020-07-15", "2020-07-15", "2020-07-15", "2020-07-15", "2020-07-15"],
+            "maturity": ["2030-05-15", "2025-06-30", "2022-06-30", "2030-05-15", "2020-01-01"],
+            "coupon_perc": [0.625, 0.25, 0.125, 0.625, 1.0],
+            "price_perc": [100 + 0.5 / 32, 99 + 26 / 32, 99 + 30 / 32, 99.5, 100],
+            "frequency": [2, 2, 2, 2, 2],
+            "bond_face_value": [100000000] * 5,
+            "repo_period": [1, 32, 32, 1, 1],
+            "repo_rate_perc": [0.145] * 5,
+        }).to_csv(self.input_path, index=False)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_bond(self):
+        nrow = cli.run(self.input_path, self.output_path, "bond", chunksize=2, workers=1, progress=False)
+        self.assertEqual(nrow, 5)
+        res = pd.read_csv(self.output_path)
+        bond_test = Bond(settlement=date(2020,7,15), maturity=date(2025,6,30), coupon_perc=0.25, 
+                 price_perc=(99+26/32), frequency=2, basis=1)
+        self.assertAlmostEqual(res["accrint"][1], bond_test._perc_dict["accrint"], places=10)
+        self.assertAlmostEqual(res["mac_duration"][1], bond_test.mac_duration(), places=8)
+        self.assertAlmostEqual(res["DV01"][1], bond_test.DV01(), places=8)
+        self.assertAlmostEqual(res["convexity"][1], bond_test.convexity(), places=6)
+        # matured bond cannot be priced but does not abort the run
+        self.assertTrue(pd.isna(res["yld"][4]))
+        self.assertTrue(isinstance(res["error"][4], str))
+        self.assertFalse(os.path.exists(self.output_path + ".checkpoint"))
+
+    def test_engine(self):
+        cli.run(self.input_path, self.output_path, "bond", workers=1, progress=False, engine="batch")
+        res_batch = pd.read_csv(self.output_path)
+        cli.run(self.input_path, self.output_path, "bond", workers=1, progress=False, engine="objects")
+        res_objects = pd.read_csv(self.output_path)
+        for col in ["accrint", "dirty_price", "yld", "mac_duration", "mod_duration", "DV01", "convexity"]:
+            self.assertTrue((abs(res_batch[col] - res_objects[col])[:4] < 1e-6).all())
+        self.assertTrue(pd.isna(res_batch["yld"][4]))
+
+    def test_repo(self):
+        cli.main([self.input_path, self.output_path, "--type", "repo", "--workers", "1", "--quiet"])
+        res = pd.read_csv(self.output_path)
+        repo_test = Repo(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625, 
+            price_perc=(100+0.5/32), frequency=2, basis=1, 
+            bond_face_value=100000000, repo_period=1, repo_rate_perc=0.145)
+        self.assertAlmostEqual(res["start_payment"][0], repo_test.start_payment(), places=4)
+        self.assertAlmostEqual(res["end_payment"][0], repo_test.end_payment(), places=4)
+
+    def test_resume(self):
+        checkpoint_dir = os.path.join(self.tmpdir.name, "ckpt")
+        cli.run(self.input_path, self.output_path, "bond", chunksize=2, workers=1, progress=False,
+            checkpoint_dir=checkpoint_dir, keep_checkpoints=True)
+        self.assertEqual(len([name for name in os.listdir(checkpoint_dir) if name.startswith("chunk_")]), 3)
+        # mark a chunk as already priced; resume keeps it instead of pricing it again
+        chunk = pd.read_csv(os.path.join(checkpoint_dir, "chunk_000000.csv"))
+        chunk["yld"] = -1.0
+        chunk.to_csv(os.path.join(checkpoint_dir, "chunk_000000.csv"), index=False)
+        os.remove(os.path.join(checkpoint_dir, "chunk_000001.csv"))
+        cli.run(self.input_path, self.output_path, "bond", chunksize=2, workers=1, progress=False,
+            checkpoint_dir=checkpoint_dir, resume=True)
+        res = pd.read_csv(self.output_path)
+        self.assertEqual(len(res), 5)
+        self.assertEqual(res["yld"][0], -1.0)
+        self.assertAlmostEqual(res["yld"][2], 0.1569, places=3)
+
+    def test_resume_mismatch(self):
+        checkpoint_dir = os.path.join(self.tmpdir.name, "ckpt")
+        cli.run(self.input_path, self.output_path, "bond", chunksize=2, workers=1, progress=False,
+            checkpoint_dir=checkpoint_dir, keep_checkpoints=True)
+        for kwargs in [{"chunksize": 3}, {"kind": "repo"}, {"engine": "objects"}]:
+            options = dict({"kind": "bond", "chunksize": 2}, **kwargs)
+            with self.assertRaises(Exception):
+                cli.run(self.input_path, self.output_path, workers=1, progress=False, checkpoint_dir=checkpoint_dir,
+                    resume=True, **options)
+        # a modified input file is not merged with the old chunks either
+        pd.read_csv(self.input_path).iloc[:3].to_csv(self.input_path, index=False)
+        with self.assertRaises(Exception):
+            cli.run(self.input_path, self.output_path, "bond", chunksize=2, workers=1, progress=False,
+                checkpoint_dir=checkpoint_dir, resume=True)
+        os.remove(os.path.join(checkpoint_dir, cli.MANIFEST))
+        with self.assertRaises(Exception):
+            cli.run(self.input_path, self.output_path, "bond", chunksize=2, workers=1, progress=False,
+                checkpoint_dir=checkpoint_dir, resume=True)
+        # without resume the checkpoint directory is started afresh
+        self.assertEqual(cli.run(self.input_path, self.output_path, "bond", chunksize=2, workers=1, progress=False,
+            checkpoint_dir=checkpoint_dir), 3)
+
+    def test_bad_quote(self):
+        df = pd.read_csv(self.input_path)
+        df["price_perc"] = df["price_perc"].astype(object)
+        df.loc[1, "price_perc"], df.loc[2, "price_perc"] = "abc", "99-16"
+        df.to_csv(self.input_path, index=False)
+        for engine in ["batch", "objects"]:
+            self.assertEqual(cli.run(self.input_path, self.output_path, "bond", chunksize=2, workers=1,
+                                     progress=False, engine=engine), 5)
+            res = pd.read_csv(self.output_path)
+            # only the row with the bad quote fails
+            self.assertTrue(pd.isna(res["yld"][1]) and isinstance(res["error"][1], str))
+            self.assertAlmostEqual(res["yld"][0], 0.6233481811, places=8)
+            self.assertAlmostEqual(res["dirty_price"][2], 99.5 + res["accrint"][2], places=10)
+            if engine == "batch":
+                self.assertEqual(res["error"][1], "invalid price quote: abc")
+                self.assertEqual(res["error"][4], "could not be priced")
+
+    def test_invalid_input(self):
+        pd.DataFrame({"settlement": ["2020-07-15"]}).to_csv(self.input_path, index=False)
+        with self.assertRaises(Exception):
+            cli.run(self.input_path, self.output_path, "bond", workers=1, progress=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import os
+import tempfile
+from datetime import date
+import numpy as np
+from fincomepy import Bond, columnar
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.columns = {
+            "settlement": np.array(["2020-07-15", "2020-07-15", "2020-07-15"], dtype="datetime64[D]"),
+            "maturity": np.array(["2030-05-15", "2025-06-30", "2022-06-30"], dtype="datetime64[D]"),
+            "coupon_perc": np.array([0.625, 0.25, 0.125]),
+            "price_perc": np.array([100 + 0.5 / 32, 99 + 26 / 32, 99 + 30 / 32]),
+            "frequency": np.array([2, 2, 2]),
+        }
+
+    def test_price_columns(self):
+        res = columnar.price_columns(self.columns)
+        self.assertEqual(list(res), columnar.OUTPUT_COLUMNS["bond"])
+        bond_test = Bond(settlement=date(2020,7,15), maturity=date(2025,6,30), coupon_perc=0.25, 
+                 price_perc=(99+26/32), frequency=2, basis=1)
+        self.assertAlmostEqual(res["mac_duration"][1], bond_test.mac_duration(), places=8)
+        with self.assertRaises(Exception):
+            columnar.price_columns({"settlement": self.columns["settlement"]})
+        with self.assertRaises(Exception):
+            columnar.price_columns(self.columns, kind="swap")
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_arrow(self):
+        table = pa.table({
+            "id": ["a", "b", "c"],
+            "settlement": pa.array([date(2020,7,15)] * 3, type=pa.date32()),
+            "maturity": pa.array([date(2030,5,15), date(2025,6,30), date(2022,6,30)], type=pa.date32()),
+            "coupon_perc": self.columns["coupon_perc"],
+            "price_perc": self.columns["price_perc"],
+            "frequency": self.columns["frequency"],
+        })
+        coupon = columnar.column_to_numpy(table.column("coupon_perc"))
+        self.assertEqual(coupon.ctypes.data, table.column("coupon_perc").chunk(0).buffers()[1].address)
+        self.assertEqual(columnar.column_to_numpy(table.column("maturity"))[0], np.datetime64("2030-05-15"))
+        res = columnar.price_table(table)
+        self.assertEqual(res.column_names, table.column_names + columnar.OUTPUT_COLUMNS["bond"])
+        expected = columnar.price_columns(self.columns)
+        self.assertTrue(np.allclose(res.column("yld").to_numpy(), expected["yld"]))
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_parquet(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_path = os.path.join(tmpdir, "positions.parquet")
+            output_path = os.path.join(tmpdir, "analytics.parquet")
+            pq.write_table(columnar.columns_to_table(self.columns), input_path)
+            nrow = columnar.price_parquet(input_path, output_path, batch_size=2)
+            self.assertEqual(nrow, 3)
+            res = pq.read_table(output_path)
+            expected = columnar.price_columns(self.columns)
+            self.assertTrue(np.allclose(res.column("convexity").to_numpy(), expected["convexity"]))
+            self.assertEqual(res.schema.field("maturity").type, pa.date32())
+
+
+if __name__ == '__main__':
+    unittest.main()
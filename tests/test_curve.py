@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+from datetime import date
+from fincomepy import Bond, ZeroCurve, ZspreadPar
+
+class Test(unittest.TestCase):
+
+    def test_curve(self):
+        curve = ZeroCurve(np.array([1, 2, 5]), np.array([1.0, 2.0, 2.5]))
+        self.assertTrue(np.allclose(curve.zero_rates([0.5, 1.5, 3.5, 10]), [0.01, 0.015, 0.0225, 0.025]))
+        self.assertAlmostEqual(curve.discount_factor(2.0), 1 / 1.02 ** 2)
+        weights = ZeroCurve.key_rate_weights([1, 2, 3.5, 5, 40], (2, 5, 10, 30))
+        self.assertTrue(np.allclose(weights.sum(axis=1), 1))
+        self.assertTrue(np.allclose(weights[2], [0.5, 0.5, 0, 0]))
+        self.assertTrue(np.allclose(weights[0], [1, 0, 0, 0]))
+        self.assertTrue(np.allclose(weights[-1], [0, 0, 0, 1]))
+        with self.assertRaises(Exception):
+            ZeroCurve([1, 2], [1.0, 2.0], compound="simple")
+        zspr = ZspreadPar(np.array([1.00, 1.50, 1.80, 2.05, 2.20]), np.array([3.0, 3.0, 3.0, 3.0, 103.0]),
+                          compound="continuous")
+        curve = ZeroCurve.from_zspread(zspr)
+        self.assertTrue(np.allclose(curve.discount_factor(zspr._maturity), zspr._discount_factor))
+
+    def test_key_rate_DV01(self):
+        bond_test = Bond(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625,
+                         price_perc=100.015625, frequency=2, basis=1)
+        key_tenors = (2, 5, 10, 30)
+        for compound in ["discrete", "continuous"]:
+            curve = ZeroCurve(np.array([1, 2, 5, 10, 30]), np.array([0.15, 0.2, 0.4, 0.7, 1.3]), compound)
+            res = bond_test.key_rate_DV01(curve, key_tenors)
+            self.assertEqual(res.shape, (4,))
+            # compare with bumping each key rate and repricing the cash flows
+            periods, CF_regular, _ = bond_test._intermediate_values()
+            times = periods / bond_test._frequency
+            weights = ZeroCurve.key_rate_weights(times, key_tenors)
+            def price(shift):
+                rates = curve.zero_rates(times) + weights @ shift
+                if compound == "discrete":
+                    return (CF_regular * (1 + rates) ** (-times)).sum()
+                return (CF_regular * np.exp(-rates * times)).sum()
+            h = 1e-6
+            for k in range(4):
+                bump = np.zeros(4)
+                bump[k] = h
+                expected = -(price(bump) - price(-bump)) / (2 * h)
+                self.assertAlmostEqual(res[k], expected, places=6)
+            self.assertEqual(res[3], 0)
+            self.assertAlmostEqual(res.sum(), bond_test.DV01(), delta=0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
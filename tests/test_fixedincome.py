@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+from fincomepy import ZspreadPar
+from fincomepy.fixedincome import FixedIncome
+
+class Test(unittest.TestCase):
+
+    def test_unit_views(self):
+        obj = FixedIncome()
+        obj._perc_dict["coupon"] = 0.625
+        obj._reg_dict["zspread"] = 0.0081
+        obj._perc_dict["rates"] = np.array([1.0, 2.0])
+        self.assertEqual(obj._perc_dict["coupon"], 0.625)
+        self.assertEqual(obj._reg_dict["coupon"], 0.625 * 0.01)
+        self.assertEqual(obj._perc_dict["zspread"], 0.0081 * 100)
+        self.assertTrue((obj._reg_dict["rates"] == np.array([1.0, 2.0]) * 0.01).all())
+        self.assertEqual(sorted(obj._reg_dict.keys()), sorted(obj._perc_dict.keys()))
+        self.assertTrue("zspread" in obj._perc_dict.keys())
+        self.assertFalse("yld" in obj._reg_dict)
+        # the converted value is cached until the quantity is assigned again
+        self.assertTrue(obj._reg_dict["rates"] is obj._reg_dict["rates"])
+        obj._reg_dict["coupon"] = 0.01
+        self.assertEqual(obj._perc_dict["coupon"], 1.0)
+        del obj._perc_dict["coupon"]
+        self.assertFalse("coupon" in obj._reg_dict)
+        self.assertEqual(len(obj._reg_dict), 2)
+
+    def test_debug(self):
+        par_rates = np.linspace(1.0, 3.0, 30)
+        coupon_cf = np.array([4.0] * 29 + [104.0])
+        FixedIncome.debug = True
+        try:
+            obj = ZspreadPar(par_rates, coupon_cf)
+            obj.get_zspread()
+            obj.update_dict()
+            obj._reg_dict._store["zspread"][2] = 1.0
+            with self.assertRaises(AssertionError):
+                obj.update_dict()
+        finally:
+            FixedIncome.debug = False
+        obj.update_dict()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import io
+import unittest
+from datetime import date
+from fincomepy import Bond, batch
+from fincomepy import instrumentation
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.enabled = instrumentation.is_enabled()
+        instrumentation.reset()
+
+    def tearDown(self):
+        if self.enabled:
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled(self):
+        instrumentation.disable()
+        Bond.yld(date(2020,7,15), date(2030,5,15), 0.625, 100.015625, 100, 2, 1)
+        with instrumentation.timer("block"):
+            pass
+        self.assertEqual(instrumentation.stats(), {"counters": {}, "timers": {}})
+
+    def test_hooks(self):
+        instrumentation.enable()
+        Bond.yld(date(2020,7,15), date(2030,5,15), 0.625, 100.015625, 100, 2, 1)
+        batch.bond_analytics([date(2020,7,15)], [date(2030,5,15)], 0.625, 100.015625, 2)
+        Bond(date(2020,7,15), date(2030,5,15), 0.625, 100.015625, 2)
+        res = instrumentation.stats()
+        self.assertTrue(res["counters"]["bond.yld.nfev"] > 0)
+        self.assertTrue(res["counters"]["batch.yld.iterations"] > 0)
+        self.assertTrue(res["counters"]["fixedincome.update_dict"] > 0)
+        self.assertEqual(res["timers"]["bond.yld"]["count"], 1)
+        self.assertTrue(res["timers"]["bond.get_nperiod"]["count"] > 0)
+        self.assertEqual(res["timers"]["batch.bond_analytics"]["count"], 1)
+        timer = res["timers"]["bond.yld"]
+        self.assertTrue(0 < timer["max"] <= timer["total"])
+        out = io.StringIO()
+        instrumentation.dump_stats(out)
+        self.assertTrue("bond.yld.nfev" in out.getvalue())
+
+    def test_prometheus(self):
+        instrumentation.enable()
+        instrumentation.count("bond.yld.nfev", 9)
+        instrumentation.observe("route.bond", 0.5)
+        instrumentation.observe("route.bond", 0.25)
+        text = instrumentation.to_prometheus()
+        self.assertTrue("# TYPE fincomepy_bond_yld_nfev_total counter\nfincomepy_bond_yld_nfev_total 9\n" in text)
+        self.assertTrue("fincomepy_route_bond_seconds_count 2\n" in text)
+        self.assertTrue("fincomepy_route_bond_seconds_sum 0.75\n" in text)
+        self.assertTrue("fincomepy_route_bond_seconds_max 0.5\n" in text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import unittest
+import numpy as np
+from fincomepy import batch
+from fincomepy.parallel import pmap, tmap
+
+
+def _scaled_sum(x, y, scale=1.0):
+    return x * scale + y
+
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 200
+        settlement = np.datetime64("2020-07-15") + rng.integers(0, 30, n).astype("timedelta64[D]")
+        maturity = settlement + rng.integers(365, 30 * 365, n).astype("timedelta64[D]")
+        coupon_perc = np.round(rng.uniform(0.125, 5.0, n), 3)
+        pcd, ncd, _ = batch.schedule(settlement, maturity, 2)
+        price_perc = batch.dirty_price(settlement, maturity, coupon_perc, rng.uniform(0.5, 5.0, n)) - \
+            batch.accrint(pcd, ncd, settlement, coupon_perc)
+        self.columns = {"settlement": settlement, "maturity": maturity, "coupon_perc": coupon_perc,
+                        "price_perc": price_perc}
+
+    def test_pmap(self):
+        expected = batch.bond_analytics(frequency=2, **self.columns)
+        for workers, chunksize in [(1, None), (2, 30), (3, None)]:
+            res = pmap(batch.bond_analytics, self.columns, workers=workers, chunksize=chunksize, frequency=2)
+            self.assertEqual(sorted(res), sorted(expected))
+            for key in expected:
+                self.assertEqual(res[key].dtype, expected[key].dtype)
+                self.assertTrue(np.array_equal(res[key], expected[key], equal_nan=True))
+        # a function returning one array, with object columns
+        x = np.arange(10.0)
+        res = pmap(_scaled_sum, {"x": x, "y": np.array(list(x), dtype=object)}, workers=2, chunksize=3, scale=2.0)
+        self.assertTrue(np.array_equal(res, 3 * x))
+        with self.assertRaises(Exception):
+            pmap(_scaled_sum, {"x": x, "y": x[:5]}, workers=2)
+
+    def test_tmap(self):
+        expected = batch.bond_analytics(frequency=2, **self.columns)
+        for threads, chunksize in [(1, None), (4, None), (3, 7)]:
+            res = tmap(batch.bond_analytics, self.columns, threads=threads, chunksize=chunksize, frequency=2)
+            for key in expected:
+                self.assertTrue(np.array_equal(res[key], expected[key], equal_nan=True))
+        x = np.arange(10.0)
+        self.assertTrue(np.array_equal(tmap(_scaled_sum, {"x": x, "y": x}, threads=3, scale=2.0), 3 * x))
+
+    def test_thread_safety(self):
+        # many threads calling the kernels on different inputs at the same time
+        expected = {}
+        for i in range(8):
+            expected[i] = batch.bond_analytics(frequency=2, **{key: values[i::8] for key, values in self.columns.items()})
+        results = {}
+        barrier = threading.Barrier(8)
+        def work(i):
+            barrier.wait()
+            for _ in range(5):
+                results[i] = batch.bond_analytics(frequency=2, **{key: values[i::8] for key, values in self.columns.items()})
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for i in range(8):
+            for key in expected[i]:
+                self.assertTrue(np.array_equal(results[i][key], expected[i][key], equal_nan=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
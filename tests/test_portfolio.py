@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+from datetime import date
+from fincomepy import Bond, BondBook, Portfolio
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.bonds = [
+            Bond(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625, price_perc=100.015625,
+                 frequency=2, basis=1),
+            Bond(settlement=date(2020,7,15), maturity=date(2025,6,30), coupon_perc=0.25, price_perc="99-26",
+                 frequency=2, basis=1),
+            Bond(settlement=date(2020,7,15), maturity=date(2027,3,31), coupon_perc=1.5, price_perc=104.5,
+                 frequency=1, basis=0),
+        ]
+        self.notionals = np.array([1e6, 2e6, 5e5])
+
+    def test_aggregates(self):
+        portfolio = Portfolio(self.bonds, self.notionals, names=["a", "b", "c"])
+        self.assertEqual(len(portfolio), 3)
+        PV = sum(n * bond._reg_dict["dirty_price"] for n, bond in zip(self.notionals, self.bonds))
+        DV01 = sum(n * bond.DV01() for n, bond in zip(self.notionals, self.bonds))
+        convexity = sum(n * bond._reg_dict["dirty_price"] * bond.convexity()
+                        for n, bond in zip(self.notionals, self.bonds)) / PV
+        self.assertAlmostEqual(portfolio.PV() / PV, 1, places=9)
+        self.assertAlmostEqual(portfolio.DV01() / DV01, 1, places=6)
+        self.assertAlmostEqual(portfolio.convexity() / convexity, 1, places=9)
+        # cash flow ladder
+        matrix, dates = portfolio.cf_matrix()
+        self.assertEqual(matrix.shape, (3, dates.size))
+        self.assertEqual(matrix[0].nnz, len(self.bonds[0].coupon_dates()))
+        ladder = portfolio.ladder("CF")
+        self.assertAlmostEqual(ladder.sum(), (self.notionals * matrix.sum(axis=1).A1).sum())
+        self.assertAlmostEqual(ladder[np.datetime64("2030-05-15")], 1e6 * (1 + 0.00625 / 2))
+        self.assertAlmostEqual(portfolio.ladder("PV").sum(), portfolio.PV())
+        with self.assertRaises(Exception):
+            portfolio.ladder("yld")
+
+    def test_incremental(self):
+        full = Portfolio(self.bonds, self.notionals)
+        portfolio = Portfolio(self.bonds[:1], self.notionals[:1])
+        portfolio.add(self.bonds[1:], self.notionals[1:], names=["b", "c"])
+        self.assertEqual(portfolio.names, [0, "b", "c"])
+        self.assertAlmostEqual(portfolio.PV(), full.PV(), places=6)
+        self.assertAlmostEqual(portfolio.DV01(), full.DV01(), places=6)
+        portfolio.remove(["b"])
+        expected = Portfolio([self.bonds[0], self.bonds[2]], self.notionals[[0, 2]])
+        self.assertEqual(len(portfolio), 2)
+        self.assertAlmostEqual(portfolio.PV(), expected.PV(), places=6)
+        self.assertAlmostEqual(portfolio.convexity(), expected.convexity(), places=9)
+        self.assertTrue(np.allclose(portfolio.ladder("CF").values, expected.ladder("CF").values))
+        with self.assertRaises(Exception):
+            portfolio.remove(["b"])
+        with self.assertRaises(Exception):
+            portfolio.add(self.bonds[0], 1e6, names=["c"])
+
+    def test_book(self):
+        book = BondBook(settlement=[date(2020,7,15)] * 2, maturity=[date(2030,5,15), date(2025,6,30)],
+                        coupon_perc=[0.625, 0.25], price_perc=[100.015625, 99.8125], frequency=2)
+        portfolio = Portfolio(book, 1e6)
+        expected = Portfolio(self.bonds[:2], 1e6)
+        self.assertAlmostEqual(portfolio.PV(), expected.PV(), places=6)
+        self.assertAlmostEqual(portfolio.DV01(), expected.DV01(), places=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
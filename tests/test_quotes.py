@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+import pyarrow as pa
+from fincomepy.bond import Bond
+from fincomepy.quotes import parse_quotes, format_quotes
+
+class Test(unittest.TestCase):
+
+    def test_parse_quotes(self):
+        quotes = np.array(["99-30+", "100-01 1/4", "99-302", "101", " 99 - 26 ", "99-30 3/4", "99-306", "99-16 1/2"])
+        price, valid = parse_quotes(quotes)
+        self.assertTrue(valid.all())
+        expected = [99 + 30.5 / 32, 100 + 1.25 / 32, 99 + 30.25 / 32, 101, 99 + 26 / 32, 99 + 30.75 / 32,
+                    99 + 30.75 / 32, 99 + 16.5 / 32]
+        self.assertTrue(np.allclose(price, expected, rtol=0, atol=1e-12))
+        for quote in ["99-30+", "101", " 99 - 26 "]:
+            self.assertAlmostEqual(parse_quotes([quote])[0][0], Bond._parse_price(quote), places=12)
+        # bytes, object and Arrow columns
+        self.assertTrue(np.allclose(parse_quotes(quotes.astype("S"))[0], expected))
+        self.assertTrue(np.allclose(parse_quotes(quotes.astype(object))[0], expected))
+        self.assertTrue(np.allclose(parse_quotes(pa.chunked_array([quotes[:3], quotes[3:]]))[0], expected))
+        self.assertTrue(np.allclose(parse_quotes(quotes.reshape(2, 4))[0], np.reshape(expected, (2, 4))))
+
+    def test_invalid_quotes(self):
+        quotes = ["99-32", "99-3", "-30", "99-30x", "99-3+", "99-301", "", "99.5", "99-30-1", "99-30 1/3", "abc"]
+        price, valid = parse_quotes(np.array(quotes))
+        self.assertFalse(valid.any())
+        self.assertTrue(np.isnan(price).all())
+        price, valid = parse_quotes(pa.array(["99-30+", None]))
+        self.assertEqual(valid.tolist(), [True, False])
+        with self.assertRaises(Exception):
+            parse_quotes(np.array([99.5]))
+
+    def test_format_quotes(self):
+        price = np.array([99 + 30.5 / 32, 100 + 1.25 / 32, 101, 99 + 30.75 / 32, np.nan])
+        self.assertEqual(format_quotes(price, 128).tolist(), ["99-30+", "100-012", "101-00", "99-306", ""])
+        self.assertEqual(format_quotes(price[:3]).tolist(), ["99-30+", "100-01", "101-00"])
+        self.assertEqual(format_quotes(price[:3], 32).tolist(), ["99-30", "100-01", "101-00"])
+        rng = np.random.default_rng(0)
+        price = np.round(rng.uniform(80, 120, 1000) * 128) / 128
+        parsed, valid = parse_quotes(format_quotes(price, 128))
+        self.assertTrue(valid.all())
+        self.assertTrue(np.array_equal(parsed, price))
+        with self.assertRaises(Exception):
+            format_quotes(price, 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+from datetime import date
+from fincomepy import Bond, BondRecord, BondBook
+
+class Test(unittest.TestCase):
+
+    def test_return_values(self):
+        record = BondRecord(settlement=date(2020,7,15), maturity=date(2025,6,30), coupon_perc=0.25, 
+                 price_perc=(99+26/32), frequency=2, basis=1)
+        bond_test = Bond(settlement=date(2020,7,15), maturity=date(2025,6,30), coupon_perc=0.25, 
+                 price_perc=(99+26/32), frequency=2, basis=1)
+        self.assertAlmostEqual(record.coupon, 0.0025, places=12)
+        self.assertAlmostEqual(record.coupon_perc, 0.25, places=12)
+        self.assertAlmostEqual(record.accrint(), bond_test._perc_dict["accrint"], places=10)
+        self.assertAlmostEqual(record.dirty_price(), bond_test._perc_dict["dirty_price"], places=10)
+        self.assertAlmostEqual(record.yld(), 0.2881, places=4)
+        res = record.analytics()
+        self.assertAlmostEqual(res["mac_duration"], bond_test.mac_duration(), places=8)
+        self.assertAlmostEqual(res["DV01"], bond_test.DV01(), places=6)
+        self.assertAlmostEqual(record.to_bond().convexity(), bond_test.convexity(), places=8)
+        record = BondRecord(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625, 
+                 price_perc="100-00+", frequency=2, basis=1)
+        self.assertAlmostEqual(record.clean_price_perc, 100 + 0.5 / 32, places=10)
+
+    def test_memory(self):
+        record = BondRecord(settlement=date(2020,7,15), maturity=date(2025,6,30), coupon_perc=0.25, 
+                 price_perc=(99+26/32), frequency=2, basis=1)
+        bond_test = Bond(settlement=date(2020,7,15), maturity=date(2025,6,30), coupon_perc=0.25, 
+                 price_perc=(99+26/32), frequency=2, basis=1)
+        self.assertFalse(hasattr(record, "__dict__"))
+        with self.assertRaises(AttributeError):
+            record.yld_cache = 1.0
+        store = bond_test._reg_dict._store
+        bond_size = sys.getsizeof(bond_test) + sys.getsizeof(bond_test.__dict__) + sys.getsizeof(store) + \
+            sum(sys.getsizeof(entry) for entry in store.values())
+        self.assertTrue(sys.getsizeof(record) * 5 < bond_size)
+        book = BondBook([date(2020,7,15)] * 1000, [date(2025,6,30)] * 1000, 0.25, 99 + 26 / 32, 2)
+        self.assertTrue(book.nbytes / len(book) * 10 < bond_size)
+
+    def test_book(self):
+        records = [BondRecord(date(2020,7,15), date(2030,5,15), 0.625, 100 + 0.5 / 32, 2),
+                   BondRecord(date(2020,7,15), date(2022,6,30), 0.125, 99 + 30 / 32, 2, basis=0)]
+        book = BondBook.from_records(records)
+        self.assertEqual(len(book), 2)
+        self.assertEqual(book[1].maturity, date(2022,6,30))
+        self.assertEqual(book[1].basis, 0)
+        res = book.analytics()
+        for i, record in enumerate(records):
+            self.assertAlmostEqual(res["yld"][i], record.yld(), places=8)
+            self.assertAlmostEqual(res["convexity"][i], record.analytics()["convexity"], places=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from datetime import date
+from fincomepy import Bond, Portfolio, ScenarioEngine
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.bonds = [
+            Bond(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625, price_perc=100.015625,
+                 frequency=2, basis=1),
+            Bond(settlement=date(2020,7,15), maturity=date(2025,6,30), coupon_perc=0.0, price_perc=98.5,
+                 frequency=2, basis=1),
+            Bond(settlement=date(2020,7,15), maturity=date(2045,3,31), coupon_perc=2.5, price_perc=104.5,
+                 frequency=1, basis=0),
+        ]
+        self.notionals = np.array([1e6, 2e6, 5e5])
+        self.portfolio = Portfolio(self.bonds, self.notionals)
+
+    def test_parallel(self):
+        engine = ScenarioEngine(self.portfolio, tenors=[2, 5, 10, 30])
+        shifts = np.array([-0.1, 0.0, 0.1, 0.5])
+        pnl = engine.parallel(shifts)
+        self.assertEqual(pnl.shape, (4, 3))
+        for i, bond in enumerate(self.bonds):
+            yld = bond.yld(bond._settlement, bond._maturity, bond._perc_dict["coupon"], bond._perc_dict["clean_price"],
+                           bond._redemption, bond._frequency, bond._basis)
+            for s, shift in enumerate(shifts):
+                dirty_price = Bond.dirty_price(bond._settlement, bond._maturity, bond._perc_dict["coupon"], yld + shift,
+                                               bond._redemption, bond._frequency, bond._basis)
+                expected = (dirty_price - bond._perc_dict["dirty_price"]) * 0.01 * self.notionals[i]
+                self.assertAlmostEqual(pnl[s, i], expected, places=4)
+            # the duration-convexity approximation is close for a small shift (Bond.convexity assumes
+            # semi-annual coupons)
+            if bond._frequency == 2:
+                self.assertAlmostEqual(pnl[2, i] / self.notionals[i] * 100, bond.price_change(0.1), places=3)
+        self.assertTrue(np.allclose(engine.parallel(shifts, aggregate=True), pnl.sum(axis=1)))
+
+    def test_chunks(self):
+        shocks = np.random.default_rng(0).normal(0, 0.2, (50, 4))
+        engine = ScenarioEngine(self.portfolio, tenors=[2, 5, 10, 30])
+        small = ScenarioEngine(self.portfolio, tenors=[2, 5, 10, 30], max_chunk_bytes=1)
+        self.assertTrue(len(list(small._chunks(50))) == 3)
+        self.assertTrue(np.allclose(engine.run(shocks), small.run(shocks), rtol=1e-12))
+        self.assertTrue(np.allclose(engine.run(shocks, aggregate=True), small.run(shocks, aggregate=True)))
+        # a shock at the 30y point only moves the long bond
+        pnl = engine.run(np.array([[0, 0, 0, 0.1]]))
+        self.assertTrue(np.all(pnl[0, :2] == 0))
+        self.assertTrue(pnl[0, 2] < 0)
+        with self.assertRaises(Exception):
+            engine.run(np.zeros((2, 3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import threading
+import unittest
+from datetime import date
+import numpy as np
+from fincomepy import batch, CDS, ZspreadPar
+from fincomepy.service import MicroBatcher, PricingService, Coalescer, SyncPricingService, create_asgi_app, \
+    price_bonds, _Request
+
+BOND = {"settlement": "2020-07-15", "maturity": "2030-05-15", "coupon_perc": 0.625, "price_perc": 100.015625,
+        "frequency": 2}
+REPO = dict(BOND, basis=1, bond_face_value=1e6, repo_period=30, repo_rate_perc=0.1)
+FUTURE = dict(BOND, basis=1, repo_period=60, repo_rate_perc=0.1, futures_pr_perc=138.5, conversion_factor=0.7226)
+
+
+async def call(app, method, path, payload=None):
+    '''Send one request to an ASGI app, return (status, body).'''
+    body = b"" if payload is None else json.dumps(payload).encode()
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app({"type": "http", "method": method, "path": path}, receive, send)
+    return sent[0]["status"], b"".join(message.get("body", b"") for message in sent[1:])
+
+
+class Test(unittest.TestCase):
+
+    def test_price_bonds(self):
+        price = np.array([100.015625, 99.5])
+        res = asyncio.run(price_bonds(["2020-07-15"] * 2, ["2030-05-15"] * 2, [0.625] * 2, price, 2))
+        ref = batch.bond_analytics(["2020-07-15"] * 2, ["2030-05-15"] * 2, [0.625] * 2, price, 2)
+        self.assertTrue(np.allclose(res["yld"], ref["yld"]))
+
+    def test_coalescing(self):
+        calls = []
+
+        def func(**columns):
+            calls.append(len(columns["price_perc"]))
+            return batch.bond_analytics(**columns)
+
+        batcher = MicroBatcher(func, window=0.01, max_batch=64)
+        price = 99 + np.arange(100) / 50
+
+        async def run():
+            return await asyncio.gather(*[batcher.submit(dict(BOND, price_perc=pr)) for pr in price])
+
+        res = asyncio.run(run())
+        self.assertEqual(calls, [64, 36])
+        ref = batch.bond_analytics([BOND["settlement"]] * 100, [BOND["maturity"]] * 100, 0.625, price, 2)
+        self.assertTrue(np.allclose([row["yld"] for row in res], ref["yld"], rtol=1e-12))
+        self.assertEqual(res[0]["couppcd"], date(2020,5,15))
+
+    def test_invalid_rows(self):
+        calls = []
+
+        def func(**columns):
+            calls.append(len(columns["price_perc"]))
+            if (np.asarray(columns["price_perc"]) < 0).any():
+                raise Exception("negative price")
+            return batch.bond_analytics(**columns)
+
+        # a failing batch is split in halves, not run row by row
+        batcher = MicroBatcher(func, window=0.01, max_batch=64)
+        price = 99 + np.arange(64) / 50
+        price[37] = -1
+
+        async def run():
+            return await asyncio.gather(*[batcher.submit(dict(BOND, price_perc=pr)) for pr in price],
+                                        return_exceptions=True)
+
+        res = asyncio.run(run())
+        self.assertIsInstance(res[37], Exception)
+        self.assertTrue(all(isinstance(row, dict) for i, row in enumerate(res) if i != 37))
+        self.assertEqual(len(calls), 13)
+        calls.clear()
+        requests = [_Request(dict(BOND, price_perc=pr)) for pr in price]
+        Coalescer(func)._run_batch(requests)
+        self.assertEqual([request.error is not None for request in requests], [i == 37 for i in range(64)])
+        self.assertEqual(len(calls), 13)
+
+        # invalid arguments fail before the request joins a batch
+        service = PricingService(window=0.001)
+        for terms in [dict(BOND, settlement="2020-13-45"), dict(BOND, maturity=None), dict(BOND, price_perc="99-32"),
+                      dict(BOND, price_perc=None), dict(BOND, frequency=5), dict(BOND, frequency=2.5),
+                      dict(BOND, coupon_perc="abc"), dict(BOND, basis=7)]:
+            with self.assertRaises(Exception):
+                asyncio.run(service.price_bond(**terms))
+        res = asyncio.run(service.price_bond(**dict(BOND, settlement=date(2020,7,15), frequency=2.0)))
+        self.assertAlmostEqual(res["yld"], 0.6233481811, places=8)
+
+    def test_service(self):
+        service = PricingService(window=0.005)
+
+        async def run():
+            return await asyncio.gather(service.price_bond(**BOND), service.price_bond(**dict(BOND, price_perc="99-16")),
+                                        service.price_bond(**dict(BOND, price_perc="bad")), service.price_repo(**REPO),
+                                        service.price_bond_future(**FUTURE), service.price("bond", coupon_perc=1.0),
+                                        service.price("swap"), return_exceptions=True)
+
+        bond, quoted, bad, repo, future, missing, unknown = asyncio.run(run())
+        self.assertAlmostEqual(bond["yld"], 0.6233481811, places=8)
+        self.assertAlmostEqual(quoted["dirty_price"], 99.5 + bond["accrint"], places=10)
+        for error in [bad, missing, unknown]:
+            self.assertIsInstance(error, Exception)
+        ref = batch.repo_analytics(*[[REPO[name]] for name in ["settlement", "maturity", "coupon_perc", "price_perc",
+                                   "frequency", "basis", "bond_face_value", "repo_period", "repo_rate_perc"]])
+        self.assertAlmostEqual(repo["end_payment"], ref["end_payment"][0], places=6)
+        self.assertTrue(np.isfinite(future["implied_repo_rate"]))
+
+        cds = asyncio.run(service.cds_spread([5.0] * 10, [5.95] * 10, 100, 50))
+        self.assertTrue(np.allclose(cds, CDS(np.array([5.0] * 10), np.array([5.95] * 10), 100, 50).cds_spread()))
+        zspread = asyncio.run(service.zspread_par([1.00, 1.50, 1.80, 2.05, 2.20], [3.0, 3.0, 3.0, 3.0, 103.0]))
+        self.assertAlmostEqual(zspread, ZspreadPar(np.array([1.00, 1.50, 1.80, 2.05, 2.20]),
+                               np.array([3.0, 3.0, 3.0, 3.0, 103.0])).get_zspread(), places=10)
+
+    def test_asgi(self):
+        app = create_asgi_app(PricingService(window=0.001))
+
+        async def run():
+            return await asyncio.gather(call(app, "POST", "/bond", BOND), call(app, "POST", "/bond", [BOND, BOND]),
+                call(app, "POST", "/repo", REPO), call(app, "POST", "/bond", dict(BOND, maturity="2020-01-01")),
+                call(app, "POST", "/bond", {"coupon_perc": 1}), call(app, "POST", "/cds",
+                {"risk_free_perc": [5.0] * 3, "risky_perc": [5.95] * 3}), call(app, "GET", "/metrics"),
+                call(app, "GET", "/bond"), call(app, "POST", "/unknown", {}))
+
+        res = asyncio.run(run())
+        status = [item[0] for item in res]
+        self.assertEqual(status, [200, 200, 200, 200, 400, 200, 200, 405, 404])
+        single, many, repo, expired, _, cds = [json.loads(item[1]) for item in res[:6]]
+        self.assertAlmostEqual(single["yld"], 0.6233481811, places=8)
+        self.assertEqual(single["couppcd"], "2020-05-15")
+        self.assertEqual(len(many), 2)
+        self.assertIn("break_even_yld", repo)
+        self.assertIsNone(expired["yld"])
+        self.assertEqual(len(cds["cds_spread"]), 3)
+
+    def test_threads(self):
+        calls = []
+
+        def func(**columns):
+            calls.append(len(columns["price_perc"]))
+            return batch.bond_analytics(**columns)
+
+        coalescer = Coalescer(func, window=0.5, max_batch=8)
+        price = 99 + np.arange(24) / 50
+        res = [None] * price.size
+
+        def submit(i):
+            res[i] = coalescer.submit(dict(BOND, price_perc=price[i]))
+
+        threads = [threading.Thread(target=submit, args=(i,)) for i in range(price.size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # full batches run without waiting for the window
+        self.assertEqual(calls, [8, 8, 8])
+        ref = batch.bond_analytics([BOND["settlement"]] * 24, [BOND["maturity"]] * 24, 0.625, price, 2)
+        self.assertTrue(np.allclose([row["yld"] for row in res], ref["yld"], rtol=1e-12))
+
+        service = SyncPricingService(window=0.001)
+        self.assertAlmostEqual(service.price("bond", **BOND)["yld"], 0.6233481811, places=8)
+        self.assertAlmostEqual(service.price("repo", **REPO)["start_payment"], 1e6 * 100.11922554347827 * 0.01,
+                               places=4)
+        many = service.price_many("bond", [BOND, dict(BOND, price_perc="99-16")])
+        self.assertAlmostEqual(many[1]["dirty_price"], 99.5 + many[0]["accrint"], places=10)
+        with self.assertRaises(Exception):
+            service.price("bond", **dict(BOND, price_perc="bad"))
+        with self.assertRaises(Exception):
+            service.price("bond", coupon_perc=1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
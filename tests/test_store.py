@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+import numpy as np
+from fincomepy import batch, Bond
+from fincomepy.store import MappedStore, write_schedules, write_curves
+from fincomepy.zspread import ZspreadPar
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.ids = ["C", "A", "B"]
+        self.maturity = [date(2050,5,15), date(2030,5,15), date(2025,6,30)]
+        self.coupon = np.array([1.25, 0.625, 0.25])
+        write_schedules(self.path, date(2020,7,15), self.ids, self.maturity, self.coupon, 2)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_schedules(self):
+        store = MappedStore(self.path)
+        self.assertEqual(store.valuation_dates().tolist(), [date(2020,7,15)])
+        table = store.schedules(date(2020,7,15))
+        self.assertEqual(table.ids.tolist(), ["A", "B", "C"])
+        self.assertIsInstance(table["cash_flows"], np.memmap)
+        self.assertFalse(table["cash_flows"].flags.writeable)
+        bond = Bond(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625,
+                    price_perc=100.015625, frequency=2, basis=1)
+        row = table.row("A")
+        self.assertEqual(row["dates"].tolist(), sorted(bond.coupon_dates()))
+        self.assertAlmostEqual(row["cash_flows"][-1], 1 + 0.00625 / 2)
+        self.assertAlmostEqual(table["accrint"][table.rows(["A"])[0]], bond._perc_dict["accrint"])
+        with self.assertRaises(Exception):
+            table.rows(["D"])
+        with self.assertRaises(Exception):
+            table.rows(["AA"])
+        with self.assertRaises(Exception):
+            store.schedules(date(2020,7,16))
+
+    def test_dirty_price(self):
+        store = MappedStore(self.path)
+        price = np.array([97.5, 100.015625, 99.8125])
+        ref = batch.bond_analytics([date(2020,7,15)] * 3, self.maturity, self.coupon, price, 2)
+        res = store.dirty_price(date(2020,7,15), self.ids, ref["yld"])
+        self.assertTrue(np.allclose(res, ref["dirty_price"], rtol=1e-10))
+
+    def test_curves(self):
+        zspr = ZspreadPar(np.array([1.00, 1.50, 1.80, 2.05, 2.20]), np.array([3.0, 3.0, 3.0, 3.0, 103.0]))
+        zspr.get_zspread()
+        write_curves(self.path, date(2020,7,15), {"USD": (zspr._maturity, zspr._discount_factor),
+                                                  "EUR": ([0.5, 1.0], [0.999, 0.997])})
+        # rewriting a table replaces it
+        write_schedules(self.path, date(2020,7,15), ["A"], [date(2030,5,15)], [0.625], 2)
+        store = MappedStore(self.path)
+        maturity, discount_factor = store.curve(date(2020,7,15), "USD")
+        self.assertTrue(np.array_equal(maturity, zspr._maturity))
+        self.assertIsInstance(discount_factor, np.memmap)
+        self.assertTrue(np.array_equal(discount_factor, zspr._discount_factor))
+        self.assertEqual(store.curve("2020-07-15", "EUR")[1].tolist(), [0.999, 0.997])
+        self.assertEqual(len(store.schedules(date(2020,7,15))), 1)
+        self.assertEqual(sorted(name for name in os.listdir(os.path.join(self.path, "2020-07-15"))
+                                if not name.startswith(".")), ["curves", "schedules"])
+        with self.assertRaises(Exception):
+            write_curves(self.path, date(2020,7,15), {"USD": ([0.5, 1.0], [0.999])})
+        with self.assertRaises(Exception):
+            MappedStore(os.path.join(self.path, "missing"))
+
+    def test_rewrite(self):
+        store = MappedStore(self.path)
+        old = store.schedules(date(2020,7,15))
+        link = os.path.join(self.path, "2020-07-15", "schedules")
+        for coupon in [0.5, 0.75]:
+            write_schedules(self.path, date(2020,7,15), ["A"], [date(2030,5,15)], [coupon], 2)
+            # the table is switched by replacing a symlink, so it never disappears
+            self.assertTrue(os.path.islink(link))
+        # a table opened before the rewrite keeps reading its own version
+        self.assertEqual(old.ids.tolist(), ["A", "B", "C"])
+        self.assertEqual(MappedStore(self.path).schedules(date(2020,7,15)).ids.tolist(), ["A"])
+        self.assertAlmostEqual(MappedStore(self.path).schedules(date(2020,7,15)).row("A")["cash_flows"][-1],
+                               1 + 0.0075 / 2)
+        # only the current and the previous versions are kept
+        self.assertEqual(len([name for name in os.listdir(os.path.dirname(link)) if name.startswith(".schedules-")]), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from datetime import date
+import numpy as np
+from fincomepy import batch, Bond
+from fincomepy.streaming import StreamingBondPricer
+
+class Test(unittest.TestCase):
+
+    def setUp(self):
+        self.ids = ["A", "B", "C"]
+        self.maturity = [date(2030,5,15), date(2025,6,30), date(2050,5,15)]
+        self.coupon = np.array([0.625, 0.25, 1.25])
+        self.pricer = StreamingBondPricer(self.ids, date(2020,7,15), self.maturity, self.coupon, 2)
+
+    def test_update(self):
+        price = np.array([100.015625, 99.8125, 97.5])
+        res = self.pricer.update(self.ids, price)
+        ref = batch.bond_analytics([date(2020,7,15)] * 3, self.maturity, self.coupon, price, 2)
+        for key in ["dirty_price", "yld", "mac_duration", "mod_duration", "DV01", "convexity"]:
+            self.assertTrue(np.allclose(res[key], ref[key], rtol=1e-9), key)
+        bond = Bond(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625,
+                    price_perc="100-00+", frequency=2, basis=1)
+        res = self.pricer.update(["A"], ["100-00+"])
+        self.assertAlmostEqual(res["DV01"][0], bond.DV01(), places=8)
+        self.assertAlmostEqual(res["yld"][0], Bond.yld(settlement=date(2020,7,15), maturity=date(2030,5,15),
+                               rate=0.625, pr=100 + 0.5 / 32, redemption=100, frequency=2, basis=1), places=8)
+        # warm start from the last yield
+        self.assertAlmostEqual(self.pricer._yld[0], res["yld"][0], places=12)
+
+    def test_invalid_ticks(self):
+        res = self.pricer.update(["A", "B"], [np.nan, 500.0])
+        self.assertTrue(np.isnan(res["yld"]).all())
+        self.assertTrue((self.pricer._yld[:2] == np.maximum(self.coupon[:2], 0.5)).all())
+        with self.assertRaises(Exception):
+            self.pricer.update(["D"], [100.0])
+        # mixed floats and quotes, None and garbage only fail their own ticks
+        res = self.pricer.update(["A", "B", "C", "A"], [100.015625, "99-26", None, "abc"])
+        self.assertTrue(np.isfinite(res["yld"][:2]).all() and np.isnan(res["yld"][2:]).all())
+        self.assertAlmostEqual(res["price"][1], 99 + 26 / 32)
+        ticks = [("A", 100.015625), ("B", "99-26"), ("C", None), ("A", "abc"), ("D", 100.0), ("B",), None,
+                 ("C", 97.5)]
+        res = list(self.pricer.stream(ticks, batch_size=8))
+        self.assertEqual([bond_id for bond_id, _ in res], ["A", "B", "C", "A", "D", ("B",), None, "C"])
+        valid = [np.isfinite(analytics["yld"]) for _, analytics in res]
+        self.assertEqual(valid, [True, True, False, False, False, False, False, True])
+        self.assertTrue(all(np.isnan(value) for value in res[4][1].values()))
+
+        async def feed():
+            for tick in ticks:
+                yield tick
+
+        async def collect():
+            return [result async for result in self.pricer.astream(feed(), batch_size=8)]
+
+        self.assertEqual([np.isfinite(analytics["yld"]) for _, analytics in asyncio.run(collect())], valid)
+        with self.assertRaises(Exception):
+            StreamingBondPricer(["A", "A"], date(2020,7,15), self.maturity[:2], self.coupon[:2], 2)
+
+    def test_stream(self):
+        rng = np.random.default_rng(0)
+        ticks = [(self.ids[i], 99 + rng.normal()) for i in rng.integers(0, 3, 100)]
+        expected = [StreamingBondPricer(self.ids, date(2020,7,15), self.maturity, self.coupon, 2).update(
+                    [bond_id], [price])["yld"][0] for bond_id, price in ticks]
+        res = list(self.pricer.stream(iter(ticks), batch_size=7))
+        self.assertEqual([bond_id for bond_id, _ in res], [bond_id for bond_id, _ in ticks])
+        self.assertTrue(np.allclose([analytics["yld"] for _, analytics in res], expected, rtol=1e-9))
+        self.assertAlmostEqual(res[0][1]["price"], ticks[0][1])
+
+        async def feed():
+            for tick in ticks:
+                await asyncio.sleep(0)
+                yield tick
+
+        async def collect():
+            return [result async for result in self.pricer.astream(feed(), batch_size=16)]
+
+        res = asyncio.run(collect())
+        self.assertEqual(len(res), len(ticks))
+        self.assertTrue(np.allclose([analytics["yld"] for _, analytics in res], expected, rtol=1e-9))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+from datetime import date
+from fincomepy import Bond, batch
+from fincomepy.timeseries import bond_history, coupon_schedule
+
+class Test(unittest.TestCase):
+
+    def test_coupon_schedule(self):
+        dates = coupon_schedule(date(2030,5,15), 2, date(2020,7,15))
+        self.assertEqual(dates[0], np.datetime64("2020-05-15"))
+        self.assertEqual(dates[-1], np.datetime64("2030-05-15"))
+        self.assertEqual(dates.size, 21)
+        bond_test = Bond(settlement=date(2020,7,15), maturity=date(2030,5,15), coupon_perc=0.625,
+                         price_perc=100.015625, frequency=2)
+        self.assertEqual(list(dates[1:]), sorted(np.datetime64(d) for d in bond_test.coupon_dates()))
+        # end-of-month maturity
+        dates = coupon_schedule(date(2025,6,30), 2, date(2020,7,15))
+        self.assertEqual(dates[1], np.datetime64("2020-12-31"))
+
+    def test_bond_history(self):
+        dates = np.arange(np.datetime64("2015-01-01"), np.datetime64("2025-07-05"))
+        maturity = np.datetime64("2025-06-30")
+        price = np.linspace(95, 105, dates.size)
+        for basis in [0, 1, 3]:
+            res = bond_history(dates, maturity, 2.5, 2, basis, price_perc=price)
+            expected = batch.bond_analytics(dates, maturity, 2.5, price, 2, basis)
+            live = dates < maturity
+            self.assertTrue(np.isnan(res["yld"][~live]).all())
+            self.assertTrue(np.isnat(res["couppcd"][~live]).all())
+            for key in ["couppcd", "coupncd"]:
+                self.assertTrue((res[key][live] == expected[key][live]).all())
+            for key in ["accrint", "dirty_price", "yld", "mac_duration", "mod_duration", "DV01", "convexity"]:
+                self.assertTrue(np.allclose(res[key][live], expected[key][live], rtol=1e-12, atol=0, equal_nan=True))
+            self.assertTrue(np.allclose(res["clean_price"][live], price[live]))
+        bond_test = Bond(settlement=date(2020,7,15), maturity=date(2025,6,30), coupon_perc=2.5, price_perc=101,
+                         frequency=2)
+        i = np.searchsorted(dates, np.datetime64("2020-07-15"))
+        res = bond_history(dates, maturity, 2.5, 2, price_perc=101)
+        self.assertAlmostEqual(res["yld"][i], Bond.yld(date(2020,7,15), date(2025,6,30), 2.5, 101, 100, 2, 1), places=8)
+        self.assertAlmostEqual(res["convexity"][i], bond_test.convexity(), places=8)
+        # from yields
+        res2 = bond_history(dates, maturity, 2.5, 2, yld_perc=res["yld"])
+        valid = np.isfinite(res["yld"])
+        self.assertTrue(valid.sum() > 1000)
+        self.assertTrue(np.allclose(res2["clean_price"][valid], 101))
+        with self.assertRaises(Exception):
+            bond_history(dates, maturity, 2.5, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import numpy as np
 from fincomepy import ZspreadZero, ZspreadPar
+from fincomepy.zspread import DiscountTable
 
 class Test(unittest.TestCase):
 
@@ -51,6 +52,75 @@ class Test(unittest.TestCase):
         with self.assertRaises(Exception):
             ZspreadPar(par_rates, coupon_cf, compound="unknown")
 
+    def test_discount_table(self):
+        zero_discrete = np.array([1.0, 1.5038, 1.8085, 2.0652, 2.2199])
+        coupon_cf = np.array([3.0, 3.0, 3.0, 3.0, 103.0])
+        maturity = np.arange(1, 6)
+        table = DiscountTable(zero_discrete, maturity)
+        PV, PV_derivative = table.present_value(0.008, coupon_cf * 0.01)
+        self.assertAlmostEqual(PV, ZspreadZero.total_CF_zspread(0.008, zero_discrete * 0.01, coupon_cf * 0.01, maturity),
+                               places=14)
+        bump = 1e-7
+        finite_difference = (table.present_value(0.008 + bump, coupon_cf * 0.01)[0] -
+                             table.present_value(0.008 - bump, coupon_cf * 0.01)[0]) / (2 * bump)
+        self.assertAlmostEqual(PV_derivative, finite_difference, places=6)
+
+        obj = ZspreadZero(zero_discrete, coupon_cf)
+        self.assertAlmostEqual(table.zspread(coupon_cf), obj.get_zspread(), places=10)
+        self.assertAlmostEqual(obj.get_zspread(jac=False), obj.zspread, places=10)
+
+        # many bonds against the same curve
+        CF = np.array([[3.0, 3.0, 3.0, 3.0, 103.0], [0.0, 0.0, 0.0, 0.0, 100.0], [5.0, 5.0, 5.0, 5.0, 105.0]])
+        price = np.array([100.0, 85.0, 110.0])
+        zspread = table.zspread(CF, price)
+        for i in range(CF.shape[0]):
+            self.assertAlmostEqual(zspread[i], ZspreadZero(zero_discrete, CF[i], price[i]).get_zspread(), places=10)
+        self.assertTrue(np.isnan(table.zspread(coupon_cf, np.nan)))
+
+    def test_continuous(self):
+        par_rates = np.array([1.00, 1.50, 1.80, 2.05, 2.20])
+        coupon_cf = np.array([3.0, 3.0, 3.0, 3.0, 103.0])
+        maturity = np.arange(1, 6)
+        obj = ZspreadPar(par_rates, coupon_cf, compound="continuous")
+        zspread = obj.get_zspread() * 0.01
+        # the continuous zero rates plus the continuous z-spread reprice the bond
+        PV = (coupon_cf * np.exp(-(obj._reg_dict["zero_rates"] + zspread) * maturity)).sum()
+        self.assertAlmostEqual(PV, 100, places=10)
+        obj2 = ZspreadZero(obj._perc_dict["zero_rates"], coupon_cf, compound="continuous")
+        self.assertAlmostEqual(obj2.get_zspread(), zspread * 100, places=10)
+        with self.assertRaises(Exception):
+            ZspreadZero(obj._perc_dict["zero_rates"], coupon_cf, compound="unknown")
+
+    def test_update_par_rate(self):
+        par_rates = np.array([1.00, 1.50, 1.80, 2.05, 2.20])
+        coupon_cf = np.array([3.0, 3.0, 3.0, 3.0, 103.0])
+        for compound in ["discrete", "continuous"]:
+            obj = ZspreadPar(par_rates, coupon_cf, compound=compound)
+            obj.get_zspread()
+            new_rates = par_rates.copy()
+            new_rates[2] = 1.85
+            expected = ZspreadPar(new_rates, coupon_cf, compound=compound)
+            self.assertAlmostEqual(obj.update_par_rate(2, 1.85), expected.get_zspread(), places=12)
+            self.assertTrue(np.allclose(obj._discount_factor, expected._discount_factor, rtol=1e-14))
+            self.assertTrue(np.allclose(obj._perc_dict["zero_rates"], expected._perc_dict["zero_rates"], rtol=1e-14))
+            self.assertEqual(par_rates[2], 1.80)
+            with self.assertRaises(Exception):
+                obj.update_par_rate(5, 2.0)
+
+    def test_par_rate_sensitivities(self):
+        par_rates = np.array([1.00, 1.50, 1.80, 2.05, 2.20])
+        coupon_cf = np.array([3.0, 3.0, 3.0, 3.0, 103.0])
+        h = 1e-6
+        for compound in ["discrete", "continuous"]:
+            sensitivity = ZspreadPar(par_rates, coupon_cf, compound=compound).par_rate_sensitivities()
+            for k in range(par_rates.size):
+                up, down = par_rates.copy(), par_rates.copy()
+                up[k] += h
+                down[k] -= h
+                finite_difference = (ZspreadPar(up, coupon_cf, compound=compound).get_zspread() -
+                                     ZspreadPar(down, coupon_cf, compound=compound).get_zspread()) / (2 * h)
+                self.assertAlmostEqual(sensitivity[k], finite_difference, places=7)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file